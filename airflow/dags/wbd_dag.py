@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -6,7 +7,7 @@ project_root = Path(__file__).parents[3]  # Adjust the number if needed
 sys.path.append(str(project_root))
 
 from airflow.decorators import dag, task
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, get_current_context
 from airflow.exceptions import AirflowException
 from datetime import datetime, timedelta
 from pendulum import duration
@@ -16,11 +17,22 @@ from DataPipeline.src.dashboard import create_dashboard, run_dashboard
 from DataPipeline.src.indicators_config import get_all_indicator_codes
 from DataPipeline.src.exceptions import WorldBankAPIError, DataProcessingError
 from DataPipeline.src.api import WorldBankAPI
+from DataPipeline.src.http_cache import ResponseCache
+from DataPipeline.src.validation import DataValidator
 import logging
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Shared by all tasks and retries so a re-run only downloads what changed
+API_CACHE_DIR = os.environ.get('WBD_API_CACHE_DIR', '/tmp/world_bank_api_cache')
+# Pages fetched by a failed attempt of fetch_missing_data, kept per DAG run and indicator group for its retries
+CHECKPOINT_COLLECTION = 'fetch_checkpoints'
+# 'rows' (a document per country and year) or 'series' (a document per indicator and country)
+STORAGE_LAYOUT = os.environ.get('WBD_STORAGE_LAYOUT', 'rows')
+# Worker processes for indicators fetched together; 1 processes them serially. The pool only
+# pays off for many full-history indicators, so deployments opt in
+PROCESS_WORKERS = int(os.environ.get('WBD_PROCESS_WORKERS', 1))
+
 default_args = {
     'owner': 'airflow',
     'depends_on_past': False,
@@ -44,18 +56,18 @@ def world_bank_data_pipeline():
     @task()
     def check_missing_data():
         try:
-            db_handler = MongoDBHandler()
-            api = WorldBankAPI('https://api.worldbank.org/v2', max_workers=10)
+            db_handler = MongoDBHandler(layout=STORAGE_LAYOUT)
+            api = WorldBankAPI('https://api.worldbank.org/v2', max_workers=10, cache=ResponseCache(API_CACHE_DIR))
             indicator_codes = get_all_indicator_codes()
             
             missing_data = {}
             current_year = datetime.now().year - 1  # We use previous year as the latest available data
 
             for indicator in indicator_codes:
-                # Get the latest data from the database
-                latest_data = db_handler.get_indicator_data(indicator)
+                # Get the latest data from the database, as projected country/year/value columns
+                latest_data = db_handler.get_indicator_values(indicator)
                 
-                if not latest_data:
+                if latest_data.empty:
                     # If no data exists, fetch all available data
                     missing_data[indicator] = {
                         'countries': ['all'],
@@ -64,8 +76,8 @@ def world_bank_data_pipeline():
                     }
                 else:
                     # Find missing countries and years
-                    db_countries = set(item['country_code'] for item in latest_data)
-                    db_years = set(item['year'] for item in latest_data)
+                    db_countries = set(latest_data.index.get_level_values('country_code'))
+                    db_years = set(map(int, latest_data.index.get_level_values('year')))
                     
                     # Fetch a small amount of recent data to get the list of available countries for this indicator
                     recent_data = api.fetch_indicator_data(indicator, 'all', current_year - 1, current_year)
@@ -103,18 +115,34 @@ def world_bank_data_pipeline():
             return None
         
         try:
+            run_id = get_current_context()['run_id']
             data = {}
             indicator_mapping = {}
+            # Indicators with the same countries and years go through one pipeline run, so they are processed in parallel
+            groups = {}
             for indicator, details in missing_data.items():
+                key = (tuple(details['countries']), details['start_year'], details['end_year'])
+                groups.setdefault(key, []).append(indicator)
+            for (countries, start_year, end_year), group in groups.items():
+                # Each group journals under its own key, so finishing one group keeps the others' pages for a retry
+                journal_id = f"{run_id}:{start_year}-{end_year}:{','.join(countries)}"
                 indicator_data, indicator_name = get_world_bank_data(
-                    [indicator],
-                    details['countries'],
-                    details['start_year'],
-                    details['end_year'],
-                    max_workers=10
+                    group,
+                    list(countries),
+                    start_year,
+                    end_year,
+                    max_workers=10,
+                    cache_dir=API_CACHE_DIR,
+                    checkpoint_collection=CHECKPOINT_COLLECTION,
+                    checkpoint_run_id=journal_id,
+                    skip_unchanged=True,
+                    process_workers=PROCESS_WORKERS,
+                    diff_series=True,
+                    storage_layout=STORAGE_LAYOUT
                 )
                 data.update(indicator_data)
-                indicator_mapping[indicator] = indicator_name[indicator]
+                for indicator in group:
+                    indicator_mapping[indicator] = indicator_name.get(indicator, indicator)
             
             logger.info(f"Successfully fetched missing data for {len(data)} indicators.")
             return {'data': data, 'indicator_mapping': indicator_mapping}
@@ -139,18 +167,29 @@ def world_bank_data_pipeline():
             data = pipeline_result['data']
             indicator_mapping = pipeline_result['indicator_mapping']
             
-            db_handler = MongoDBHandler()
+            db_handler = MongoDBHandler(layout=STORAGE_LAYOUT)
+            validator = DataValidator()
             updates_made = False
             
             for indicator, df in data.items():
                 if not df.empty:
                     try:
+                        valid_df, report = validator.validate(df, indicator)
+                        if report['invalid']:
+                            logger.warning(f"Validation report for {indicator}: {report}")
+                        updates_made = True
+                        # Series already stored with the same content (e.g. by fetch_missing_data) are not rewritten
+                        changed_df, digests = db_handler.changed_series(indicator, valid_df)
+                        if changed_df.empty:
+                            logger.info(f"All series of indicator {indicator} are already stored")
+                            continue
                         db_handler.insert_or_update_indicator_data(
                             indicator, 
                             indicator_mapping[indicator], 
-                            df.reset_index().to_dict('records')
+                            changed_df,
+                            validate=False
                         )
-                        updates_made = True
+                        db_handler.refresh_series_digests(indicator, digests)
                         logger.info(f"Successfully updated data for indicator: {indicator}")
                     except Exception as e:
                         logger.error(f"Error updating database for indicator {indicator}: {str(e)}")
@@ -171,7 +210,7 @@ def world_bank_data_pipeline():
             return
         
         try:
-            db_handler = MongoDBHandler()
+            db_handler = MongoDBHandler(layout=STORAGE_LAYOUT)
             indicator_codes = get_all_indicator_codes()
             countries = ["all"]
             start_year = 1960
@@ -180,10 +219,9 @@ def world_bank_data_pipeline():
             data = {}
             indicator_mapping = {}
             for indicator in indicator_codes:
-                indicator_data = db_handler.get_indicator_data(indicator, countries, start_year, end_year)
-                if indicator_data:
-                    df = pd.DataFrame(indicator_data)
-                    df = df.set_index(['country_name', 'country_code', 'year'])
+                # The dashboard only plots values, so they are read without the document fields
+                df = db_handler.get_indicator_values(indicator, countries, start_year, end_year)
+                if not df.empty:
                     data[indicator] = df
                     indicator_mapping[indicator] = db_handler.get_indicator_name(indicator)
                 else:
@@ -0,0 +1,124 @@
+"""Load-test the API layer against the local World Bank stand-in server.
+
+Example:
+    python -m benchmarks.bench_api --indicators 20 --countries all --start_year 1960 --end_year 2023 --latency 0.05
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import aiohttp
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.worldbank_stub import WorldBankStubServer
+from src.api import WorldBankAPI
+from src.rate_limiter import RateLimiter
+
+
+class InstrumentedAPI(WorldBankAPI):
+    """WorldBankAPI that records the wall-clock latency of every HTTP request it sends."""
+
+    def __init__(self, *args, **kwargs):
+        self.latencies = []
+        self._latency_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _record(self, seconds: float):
+        with self._latency_lock:
+            self.latencies.append(seconds)
+
+    def _create_session(self):
+        session = super()._create_session()
+        session.hooks['response'].append(lambda response, *args, **kwargs: self._record(response.elapsed.total_seconds()))
+        return session
+
+    def _create_async_session(self):
+        async def on_request_start(session, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            self._record(time.perf_counter() - context.started)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+        return aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=30),
+                                     headers={'User-Agent': 'WorldBankDataPipeline/1.0'},
+                                     trace_configs=[trace_config])
+
+
+def run_benchmark(api: InstrumentedAPI, queries: List[Tuple[str, List[str], int, int]], engine: str = 'threads') -> Dict:
+    started = time.perf_counter()
+    if engine == 'async':
+        results = asyncio.run(api.fetch_all_data_async(queries))
+    else:
+        results = api.fetch_all_data(queries)
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(api.latencies) if api.latencies else np.zeros(1)
+    return {
+        'engine': engine,
+        'requests': len(api.latencies),
+        'records': sum(len(rows) for rows in results.values()),
+        'seconds': elapsed,
+        'requests_per_second': len(api.latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'throttle_events': api.rate_limiter.stats()['throttle_events'],
+        'hedged_requests': api.resilience_stats()['hedged_requests'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WorldBankAPI against a local stand-in server.")
+    parser.add_argument("--indicators", type=int, default=10, help="Number of synthetic indicators")
+    parser.add_argument("--countries", nargs="+", default=["all"], help="Country codes, or 'all'")
+    parser.add_argument("--start_year", type=int, default=1960)
+    parser.add_argument("--end_year", type=int, default=2023)
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+    parser.add_argument("--max_workers", type=int, default=32)
+    parser.add_argument("--per_page", type=int, default=None, help="Override rows per page to force more pagination")
+    parser.add_argument("--latency", type=float, default=0.02, help="Base server latency in seconds")
+    parser.add_argument("--latency_jitter", type=float, default=0.02, help="Extra uniform random latency in seconds")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--throttle_rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--hedge_requests", action="store_true", help="Hedge requests slower than the observed p95")
+    parser.add_argument("--recordings_dir", help="Replay recorded responses from this directory")
+    parser.add_argument("--record_from", help="Proxy and record unknown requests from this upstream base URL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.per_page:
+        import src.api
+        src.api.PER_PAGE = args.per_page
+
+    server = WorldBankStubServer(latency=args.latency, latency_jitter=args.latency_jitter,
+                                 error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                 recordings_dir=args.recordings_dir, upstream=args.record_from)
+    with server:
+        api = InstrumentedAPI(server.base_url, max_workers=args.max_workers, max_concurrency=args.max_workers,
+                              hedge_requests=args.hedge_requests,
+                              rate_limiter=RateLimiter(rate=1000.0, max_rate=5000.0, max_concurrency=args.max_workers,
+                                                       default_retry_after=1.0))
+        queries = [(f"SYN.IND.{i:03d}", args.countries, args.start_year, args.end_year) for i in range(args.indicators)]
+        report = run_benchmark(api, queries, args.engine)
+
+    print(f"engine={report['engine']} requests={report['requests']} records={report['records']} "
+          f"seconds={report['seconds']:.2f} req/s={report['requests_per_second']:.1f} "
+          f"p50={report['p50_ms']:.1f}ms p99={report['p99_ms']:.1f}ms throttled={report['throttle_events']} "
+          f"hedged={report['hedged_requests']} "
+          f"server_statuses={dict(server.status_counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measure the memory saved by compact indicator frames on the full SDG indicator set.
+
+Frames are shaped like ``WorldBankDataPipeline.get_all_data`` output: MongoDB documents with
+``_id``, ``indicator_name`` and ``last_updated`` on every row, indexed by country and year.
+
+Example:
+    python -m benchmarks.bench_memory --countries 266 --start_year 1960 --end_year 2023
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+from bson import ObjectId
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_processor import synthetic_records
+from src.data_processor import DataProcessor
+from src.indicators_config import get_all_indicator_codes
+
+
+def database_frame(indicator_code: str, countries: int, start_year: int, end_year: int) -> pd.DataFrame:
+    df, indicator_name = DataProcessor.process_world_bank_data(
+        synthetic_records(countries, start_year, end_year, indicator_code), indicator_code)
+    last_updated = datetime.now(timezone.utc)
+    documents = [dict(row, _id=ObjectId(), indicator_name=indicator_name, last_updated=last_updated)
+                 for row in df.reset_index().to_dict('records')]
+    return pd.DataFrame(documents).set_index(['country_name', 'country_code', 'year'])
+
+
+def frames_bytes(frames: Dict[str, pd.DataFrame]) -> int:
+    # memory_usage counts the index as well
+    return sum(int(df.memory_usage(deep=True).sum()) for df in frames.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of database-shaped and compact indicator frames.")
+    parser.add_argument("--countries", type=int, default=266)
+    parser.add_argument("--start_year", type=int, default=1960)
+    parser.add_argument("--end_year", type=int, default=2023)
+    args = parser.parse_args()
+
+    indicator_codes = list(dict.fromkeys(get_all_indicator_codes()))
+    frames = {code: database_frame(code, args.countries, args.start_year, args.end_year) for code in indicator_codes}
+    rows = sum(len(df) for df in frames.values())
+
+    baseline = frames_bytes(frames)
+    compact = frames_bytes(DataProcessor.compact_frames(frames))
+    compact32 = frames_bytes(DataProcessor.compact_frames(frames, float32=True))
+    mib = 1024 * 1024
+    print(f"indicators={len(frames)} rows={rows} database={baseline / mib:.1f}MiB "
+          f"compact={compact / mib:.1f}MiB ({baseline / compact:.1f}x) "
+          f"compact_float32={compact32 / mib:.1f}MiB ({baseline / compact32:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark DataProcessor.process_world_bank_data on full-size indicator histories.
+
+Example:
+    python -m benchmarks.bench_processor --countries 266 --start_year 1960 --end_year 2023
+    python -m benchmarks.bench_processor --indicators 16 --process_workers 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.worldbank_stub import WorldBankStubServer
+from src.data_processor import DataProcessor
+from src.parallel_processor import ParallelProcessor
+
+
+def synthetic_records(countries: int, start_year: int, end_year: int, indicator_code: str = 'SYN.IND.000') -> List[Dict]:
+    """Records shaped like the API's, one per country and year (about 17k for 266 countries over 64 years)."""
+    stub = WorldBankStubServer(countries=countries)
+    total = countries * (end_year - start_year + 1)
+    return stub.synthetic_page([indicator_code], ['all'], f"{start_year}:{end_year}", 1, total)[1]
+
+
+def pandas_path(records: List[Dict], indicator_code: str) -> pd.DataFrame:
+    df = DataProcessor._records_frame(records, indicator_code).set_index(['country_name', 'country_code', 'year'])
+    df['value'] = df['value'].astype('float64')
+    return df
+
+
+def columnar_path(records: List[Dict], indicator_code: str) -> pd.DataFrame:
+    return DataProcessor.process_world_bank_data(records, indicator_code)[0]
+
+
+def best_of(fn: Callable, records: List[Dict], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(records, 'SYN.IND.000')
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar and pandas processing paths.")
+    parser.add_argument("--countries", type=int, default=266)
+    parser.add_argument("--start_year", type=int, default=1960)
+    parser.add_argument("--end_year", type=int, default=2023)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--indicators", type=int, default=1, help="Also time a batch of this many indicators")
+    parser.add_argument("--process_workers", type=int, default=4)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.countries, args.start_year, args.end_year)
+    pd.testing.assert_frame_equal(pandas_path(records, 'SYN.IND.000'), columnar_path(records, 'SYN.IND.000'), check_exact=True)
+
+    pandas_seconds = best_of(pandas_path, records, args.repeat)
+    columnar_seconds = best_of(columnar_path, records, args.repeat)
+    print(f"rows={len(records)} pandas={pandas_seconds * 1000:.1f}ms columnar={columnar_seconds * 1000:.1f}ms "
+          f"speedup={pandas_seconds / columnar_seconds:.1f}x")
+
+    if args.indicators > 1:
+        batch = {f'SYN.IND.{i:03d}': records for i in range(args.indicators)}
+        started = time.perf_counter()
+        for indicator_code, raw_data in batch.items():
+            DataProcessor.process_world_bank_data(raw_data, indicator_code)
+        serial_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        ParallelProcessor(args.process_workers).process_all(batch)
+        parallel_seconds = time.perf_counter() - started
+        print(f"indicators={args.indicators} serial={serial_seconds * 1000:.1f}ms "
+              f"processes={args.process_workers} parallel={parallel_seconds * 1000:.1f}ms "
+              f"speedup={serial_seconds / parallel_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
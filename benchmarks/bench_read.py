@@ -0,0 +1,96 @@
+"""Compare reading a full indicator through get_indicator_data and through the raw BSON column path.
+
+The stored documents are built as the row layout stores them. The current path decodes every
+full document and builds the ``get_all_data`` frame from the dicts; the projected paths read the
+documents as the server returns them for ``COLUMN_PROJECTION``, once decoded to dicts and once as
+raw batches decoded by ``decode_batches``. No MongoDB server is needed.
+
+Example:
+    python -m benchmarks.bench_read --countries 266 --start_year 1960 --end_year 2023
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import bson
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_storage import layout_documents
+from src.bson_columns import COLUMN_PROJECTION, columns_frame, decode_batches
+
+# Documents in a find's first batch; later batches are filled up to the 16 MiB message limit
+FIRST_BATCH_SIZE = 101
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+
+def raw_batches(encoded: List[bytes]) -> List[bytes]:
+    batches, batch, size = [], [], 0
+    for document in encoded:
+        limit_reached = len(batches) == 0 and len(batch) == FIRST_BATCH_SIZE
+        if batch and (limit_reached or size + len(document) > MAX_BATCH_BYTES):
+            batches.append(b''.join(batch))
+            batch, size = [], 0
+        batch.append(document)
+        size += len(document)
+    if batch:
+        batches.append(b''.join(batch))
+    return batches
+
+
+def best_of(repeat: int, read: Callable[[], pd.DataFrame]):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = read()
+        timings.append(time.perf_counter() - started)
+    return df, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the dict and raw BSON column read paths on one indicator.")
+    parser.add_argument("--indicator", default="SP.POP.TOTL")
+    parser.add_argument("--countries", type=int, default=266)
+    parser.add_argument("--start_year", type=int, default=1960)
+    parser.add_argument("--end_year", type=int, default=2023)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows, _ = layout_documents(args.indicator, args.countries, args.start_year, args.end_year)
+    documents = [bson.decode(document) for document in rows]
+    fields = [field for field, included in COLUMN_PROJECTION.items() if included]
+    projected = [bson.encode({field: document[field] for field in fields}) for document in documents]
+    batches = raw_batches(projected)
+    country_names = {document['country_code']: document['country_name'] for document in documents}
+    index = ['country_name', 'country_code', 'year']
+
+    def read_documents():
+        return pd.DataFrame([bson.decode(document) for document in rows]).set_index(index)
+
+    def read_projected():
+        df = pd.DataFrame(bson.decode_all(b''.join(batches)))
+        df.insert(0, 'country_name', df['country_code'].map(country_names))
+        return df.set_index(index)
+
+    def read_columns():
+        return columns_frame(decode_batches(batches), country_names, documents[0]['indicator_name'])
+
+    full_frame, full_seconds = best_of(args.repeat, read_documents)
+    projected_frame, projected_seconds = best_of(args.repeat, read_projected)
+    column_frame, column_seconds = best_of(args.repeat, read_columns)
+    pd.testing.assert_series_equal(column_frame['value'], full_frame['value'])
+    pd.testing.assert_series_equal(projected_frame['value'], full_frame['value'])
+
+    kib = 1024
+    print(f"indicator={args.indicator} rows={len(rows)} batches={len(batches)} "
+          f"bson full={sum(map(len, rows)) / kib:.0f}KiB projected={sum(map(len, batches)) / kib:.0f}KiB")
+    print(f"read full_dicts={full_seconds * 1000:.1f}ms projected_dicts={projected_seconds * 1000:.1f}ms "
+          f"raw_columns={column_seconds * 1000:.1f}ms ({full_seconds / column_seconds:.1f}x vs full, "
+          f"{projected_seconds / column_seconds:.1f}x vs projected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the per-(country, year) and per-series MongoDB layouts on the full SDG indicator set.
+
+Documents are built exactly as each layout stores them and measured as BSON; reads decode the
+stored BSON and rebuild the ``get_all_data`` frame, so no MongoDB server is needed.
+
+Example:
+    python -m benchmarks.bench_storage --countries 266 --start_year 1960 --end_year 2023
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import bson
+import pandas as pd
+from bson import ObjectId
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_processor import synthetic_records
+from src.data_processor import DataProcessor
+from src.indicators_config import get_all_indicator_codes
+from src.series_store import SeriesStore, series_id
+
+
+class StoredCollection:
+    """Stand-in for a collection whose ``find`` decodes the stored BSON documents."""
+
+    def __init__(self, encoded: List[bytes]):
+        self.encoded = encoded
+
+    def find(self, query=None, projection=None):
+        return [bson.decode(document) for document in self.encoded]
+
+
+def layout_documents(indicator_code: str, countries: int, start_year: int, end_year: int):
+    df, indicator_name = DataProcessor.process_world_bank_data(
+        synthetic_records(countries, start_year, end_year, indicator_code), indicator_code)
+    last_updated = datetime.now(timezone.utc)
+    rows = [dict(row, _id=ObjectId(), indicator_name=indicator_name, last_updated=last_updated)
+            for row in df.reset_index().to_dict('records')]
+    series: Dict[str, Dict] = {}
+    for row in rows:
+        document = series.setdefault(row['country_code'], {
+            '_id': series_id(indicator_code, row['country_code']), 'indicator': indicator_code,
+            'indicator_name': indicator_name, 'country_code': row['country_code'],
+            'country_name': row['country_name'], 'last_updated': last_updated, 'values': {}})
+        document['values'][str(row['year'])] = row['value']
+    return [bson.encode(row) for row in rows], [bson.encode(document) for document in series.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare document count, size and read time of the storage layouts.")
+    parser.add_argument("--countries", type=int, default=266)
+    parser.add_argument("--start_year", type=int, default=1960)
+    parser.add_argument("--end_year", type=int, default=2023)
+    args = parser.parse_args()
+
+    indicator_codes = list(dict.fromkeys(get_all_indicator_codes()))
+    stored = {code: layout_documents(code, args.countries, args.start_year, args.end_year) for code in indicator_codes}
+    row_documents = sum(len(rows) for rows, _ in stored.values())
+    series_documents = sum(len(series) for _, series in stored.values())
+    row_bytes = sum(map(len, (document for rows, _ in stored.values() for document in rows)))
+    series_bytes = sum(map(len, (document for _, series in stored.values() for document in series)))
+
+    started = time.perf_counter()
+    for rows, _ in stored.values():
+        row_frame = pd.DataFrame(StoredCollection(rows).find()).set_index(['country_name', 'country_code', 'year'])
+    rows_seconds = time.perf_counter() - started
+    store = SeriesStore({'indicator_series': None})
+    started = time.perf_counter()
+    for _, series in stored.values():
+        store.collection = StoredCollection(series)
+        series_frame = store.find_frame(indicator_codes[-1])
+    series_seconds = time.perf_counter() - started
+    pd.testing.assert_series_equal(series_frame['value'].sort_index(), row_frame['value'].sort_index())
+
+    mib = 1024 * 1024
+    # Both layouts keep two indexes: _id and the (country_code, year) or (indicator, country_code) key
+    print(f"indicators={len(stored)} documents rows={row_documents} series={series_documents} "
+          f"({row_documents / series_documents:.0f}x) index_entries rows={2 * row_documents} series={2 * series_documents}")
+    print(f"bson rows={row_bytes / mib:.1f}MiB series={series_bytes / mib:.1f}MiB ({row_bytes / series_bytes:.1f}x) "
+          f"read rows={rows_seconds * 1000:.0f}ms series={series_seconds * 1000:.0f}ms ({rows_seconds / series_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
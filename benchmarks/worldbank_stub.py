@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class WorldBankStubServer:
+    """Local stand-in for the World Bank v2 API, for load testing without network access.
+
+    Responses are either replayed from a recordings directory or generated synthetically with
+    the same shape, pagination metadata and row layout as the real API. Latency, 5xx errors
+    and 429 throttling can be injected. With ``upstream`` set, unknown requests are proxied to
+    the real API and recorded for later replay.
+    """
+
+    def __init__(self, countries: int = 266, latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: int = 1,
+                 recordings_dir: Optional[str] = None, upstream: Optional[str] = None,
+                 seed: int = 0, host: str = '127.0.0.1', port: int = 0):
+        self.country_codes = [f"C{i:02d}" if i < 100 else f"X{i:02d}" for i in range(countries)]
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.recordings_dir = recordings_dir
+        self.upstream = upstream
+        self.host = host
+        self.port = port
+        self.status_counts = Counter()
+        self._random = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._started = threading.Event()
+
+    # --- Lifecycle -------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v2"
+
+    def start(self) -> str:
+        """Serve from a background thread so synchronous clients can use it; returns the base URL."""
+        self._thread = threading.Thread(target=self._serve, name='worldbank-stub', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        logger.info(f"World Bank stub server listening on {self.base_url}")
+        return self.base_url
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._start_site())
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    async def _start_site(self):
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/v2/sources', self.handle_sources)
+        app.router.add_get('/v2/indicator/{indicator}', self.handle_indicator_metadata)
+        app.router.add_get('/v2/country/{country}/indicator/{indicator}', self.handle_indicator_data)
+        return app
+
+    # --- Handlers --------------------------------------------------------------
+
+    async def _inject_faults(self) -> Optional[web.Response]:
+        delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            return web.json_response({'message': 'Too Many Requests'}, status=429,
+                                     headers={'Retry-After': str(self.retry_after)})
+        if roll < self.throttle_rate + self.error_rate:
+            return web.json_response({'message': 'Service Unavailable'}, status=503)
+        return None
+
+    def _respond(self, response: web.Response) -> web.Response:
+        self.status_counts[response.status] += 1
+        return response
+
+    async def handle_sources(self, request: web.Request) -> web.Response:
+        return self._respond(web.json_response([
+            {'page': 1, 'pages': 1, 'per_page': '50', 'total': 1},
+            [{'id': '2', 'name': 'World Development Indicators', 'lastupdated': '2024-06-28'}]
+        ]))
+
+    async def handle_indicator_metadata(self, request: web.Request) -> web.Response:
+        fault = await self._inject_faults()
+        if fault is not None:
+            return self._respond(fault)
+        codes = request.match_info['indicator'].split(';')
+        return self._respond(web.json_response([
+            {'page': 1, 'pages': 1, 'per_page': '50', 'total': len(codes)},
+            [{'id': code, 'name': f"Synthetic indicator {code}",
+              'source': {'id': '2', 'value': 'World Development Indicators'}} for code in codes]
+        ]))
+
+    async def handle_indicator_data(self, request: web.Request) -> web.Response:
+        fault = await self._inject_faults()
+        if fault is not None:
+            return self._respond(fault)
+
+        recorded = await self._replay_or_record(request)
+        if recorded is not None:
+            return self._respond(web.json_response(recorded))
+
+        return self._respond(web.json_response(self.synthetic_page(
+            request.match_info['indicator'].split(';'),
+            request.match_info['country'].split(';'),
+            request.query.get('date'),
+            int(request.query.get('page', 1)),
+            int(request.query.get('per_page', 50)))))
+
+    # --- Synthetic data --------------------------------------------------------
+
+    def synthetic_page(self, indicator_codes: List[str], countries: List[str], date: Optional[str],
+                       page: int, per_page: int) -> List:
+        if len(countries) == 1 and countries[0].lower() == 'all':
+            countries = self.country_codes
+        start_year, end_year = (int(part) for part in (date or '2000:2020').split(':'))
+        # The API lists the latest year first
+        years = list(range(end_year, start_year - 1, -1))
+
+        total = len(indicator_codes) * len(countries) * len(years)
+        pages = max((total + per_page - 1) // per_page, 1)
+        metadata = {'page': page, 'pages': pages, 'per_page': per_page, 'total': total,
+                    'sourceid': '2', 'lastupdated': '2024-06-28'}
+
+        rows = []
+        for position in range((page - 1) * per_page, min(page * per_page, total)):
+            indicator_index, rest = divmod(position, len(countries) * len(years))
+            country_index, year_index = divmod(rest, len(years))
+            rows.append(self._synthetic_row(indicator_codes[indicator_index], countries[country_index], years[year_index]))
+        return [metadata, rows or None]
+
+    @staticmethod
+    def _synthetic_row(indicator_code: str, country: str, year: int) -> Dict:
+        seed = int(hashlib.md5(f"{indicator_code}{country}{year}".encode()).hexdigest()[:8], 16)
+        value = None if seed % 10 == 0 else round((seed % 1000000) / 100.0, 2)
+        return {
+            'indicator': {'id': indicator_code, 'value': f"Synthetic indicator {indicator_code}"},
+            'country': {'id': country[:2], 'value': f"Country {country}"},
+            'countryiso3code': country,
+            'date': str(year),
+            'value': value,
+            'unit': '',
+            'obs_status': '',
+            'decimal': 1,
+        }
+
+    # --- Record / replay -------------------------------------------------------
+
+    def _recording_path(self, request: web.Request) -> str:
+        query = sorted((key, value) for key, value in request.query.items())
+        key = hashlib.sha256(json.dumps([request.path, query]).encode('utf-8')).hexdigest()
+        return os.path.join(self.recordings_dir, f"{key}.json")
+
+    async def _replay_or_record(self, request: web.Request):
+        if not self.recordings_dir:
+            return None
+        path = self._recording_path(request)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        if not self.upstream:
+            return None
+
+        upstream_path = request.path[len('/v2'):]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{self.upstream}{upstream_path}", params=request.query) as response:
+                response.raise_for_status()
+                body = await response.json(content_type=None)
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(body, f)
+        logger.info(f"Recorded {request.path_qs}")
+        return body
@@ -20,6 +20,22 @@ def main():
     parser.add_argument("--end_year", type=int, default=2023, help="End year for data retrieval (default: current year)")
     parser.add_argument("--visualize", action="store_true", help="Run the visualization dashboard")
     parser.add_argument("--max_workers", type=int, default=10, help="Maximum number of concurrent requests")
+    parser.add_argument("--use_async", action="store_true", help="Fetch with the asyncio engine instead of threads")
+    parser.add_argument("--combine_indicators", action="store_true", help="Request indicators of the same source together")
+    parser.add_argument("--cache_dir", help="Directory for the persistent API response cache (disabled if omitted)")
+    parser.add_argument("--streaming", action="store_true", help="Process and store API pages as they arrive")
+    parser.add_argument("--flush_rows", type=int, help="With --streaming, buffer pages and write every this many processed rows")
+    parser.add_argument("--bulk_first_load", action="store_true", help="Load indicators missing from the database from bulk CSV archives")
+    parser.add_argument("--skip_unchanged", action="store_true", help="Skip indicators whose upstream lastupdated date has not changed")
+    parser.add_argument("--hedge_requests", action="store_true", help="Send a duplicate of requests slower than the observed p95 latency")
+    parser.add_argument("--shard_years", action="store_true", help="Split long date ranges into concurrent year shards of about one page")
+    parser.add_argument("--compact", action="store_true", help="Keep loaded frames in compact dtypes (categorical countries, int16 years)")
+    parser.add_argument("--float32", action="store_true", help="With --compact, store values as float32")
+    parser.add_argument("--process_workers", type=int, default=1, help="Worker processes for processing indicators in parallel (default: 1)")
+    parser.add_argument("--diff_series", action="store_true", help="Write only country series whose content digest changed")
+    parser.add_argument("--storage_layout", choices=["rows", "series"], default="rows",
+                        help="MongoDB layout: a document per (country, year) or per (indicator, country) series")
+    parser.add_argument("--checkpoint_path", help="Journal of fetched pages so an interrupted run can resume (disabled if omitted)")
     
     args = parser.parse_args()
 
@@ -40,7 +56,22 @@ def main():
     # Fetch data using the batch processing pipeline
     try:
         logger.info("Starting data retrieval process...")
-        data, indicator_mapping = get_world_bank_data(args.indicators, args.countries, args.start_year, args.end_year, args.max_workers)
+        data, indicator_mapping = get_world_bank_data(args.indicators, args.countries, args.start_year, args.end_year, args.max_workers,
+                                                      use_async=args.use_async,
+                                                      combine_indicators=args.combine_indicators,
+                                                      cache_dir=args.cache_dir,
+                                                      streaming=args.streaming,
+                                                      bulk_first_load=args.bulk_first_load,
+                                                      checkpoint_path=args.checkpoint_path,
+                                                      skip_unchanged=args.skip_unchanged,
+                                                      hedge_requests=args.hedge_requests,
+                                                      shard_years=args.shard_years,
+                                                      compact=args.compact,
+                                                      float32=args.float32,
+                                                      process_workers=args.process_workers,
+                                                      flush_rows=args.flush_rows,
+                                                      diff_series=args.diff_series,
+                                                      storage_layout=args.storage_layout)
         
         if not args.visualize:
             for indicator_code, df in data.items():
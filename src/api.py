@@ -1,34 +1,89 @@
+import asyncio
+import queue
+import threading
+import aiohttp
 import requests
 import time
 import logging
-from typing import List, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 from requests.exceptions import RequestException, HTTPError, ConnectionError, Timeout
 from .exceptions import WorldBankAPIError
+from .checkpoint import CheckpointJournal
+from .http_cache import ResponseCache
+from .rate_limiter import RateLimiter
+from .resilience import CircuitBreaker, LatencyHistogram
+from .single_flight import SingleFlight
+from .request_planner import (PER_PAGE, ALL_COUNTRIES_ROWS_PER_YEAR, plan_country_batches, plan_indicator_groups,
+                              plan_year_shards, split_rows_by_country, split_rows_by_indicator)
 
 logger = logging.getLogger(__name__)
 
+class _ConsumerStopped(Exception):
+    pass
+
 class WorldBankAPI:
-    def __init__(self, base_url: str, max_workers: int = 32, max_retries: int = 3, retry_backoff_factor: float = 0.1):
+    def __init__(self, base_url: str, max_workers: int = 32, max_retries: int = 3, retry_backoff_factor: float = 0.1,
+                 max_concurrency: int = 32, max_page_workers: int = 4, combine_indicators: bool = False,
+                 cache: Optional[ResponseCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 checkpoints: Optional[CheckpointJournal] = None, hedge_requests: bool = False,
+                 hedge_percentile: float = 95.0, hedge_min_samples: int = 20,
+                 circuit_breaker: Optional[CircuitBreaker] = None, single_flight_results: int = 0,
+                 shard_years: bool = False):
         self.base_url = base_url
         self.max_workers = max_workers
         self.max_retries = max_retries
         self.retry_backoff_factor = retry_backoff_factor
+        self.max_concurrency = max_concurrency
+        self.max_page_workers = max_page_workers
+        self.combine_indicators = combine_indicators
+        self.shard_years = shard_years
+        self.indicator_sources = {}
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self.hedge_requests = hedge_requests
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._stats_lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.single_flight = SingleFlight(max_results=single_flight_results)
+        self.duplicate_queries = 0
+        # Hedged attempts run here so the calling worker can wait on both with a timeout
+        hedge_workers = 2 * max(max_workers, max_concurrency) * max_page_workers
+        self._hedge_executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='hedge') if hedge_requests else None
+        # One limiter for every worker thread and coroutine of this client
+        self.rate_limiter = rate_limiter or RateLimiter(max_concurrency=max(max_concurrency, max_workers))
         self.session = self._create_session()
 
     def _create_session(self) -> requests.Session:
         session = requests.Session()
+        # 429s are left to the shared rate limiter rather than retried inside one worker
         retry = Retry(total=self.max_retries, 
                       backoff_factor=self.retry_backoff_factor, 
-                      status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retry)
+                      status_forcelist=[500, 502, 503, 504],
+                      respect_retry_after_header=False)
+        # Enough pooled connections for every worker, otherwise keep-alive connections get discarded
+        pool_size = max(self.max_workers, self.max_concurrency)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
         session.mount('http://', adapter)
         session.mount('https://', adapter)
         session.headers.update({'User-Agent': 'WorldBankDataPipeline/1.0'})
         return session
 
+    def _create_async_session(self) -> aiohttp.ClientSession:
+        # A single connector per run keeps connections alive across all indicators
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+        return aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=30),
+                                     headers={'User-Agent': 'WorldBankDataPipeline/1.0'})
+
     def test_connection(self) -> bool:
         """Test the connection to the World Bank API."""
         try:
@@ -40,53 +95,121 @@ class WorldBankAPI:
             logger.error(f"Failed to connect to the World Bank API: {str(e)}")
             return False
 
-    def fetch_indicator_data(self, indicator_code: str, country: str, start_year: int, end_year: int) -> List[Dict]:
-        # Input validation for date range
-        if end_year < start_year:
-            raise ValueError("End year must be greater than or equal to start year")
-    
-        url = f"{self.base_url}/country/{country}/indicator/{indicator_code}"
-        params = {
-            'format': 'json',
-            'per_page': 3000,
-            'date': f"{start_year}:{end_year}"
+    def _cached_page(self, url: str, params: Dict) -> Tuple[Optional[Dict], bool]:
+        if self.cache is None:
+            return None, False
+        entry = self.cache.lookup(url, params)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.record_hit()
+            return entry, True
+        return entry, False
+
+    def _store_page(self, url: str, params: Dict, data, headers):
+        if self.cache is not None:
+            self.cache.record_miss()
+            self.cache.store(url, params, data, headers.get('ETag'), headers.get('Last-Modified'))
+
+    def _record_outcome(self, host: str, status_code: Optional[int], seconds: float):
+        # status_code is None for network failures and 0 for requests that never completed
+        if status_code is None or status_code >= 500:
+            self.circuit_breaker.record_failure(host)
+        elif status_code == 0:
+            self.circuit_breaker.record_cancelled(host)
+        else:
+            self.latency.record(seconds)
+            self.circuit_breaker.record_success(host)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_requests or self.latency.count < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _count_hedge(self, won: bool = False):
+        with self._stats_lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedged_requests += 1
+
+    def _send(self, url: str, params: Dict, headers: Dict) -> requests.Response:
+        host = urlparse(url).netloc
+        self.circuit_breaker.before_request(host)
+        self.rate_limiter.acquire()
+        status_code, retry_after = 0, None
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=30)
+            status_code, retry_after = response.status_code, response.headers.get('Retry-After')
+            return response
+        except Exception:
+            # Any failed request (network errors, RetryError after repeated 5xx, broken or undecodable
+            # bodies) is a failure; only a call interrupted by a BaseException keeps status_code 0
+            status_code = None
+            raise
+        finally:
+            self.rate_limiter.release(status_code, retry_after)
+            self._record_outcome(host, status_code, time.perf_counter() - started)
+
+    def _get(self, url: str, params: Dict, headers: Dict) -> requests.Response:
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._send(url, params, headers)
+
+        # A request still unanswered at the observed p95 gets a duplicate; the first answer wins
+        attempts = [self._hedge_executor.submit(self._send, url, params, headers)]
+        done, _ = wait(attempts, timeout=delay)
+        if not done:
+            self._count_hedge()
+            attempts.append(self._hedge_executor.submit(self._send, url, params, headers))
+
+        pending, error = set(attempts), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    if attempt is not attempts[0]:
+                        self._count_hedge(won=True)
+                    return attempt.result()
+                error = error or attempt.exception()
+        raise error
+
+    def single_flight_stats(self) -> Dict[str, int]:
+        return {**self.single_flight.stats(), 'duplicate_queries': self.duplicate_queries}
+
+    def resilience_stats(self) -> Dict:
+        with self._stats_lock:
+            hedged_requests, hedge_wins = self.hedged_requests, self.hedge_wins
+        return {
+            'latency': self.latency.stats(),
+            'hedged_requests': hedged_requests,
+            'hedge_wins': hedge_wins,
+            'circuit_breaker': self.circuit_breaker.stats(),
         }
-    
-        all_data = []
-        page = 1
+
+    def _fetch_page(self, url: str, params: Dict, indicator_code: str) -> Optional[List]:
+        cached, fresh = self._cached_page(url, params)
+        if fresh:
+            return cached['data']
+
         retries = 0
-    
         while retries < self.max_retries:
             try:
-                params['page'] = page
-                response = self.session.get(url, params=params, timeout=30)
+                response = self._get(url, params, ResponseCache.revalidation_headers(cached))
+                if cached is not None and response.status_code == 304:
+                    self.cache.record_revalidation(url, params, cached)
+                    return cached['data']
                 response.raise_for_status()
-    
+
                 try:
                     data = response.json()
                 except ValueError as e:
                     logger.error(f"Error parsing JSON response for indicator: {indicator_code}")
                     raise WorldBankAPIError(f"Error parsing JSON response for indicator: {indicator_code}") from e
-    
-                logger.debug(f"API Response for {indicator_code}, page {page}: {data}")
-    
-                if not isinstance(data, list) or len(data) < 2:
-                    logger.warning(f"Invalid response format for indicator: {indicator_code}")
-                    break
-    
-                metadata, page_data = data
-                if not isinstance(page_data, list) or not page_data:
-                    break
-    
-                all_data.extend(page_data)
-                logger.info(f"Fetched {len(page_data)} records for {indicator_code}, page {page}")
-    
-                if page >= metadata.get('pages', 0):
-                    break
-    
-                page += 1
-                retries = 0  # Reset retries on successful request
-    
+
+                logger.debug(f"API Response for {indicator_code}, page {params.get('page')}: {data}")
+                self._store_page(url, params, data, response.headers)
+                return data
+
             except (ConnectionError, Timeout) as e:
                 logger.warning(f"Network error fetching data for {indicator_code}: {str(e)}. Retrying...")
                 retries += 1
@@ -94,8 +217,8 @@ class WorldBankAPI:
             except HTTPError as e:
                 status_code = getattr(e.response, 'status_code', None)
                 if status_code == 429:  # Too Many Requests
+                    # The shared rate limiter holds every worker back until Retry-After has passed
                     logger.warning("Rate limit exceeded. Waiting before retry...")
-                    time.sleep(60)
                     retries += 1
                 else:
                     logger.error(f"HTTP error fetching data for {indicator_code}: {str(e)}")
@@ -103,35 +226,532 @@ class WorldBankAPI:
             except RequestException as e:
                 logger.error(f"Error fetching data for {indicator_code}: {str(e)}")
                 raise WorldBankAPIError(f"Error fetching data for {indicator_code}: {str(e)}")
+
+        logger.error(f"Max retries reached for indicator: {indicator_code}")
+        raise WorldBankAPIError(f"Max retries reached for indicator: {indicator_code}")
+
+    def probe_last_updated(self, indicator_code: str, country: str = 'all') -> Optional[str]:
+        """Return the upstream ``lastupdated`` date of an indicator, read from a one-row request."""
+        url = f"{self.base_url}/country/{country}/indicator/{indicator_code}"
+        params = {'format': 'json', 'per_page': 1, 'page': 1}
+        try:
+            data = self.single_flight.do(self._flight_key(url, params), lambda: self._fetch_page(url, params, indicator_code))
+        except WorldBankAPIError as e:
+            logger.warning(f"Could not probe lastupdated for {indicator_code}: {str(e)}")
+            return None
+        if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+            return None
+        return data[0].get('lastupdated')
+
+    @staticmethod
+    def _flight_key(url: str, params: Dict) -> Tuple:
+        return url, tuple(sorted((key, str(value)) for key, value in params.items()))
+
+    def _fetch_unit(self, url: str, params: Dict, indicator_code: str, country: str) -> Optional[List]:
+        # Identical pages requested concurrently share one call; pages are not kept afterwards,
+        # so rows already streamed out are not held for the rest of the run
+        return self.single_flight.do(self._flight_key(url, params),
+                                     lambda: self._fetch_journalled(url, params, indicator_code, country), remember=False)
+
+    def _fetch_journalled(self, url: str, params: Dict, indicator_code: str, country: str) -> Optional[List]:
+        # Pages finished by an earlier, interrupted run are served from the checkpoint journal
+        unit = (indicator_code, country, params['date'], params['page'])
+        if self.checkpoints is not None:
+            data = self.checkpoints.get(unit)
+            if data is not None:
+                return data
+        data = self._fetch_page(url, params, indicator_code)
+        if self.checkpoints is not None:
+            self.checkpoints.record(unit, data)
+        return data
+
+    @staticmethod
+    def _split_page(data, indicator_code: str, page: int) -> Tuple[Dict, List[Dict]]:
+        if not isinstance(data, list) or len(data) < 2:
+            logger.warning(f"Invalid response format for indicator: {indicator_code}")
+            return {}, []
+
+        metadata, page_data = data
+        if not isinstance(page_data, list) or not page_data:
+            return metadata or {}, []
+
+        logger.info(f"Fetched {len(page_data)} records for {indicator_code}, page {page}")
+        return metadata, page_data
+
+    def _indicator_request(self, indicator_code: str, country: str, start_year: int, end_year: int,
+                           source: Optional[str] = None) -> Tuple[str, Dict]:
+        # Input validation for date range
+        if end_year < start_year:
+            raise ValueError("End year must be greater than or equal to start year")
+
+        url = f"{self.base_url}/country/{country}/indicator/{indicator_code}"
+        params = {
+            'format': 'json',
+            'per_page': PER_PAGE,
+            'date': f"{start_year}:{end_year}"
+        }
+        if source is not None:
+            # Required by the API when several indicators are requested at once
+            params['source'] = source
+        return url, params
+
+    def iter_indicator_pages(self, indicator_code: str, country: str, start_year: int, end_year: int,
+                             source: Optional[str] = None) -> Iterator[List[Dict]]:
+        """Yield the rows of each page in page order as soon as that page has arrived."""
+        url, params = self._indicator_request(indicator_code, country, start_year, end_year, source)
+
+        def fetch(page: int) -> List[Dict]:
+            return self._split_page(self._fetch_unit(url, {**params, 'page': page}, indicator_code, country), indicator_code, page)[1]
+
+        metadata, page_data = self._split_page(self._fetch_unit(url, {**params, 'page': 1}, indicator_code, country), indicator_code, 1)
+        if not page_data:
+            return
+        yield page_data
+        total_pages = metadata.get('pages', 0)
+        if total_pages <= 1:
+            return
+
+        # The page count is known after page 1, so the rest can be fetched side by side.
+        # Each page retries on its own, and only a window of pages is held ahead of the consumer.
+        with ThreadPoolExecutor(max_workers=min(self.max_page_workers, total_pages - 1)) as executor:
+            pending = deque()
+            next_page = 2
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < self.max_page_workers:
+                    pending.append(executor.submit(fetch, next_page))
+                    next_page += 1
+                yield pending.popleft().result()
+
+    def iter_indicator_records(self, indicator_code: str, country: str, start_year: int, end_year: int,
+                               source: Optional[str] = None) -> Iterator[Dict]:
+        for page_data in self.iter_indicator_pages(indicator_code, country, start_year, end_year, source):
+            yield from page_data
+
+    def fetch_indicator_data(self, indicator_code: str, country: str, start_year: int, end_year: int,
+                             source: Optional[str] = None) -> List[Dict]:
+        return list(self.iter_indicator_records(indicator_code, country, start_year, end_year, source))
     
-        if retries == self.max_retries:
-            logger.error(f"Max retries reached for indicator: {indicator_code}")
-            raise WorldBankAPIError(f"Max retries reached for indicator: {indicator_code}")
-    
-        return all_data
-    
+    def _indicator_source(self, indicator_code: str) -> Optional[str]:
+        data = self._fetch_page(f"{self.base_url}/indicator/{indicator_code}", {'format': 'json'}, indicator_code)
+        _, records = self._split_page(data, indicator_code, 1)
+        source = records[0].get('source') if records else None
+        return source.get('id') if isinstance(source, dict) else None
+
+    def resolve_indicator_sources(self, indicator_codes: List[str]) -> Dict[str, str]:
+        """Look up (and remember) the source id of each indicator, needed to combine indicators in one request."""
+        unknown = [code for code in dict.fromkeys(indicator_codes) if code not in self.indicator_sources]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_code = {executor.submit(self._indicator_source, code): code for code in unknown}
+            for future in as_completed(future_to_code):
+                code = future_to_code[future]
+                try:
+                    self.indicator_sources[code] = future.result()
+                except Exception as e:
+                    logger.warning(f"Could not resolve source for indicator {code}: {str(e)}")
+                    self.indicator_sources[code] = None
+        return {code: self.indicator_sources.get(code) for code in indicator_codes}
+
+    def _plan_work_items(self, queries: List[Tuple[str, List[str], int, int]]) -> List[Tuple[List[str], List[str], int, int, Optional[str]]]:
+        # Queries over the same countries and years can share requests
+        grouped = {}
+        for indicator_code, countries, start_year, end_year in queries:
+            codes = grouped.setdefault((tuple(countries), start_year, end_year), [])
+            if indicator_code in codes:
+                # Codes listed under several themes are fetched once
+                self.duplicate_queries += 1
+                continue
+            codes.append(indicator_code)
+
+        sources = self.indicator_sources if self.combine_indicators else {}
+        work_items = []
+        for (countries, start_year, end_year), indicator_codes in grouped.items():
+            for group, source in plan_indicator_groups(indicator_codes, sources):
+                url_prefix_length = len(f"{self.base_url}/country//indicator/{';'.join(group)}?format=json&per_page={PER_PAGE}"
+                                        f"&date={start_year}:{end_year}&page=999&source={source}")
+                for batch in plan_country_batches(list(countries), start_year, end_year, url_prefix_length,
+                                                  indicator_count=len(group)):
+                    for shard_start, shard_end in self._year_shards(group, batch, start_year, end_year):
+                        work_items.append((group, batch, shard_start, shard_end, source))
+        return work_items
+
+    def _year_shards(self, indicator_codes: List[str], countries: List[str], start_year: int, end_year: int) -> List[Tuple[int, int]]:
+        if not self.shard_years:
+            return [(start_year, end_year)]
+        # Long histories become independent ~one-page work items instead of one pagination chain
+        all_countries = len(countries) == 1 and countries[0].lower() == 'all'
+        country_rows = ALL_COUNTRIES_ROWS_PER_YEAR if all_countries else len(countries)
+        return plan_year_shards(start_year, end_year, country_rows * len(indicator_codes))
+
+    def fetch_country_batch(self, indicator_code: str, countries: List[str], start_year: int, end_year: int,
+                            source: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Fetch several countries in one semicolon-joined request and split the rows back per country."""
+        if len(countries) == 1:
+            return {countries[0]: self.fetch_indicator_data(indicator_code, countries[0], start_year, end_year, source)}
+
+        try:
+            rows = self.fetch_indicator_data(indicator_code, ';'.join(countries), start_year, end_year, source)
+            return split_rows_by_country(rows, countries)
+        except WorldBankAPIError as e:
+            # One bad code fails the whole batch, so fall back to one request per country
+            logger.warning(f"Batched request for {indicator_code} failed ({str(e)}). Retrying per country...")
+
+        by_country = {}
+        for country in countries:
+            try:
+                by_country[country] = self.fetch_indicator_data(indicator_code, country, start_year, end_year, source)
+            except Exception as e:
+                logger.error(f"Error fetching data for indicator {indicator_code} and country {country}: {str(e)}")
+        if not by_country:
+            # Nothing to split, e.g. a bad indicator code in a combined request; let the caller fall back
+            raise WorldBankAPIError(f"Every country failed for {indicator_code}")
+        return by_country
+
+    def fetch_indicator_group(self, indicator_codes: List[str], countries: List[str], start_year: int, end_year: int,
+                              source: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Fetch indicators of one source in a combined request and split the rows back per indicator."""
+        if len(indicator_codes) == 1:
+            by_country = self.fetch_country_batch(indicator_codes[0], countries, start_year, end_year)
+            return {indicator_codes[0]: [row for rows in by_country.values() for row in rows]}
+
+        try:
+            by_country = self.fetch_country_batch(';'.join(indicator_codes), countries, start_year, end_year, source)
+            return split_rows_by_indicator([row for rows in by_country.values() for row in rows], indicator_codes)
+        except WorldBankAPIError as e:
+            logger.warning(f"Combined request for {';'.join(indicator_codes)} failed ({str(e)}). Retrying per indicator...")
+
+        by_indicator = {}
+        for indicator_code in indicator_codes:
+            try:
+                by_country = self.fetch_country_batch(indicator_code, countries, start_year, end_year)
+                by_indicator[indicator_code] = [row for rows in by_country.values() for row in rows]
+            except Exception as e:
+                logger.error(f"Error fetching data for indicator {indicator_code} and country {';'.join(countries)}: {str(e)}")
+        return by_indicator
+
     def fetch_all_data(self, queries: List[Tuple[str, List[str], int, int]]) -> Dict[str, List[Dict]]:
+        if self.combine_indicators:
+            self.resolve_indicator_sources([query[0] for query in queries])
+
         results = {}
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_query = {executor.submit(self.fetch_indicator_data, indicator_code, country, start_year, end_year): (indicator_code, country)
-                               for indicator_code, countries, start_year, end_year in queries
-                               for country in countries}
+            future_to_query = {executor.submit(self.fetch_indicator_group, *work_item): work_item[:2]
+                               for work_item in self._plan_work_items(queries)}
             
             for future in as_completed(future_to_query):
-                indicator_code, country = future_to_query[future]
+                indicator_codes, batch = future_to_query[future]
                 try:
-                    data = future.result()
-                    if indicator_code not in results:
-                        results[indicator_code] = []
-                    results[indicator_code].extend(data)
+                    for indicator_code, data in future.result().items():
+                        if indicator_code not in results:
+                            results[indicator_code] = []
+                        results[indicator_code].extend(data)
                 except Exception as e:
-                    logger.error(f"Error fetching data for indicator {indicator_code} and country {country}: {str(e)}")
+                    logger.error(f"Error fetching data for indicator {';'.join(indicator_codes)} and country {';'.join(batch)}: {str(e)}")
         
         return results
 
+    def _stream_work_item(self, indicator_codes: List[str], countries: List[str], start_year: int, end_year: int,
+                          source: Optional[str], emit: Callable[[Tuple[str, List[Dict]]], None]):
+        emitted = False
+        try:
+            for rows in self.iter_indicator_pages(';'.join(indicator_codes), ';'.join(countries), start_year, end_year, source):
+                if len(indicator_codes) == 1:
+                    emit((indicator_codes[0], rows))
+                else:
+                    for indicator_code, indicator_rows in split_rows_by_indicator(rows, indicator_codes).items():
+                        if indicator_rows:
+                            emit((indicator_code, indicator_rows))
+                emitted = True
+            return
+        except WorldBankAPIError as e:
+            error = e
+        except Exception as e:
+            logger.error(f"Error fetching data for indicator {';'.join(indicator_codes)} and country {';'.join(countries)}: {str(e)}")
+            return
+
+        if emitted or (len(indicator_codes) == 1 and len(countries) == 1):
+            logger.error(f"Error fetching data for indicator {';'.join(indicator_codes)} and country {';'.join(countries)}: {str(error)}")
+            return
+
+        # Nothing was handed out yet, so the batch can safely be retried piece by piece
+        logger.warning(f"Batched request for {';'.join(indicator_codes)} failed ({str(error)}). Retrying per indicator and country...")
+        for indicator_code, rows in self.fetch_indicator_group(indicator_codes, countries, start_year, end_year, source).items():
+            emit((indicator_code, rows))
+
+    def iter_all(self, queries: List[Tuple[str, List[str], int, int]]) -> Iterator[Tuple[str, List[Dict]]]:
+        """Streaming counterpart of fetch_all_data: yield (indicator_code, rows) one page at a time as pages arrive.
+
+        Workers block once a small buffer of pages is waiting, so memory use stays flat however
+        much data the queries cover.
+        """
+        if self.combine_indicators:
+            self.resolve_indicator_sources([query[0] for query in queries])
+
+        work_items = self._plan_work_items(queries)
+        pages = queue.Queue(maxsize=self.max_workers * 2)
+        stopped = threading.Event()
+        finished = object()
+
+        def emit(item):
+            while not stopped.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _ConsumerStopped()
+
+        def run(work_item):
+            try:
+                if not stopped.is_set():
+                    self._stream_work_item(*work_item, emit)
+            except _ConsumerStopped:
+                return
+            except Exception as e:
+                logger.error(f"Error fetching data for indicator {';'.join(work_item[0])} and country {';'.join(work_item[1])}: {str(e)}")
+            try:
+                emit(finished)
+            except _ConsumerStopped:
+                pass
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for work_item in work_items:
+                executor.submit(run, work_item)
+            try:
+                remaining = len(work_items)
+                while remaining:
+                    item = pages.get()
+                    if item is finished:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                # Unblock workers if the consumer stops early
+                stopped.set()
+
+    async def _send_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                          url: str, params: Dict, headers: Dict) -> aiohttp.ClientResponse:
+        host = urlparse(url).netloc
+        self.circuit_breaker.before_request(host)
+        status, retry_after, acquired, started = 0, None, False, time.perf_counter()
+        try:
+            # Only the request itself holds a concurrency slot, backoffs do not
+            async with semaphore:
+                await self.rate_limiter.acquire_async()
+                acquired, started = True, time.perf_counter()
+                async with session.get(url, params=params, headers=headers) as response:
+                    # Read the body here so a hedged duplicate can be cancelled cleanly
+                    await response.read()
+                status, retry_after = response.status, response.headers.get('Retry-After')
+                return response
+        except Exception:
+            # A cancelled hedge (CancelledError is a BaseException) keeps status 0
+            status = None
+            raise
+        finally:
+            if acquired:
+                self.rate_limiter.release(status, retry_after)
+            self._record_outcome(host, status, time.perf_counter() - started)
+
+    async def _get_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                         url: str, params: Dict, headers: Dict) -> aiohttp.ClientResponse:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._send_async(session, semaphore, url, params, headers)
+
+        attempts = [asyncio.ensure_future(self._send_async(session, semaphore, url, params, headers))]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                self._count_hedge()
+                attempts.append(asyncio.ensure_future(self._send_async(session, semaphore, url, params, headers)))
+
+            pending, error = set(attempts), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not attempts[0]:
+                            self._count_hedge(won=True)
+                        return attempt.result()
+                    error = error or attempt.exception()
+            raise error
+        finally:
+            # The slower duplicate is no longer needed
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _fetch_page_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                url: str, params: Dict, indicator_code: str) -> Optional[List]:
+        cached, fresh = self._cached_page(url, params)
+        if fresh:
+            return cached['data']
+
+        retries = 0
+        while retries < self.max_retries:
+            try:
+                response = await self._get_async(session, semaphore, url, params, ResponseCache.revalidation_headers(cached))
+                if cached is not None and response.status == 304:
+                    self.cache.record_revalidation(url, params, cached)
+                    return cached['data']
+                response.raise_for_status()
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError as e:
+                    logger.error(f"Error parsing JSON response for indicator: {indicator_code}")
+                    raise WorldBankAPIError(f"Error parsing JSON response for indicator: {indicator_code}") from e
+                self._store_page(url, params, data, response.headers)
+                return data
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                logger.warning(f"Network error fetching data for {indicator_code}: {str(e)}. Retrying...")
+                retries += 1
+                await asyncio.sleep(2 ** retries)  # Exponential backoff
+            except aiohttp.ClientResponseError as e:
+                if e.status == 429:  # Too Many Requests
+                    logger.warning("Rate limit exceeded. Waiting before retry...")
+                    retries += 1
+                elif e.status in (500, 502, 503, 504):
+                    # Same statuses the sync session's urllib3 Retry handles
+                    logger.warning(f"Server error {e.status} fetching data for {indicator_code}. Retrying...")
+                    retries += 1
+                    await asyncio.sleep(self.retry_backoff_factor * 2 ** retries)
+                else:
+                    logger.error(f"HTTP error fetching data for {indicator_code}: {e.status} {e.message}")
+                    raise WorldBankAPIError(f"HTTP error fetching data for {indicator_code}: {e.status} {e.message}")
+            except aiohttp.ClientError as e:
+                logger.error(f"Error fetching data for {indicator_code}: {str(e)}")
+                raise WorldBankAPIError(f"Error fetching data for {indicator_code}: {str(e)}")
+
+        logger.error(f"Max retries reached for indicator: {indicator_code}")
+        raise WorldBankAPIError(f"Max retries reached for indicator: {indicator_code}")
+
+    async def _fetch_unit_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                url: str, params: Dict, indicator_code: str, country: str) -> Optional[List]:
+        return await self.single_flight.do_async(
+            self._flight_key(url, params),
+            lambda: self._fetch_journalled_async(session, semaphore, url, params, indicator_code, country), remember=False)
+
+    async def _fetch_journalled_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                      url: str, params: Dict, indicator_code: str, country: str) -> Optional[List]:
+        unit = (indicator_code, country, params['date'], params['page'])
+        if self.checkpoints is not None:
+            data = self.checkpoints.get(unit)
+            if data is not None:
+                return data
+        data = await self._fetch_page_async(session, semaphore, url, params, indicator_code)
+        if self.checkpoints is not None:
+            self.checkpoints.record(unit, data)
+        return data
+
+    async def _fetch_indicator_data_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                          indicator_code: str, country: str, start_year: int, end_year: int,
+                                          source: Optional[str] = None) -> List[Dict]:
+        url, params = self._indicator_request(indicator_code, country, start_year, end_year, source)
+
+        first_page = await self._fetch_unit_async(session, semaphore, url, {**params, 'page': 1}, indicator_code, country)
+        metadata, all_data = self._split_page(first_page, indicator_code, 1)
+        total_pages = metadata.get('pages', 0) if all_data else 0
+
+        # Pages 2..N go out together; the shared semaphore bounds how many are in flight
+        pages = await asyncio.gather(
+            *(self._fetch_unit_async(session, semaphore, url, {**params, 'page': page}, indicator_code, country)
+              for page in range(2, total_pages + 1)))
+        for page, data in enumerate(pages, start=2):
+            all_data.extend(self._split_page(data, indicator_code, page)[1])
+
+        return all_data
+
+    async def fetch_indicator_data_async(self, indicator_code: str, country: str, start_year: int, end_year: int) -> List[Dict]:
+        """Async counterpart of fetch_indicator_data, using its own keep-alive session."""
+        async with self._create_async_session() as session:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            return await self._fetch_indicator_data_async(session, semaphore, indicator_code, country, start_year, end_year)
+
+    async def _fetch_country_batch_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                         indicator_code: str, countries: List[str], start_year: int, end_year: int,
+                                         source: Optional[str] = None) -> Dict[str, List[Dict]]:
+        if len(countries) == 1:
+            return {countries[0]: await self._fetch_indicator_data_async(session, semaphore, indicator_code, countries[0],
+                                                                         start_year, end_year, source)}
+
+        try:
+            rows = await self._fetch_indicator_data_async(session, semaphore, indicator_code, ';'.join(countries),
+                                                          start_year, end_year, source)
+            return split_rows_by_country(rows, countries)
+        except WorldBankAPIError as e:
+            logger.warning(f"Batched request for {indicator_code} failed ({str(e)}). Retrying per country...")
+
+        outcomes = await asyncio.gather(
+            *(self._fetch_indicator_data_async(session, semaphore, indicator_code, country, start_year, end_year, source)
+              for country in countries),
+            return_exceptions=True)
+        by_country = {}
+        for country, outcome in zip(countries, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error fetching data for indicator {indicator_code} and country {country}: {str(outcome)}")
+            else:
+                by_country[country] = outcome
+        if not by_country:
+            raise WorldBankAPIError(f"Every country failed for {indicator_code}")
+        return by_country
+
+    async def _fetch_indicator_group_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                           indicator_codes: List[str], countries: List[str], start_year: int, end_year: int,
+                                           source: Optional[str] = None) -> Dict[str, List[Dict]]:
+        if len(indicator_codes) == 1:
+            by_country = await self._fetch_country_batch_async(session, semaphore, indicator_codes[0], countries, start_year, end_year)
+            return {indicator_codes[0]: [row for rows in by_country.values() for row in rows]}
+
+        try:
+            by_country = await self._fetch_country_batch_async(session, semaphore, ';'.join(indicator_codes), countries,
+                                                               start_year, end_year, source)
+            return split_rows_by_indicator([row for rows in by_country.values() for row in rows], indicator_codes)
+        except WorldBankAPIError as e:
+            logger.warning(f"Combined request for {';'.join(indicator_codes)} failed ({str(e)}). Retrying per indicator...")
+
+        outcomes = await asyncio.gather(
+            *(self._fetch_country_batch_async(session, semaphore, indicator_code, countries, start_year, end_year)
+              for indicator_code in indicator_codes),
+            return_exceptions=True)
+        by_indicator = {}
+        for indicator_code, outcome in zip(indicator_codes, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error fetching data for indicator {indicator_code} and country {';'.join(countries)}: {str(outcome)}")
+            else:
+                by_indicator[indicator_code] = [row for rows in outcome.values() for row in rows]
+        return by_indicator
+
+    async def fetch_all_data_async(self, queries: List[Tuple[str, List[str], int, int]]) -> Dict[str, List[Dict]]:
+        """Async counterpart of fetch_all_data, bounded by max_concurrency in-flight requests."""
+        if self.combine_indicators:
+            # One-off metadata lookups, kept off the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.resolve_indicator_sources, [query[0] for query in queries])
+
+        results = {}
+        work_items = self._plan_work_items(queries)
+
+        async with self._create_async_session() as session:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            outcomes = await asyncio.gather(
+                *(self._fetch_indicator_group_async(session, semaphore, *item) for item in work_items),
+                return_exceptions=True)
+
+        for (indicator_codes, batch, _, _, _), outcome in zip(work_items, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error fetching data for indicator {';'.join(indicator_codes)} and country {';'.join(batch)}: {str(outcome)}")
+                continue
+            for indicator_code, data in outcome.items():
+                if indicator_code not in results:
+                    results[indicator_code] = []
+                results[indicator_code].extend(data)
+
+        return results
+
     def __del__(self):
         if hasattr(self, 'session'):
             self.session.close()
+        if getattr(self, '_hedge_executor', None) is not None:
+            self._hedge_executor.shutdown(wait=False)
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,171 @@
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import bson
+import numpy as np
+import pandas as pd
+
+from .data_processor import INDEX_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Projection of a row document down to the fields the columns are read from
+COLUMN_PROJECTION = {'_id': 0, 'country_code': 1, 'year': 1, 'value': 1}
+
+_STRING = 0x02
+# BSON numeric element types and their little-endian NumPy dtypes
+_NUMERIC = {0x01: '<f8', 0x10: '<i4', 0x12: '<i8'}
+
+
+def _element_layout(doc: bytes) -> Optional[Dict[str, Tuple[int, int, int]]]:
+    """Field -> (BSON type, payload offset, payload size) of one document, or None for other element types."""
+    fields = {}
+    position = 4
+    while doc[position] != 0:
+        kind = doc[position]
+        name_end = doc.index(b'\x00', position + 1)
+        name = doc[position + 1:name_end].decode()
+        position = name_end + 1
+        if kind in _NUMERIC:
+            size = np.dtype(_NUMERIC[kind]).itemsize
+            fields[name] = (kind, position, size)
+        elif kind == _STRING:
+            length = int.from_bytes(doc[position:position + 4], 'little')
+            # The payload is the UTF-8 bytes, without the length prefix and the trailing NUL
+            fields[name] = (kind, position + 4, length - 1)
+            size = 4 + length
+        else:
+            return None
+        position += size
+    return fields
+
+
+def _fixed_columns(docs: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Columns of equally sized documents (one per row of a 2-D byte array) sharing the first one's layout.
+
+    Projected rows of one indicator mostly do: the same fields in the same order with the same
+    types, and country codes of one length. The rows are checked against the first one outside
+    the payloads and sliced into typed columns without decoding any document.
+    """
+    layout = _element_layout(docs[0].tobytes())
+    if layout is None or set(layout) != {'country_code', 'year', 'value'} or layout['country_code'][0] != _STRING \
+            or layout['year'][0] not in _NUMERIC or layout['value'][0] not in _NUMERIC:
+        return None
+    template = np.ones(docs.shape[1], dtype=bool)
+    for _, offset, length in layout.values():
+        template[offset:offset + length] = False
+    if not (docs[:, template] == docs[0, template]).all():
+        return None
+
+    def column(field: str) -> np.ndarray:
+        kind, offset, length = layout[field]
+        if kind == _STRING and length == 0:
+            # Empty strings have no payload bytes to view
+            return np.zeros(len(docs), dtype='S1')
+        dtype = f'S{length}' if kind == _STRING else _NUMERIC[kind]
+        return np.ascontiguousarray(docs[:, offset:offset + length]).view(dtype).ravel()
+
+    return column('country_code'), column('year').astype('int64'), column('value').astype('float64')
+
+
+def _document_offsets(data: bytes, buffer: np.ndarray) -> np.ndarray:
+    """Start of every document in a batch.
+
+    Projected documents all begin with the same first element header, so its occurrences are
+    candidate starts; they are the starts if each one's length leads exactly to the next.
+    Otherwise the documents are walked one by one.
+    """
+    header = np.frombuffer(data[4:data.index(b'\x00', 5) + 1], dtype=np.uint8)
+    candidates = np.flatnonzero(buffer[4:len(data) - len(header) + 1] == header[0])
+    candidates = candidates[(buffer[candidates[:, None] + 4 + np.arange(len(header))] == header).all(axis=1)]
+    if len(candidates):
+        lengths = np.ascontiguousarray(buffer[candidates[:, None] + np.arange(4)]).view('<i4').ravel()
+        ends = candidates + lengths
+        if candidates[0] == 0 and ends[-1] == len(data) and (candidates[1:] == ends[:-1]).all():
+            return candidates
+
+    offsets = []
+    position = 0
+    while position < len(data):
+        offsets.append(position)
+        position += int.from_bytes(data[position:position + 4], 'little')
+    return np.array(offsets, dtype=np.intp)
+
+
+def _batch_columns(data: bytes) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Columns of one raw batch, read group by group of equally sized documents, or None if a group is irregular."""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    size = int.from_bytes(data[:4], 'little')
+    if len(data) % size == 0:
+        columns = _fixed_columns(buffer.reshape(-1, size))
+        if columns is not None:
+            return columns
+
+    # Documents differ in size, e.g. with country codes of several lengths
+    offsets = _document_offsets(data, buffer)
+    sizes = np.diff(np.append(offsets, len(data)))
+    codes, years, values = [], np.empty(len(offsets), dtype='int64'), np.empty(len(offsets), dtype='float64')
+    for size in np.unique(sizes):
+        positions = np.flatnonzero(sizes == size)
+        columns = _fixed_columns(buffer[offsets[positions][:, None] + np.arange(size)])
+        if columns is None:
+            return None
+        codes.append((positions, columns[0]))
+        years[positions] = columns[1]
+        values[positions] = columns[2]
+    country_codes = np.empty(len(offsets), dtype=f'S{max(group.itemsize for _, group in codes)}')
+    for positions, group in codes:
+        country_codes[positions] = group
+    return country_codes, years, values
+
+
+def _decoded_columns(data: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Columns of a batch with irregular documents, decoded the ordinary way."""
+    docs = [doc for doc in bson.decode_all(data) if isinstance(doc.get('country_code'), str) and doc.get('year') is not None]
+    codes = np.array([doc['country_code'].encode() for doc in docs], dtype=bytes)
+    years = np.array([doc['year'] for doc in docs], dtype='int64')
+    values = np.array([doc.get('value') for doc in docs], dtype='float64')
+    return codes, years, values
+
+
+def decode_batches(batches: Iterable[bytes]) -> Dict[str, np.ndarray]:
+    """``country_code`` (object), ``year`` (int64) and ``value`` (float64) columns of raw BSON batches.
+
+    ``batches`` are the concatenated documents ``Collection.find_raw_batches`` yields for a query
+    projected with ``COLUMN_PROJECTION``. Country codes are decoded once per distinct code.
+    """
+    codes, years, values = [], [], []
+    irregular = 0
+    for data in batches:
+        if not data:
+            continue
+        columns = _batch_columns(data)
+        if columns is None:
+            irregular += 1
+            columns = _decoded_columns(data)
+        for parts, column in zip((codes, years, values), columns):
+            parts.append(column)
+    if irregular:
+        logger.debug(f"Decoded {irregular} irregular BSON batches document by document")
+    if not codes:
+        return {'country_code': np.array([], dtype=object), 'year': np.array([], dtype='int64'),
+                'value': np.array([], dtype='float64')}
+
+    distinct, inverse = np.unique(np.concatenate(codes), return_inverse=True)
+    country_codes = np.array([code.decode() for code in distinct], dtype=object)[inverse.ravel()]
+    return {'country_code': country_codes, 'year': np.concatenate(years), 'value': np.concatenate(values)}
+
+
+def columns_frame(columns: Dict[str, np.ndarray], country_names: Dict[str, Optional[str]],
+                  indicator_name: Optional[str] = None) -> pd.DataFrame:
+    """A ``value`` frame indexed by (country_name, country_code, year), like ``get_all_data``'s frames."""
+    if not len(columns['value']):
+        return pd.DataFrame(columns=INDEX_COLUMNS + ['value']).set_index(INDEX_COLUMNS)
+    # Names are looked up per distinct code and broadcast through the codes' positions
+    positions, distinct = pd.factorize(columns['country_code'])
+    names = np.array([country_names.get(code) for code in distinct], dtype=object)[positions]
+    index = pd.MultiIndex.from_arrays([names, columns['country_code'], columns['year']], names=INDEX_COLUMNS)
+    df = pd.DataFrame({'value': columns['value']}, index=index)
+    if indicator_name is not None:
+        df.attrs['indicator_name'] = indicator_name
+    return df
@@ -0,0 +1,133 @@
+import csv
+import io
+import logging
+import os
+import tempfile
+import zipfile
+from typing import IO, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import requests
+
+from .exceptions import WorldBankAPIError, DataProcessingError
+
+logger = logging.getLogger(__name__)
+
+INDEX_COLUMNS = ['country_name', 'country_code', 'year']
+
+
+class BulkDataLoader:
+    """Ingest full indicator histories from the World Bank bulk CSV archives.
+
+    One zip download replaces the whole paged JSON history of an indicator. The wide CSV
+    (one column per year) is read in chunks and reshaped with array operations straight into
+    the ``country_name, country_code, year, value`` layout produced by ``DataProcessor``.
+    """
+
+    def __init__(self, base_url: str = 'https://api.worldbank.org/v2', session: Optional[requests.Session] = None,
+                 chunk_size: int = 5000, download_dir: Optional[str] = None):
+        self.base_url = base_url
+        self.session = session or requests.Session()
+        self.chunk_size = chunk_size
+        self.download_dir = download_dir
+
+    def download_url(self, indicator_code: str) -> str:
+        return f"{self.base_url}/en/indicator/{indicator_code}"
+
+    def download(self, indicator_code: str) -> str:
+        """Stream the zipped CSV archive of an indicator to disk and return its path."""
+        fd, path = tempfile.mkstemp(prefix=f"{indicator_code}_", suffix='.zip', dir=self.download_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                with self.session.get(self.download_url(indicator_code), params={'downloadformat': 'csv'},
+                                      stream=True, timeout=120) as response:
+                    response.raise_for_status()
+                    for block in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(block)
+        except requests.RequestException as e:
+            os.remove(path)
+            logger.error(f"Error downloading bulk archive for {indicator_code}: {str(e)}")
+            raise WorldBankAPIError(f"Error downloading bulk archive for {indicator_code}: {str(e)}") from e
+        logger.info(f"Downloaded bulk archive for {indicator_code} to {path}")
+        return path
+
+    @staticmethod
+    def _data_member(archive: zipfile.ZipFile, indicator_code: str) -> str:
+        # Archives also contain Metadata_Country_*.csv and Metadata_Indicator_*.csv
+        for name in archive.namelist():
+            if os.path.basename(name).startswith('API_') and name.lower().endswith('.csv'):
+                return name
+        raise DataProcessingError(f"No data CSV found in bulk archive for indicator: {indicator_code}")
+
+    @staticmethod
+    def _skip_preamble(stream: IO[str], indicator_code: str) -> List[str]:
+        # "Data Source" and "Last Updated Date" lines precede the real header
+        for line in stream:
+            if line.startswith('"Country Name"') or line.startswith('Country Name'):
+                return next(csv.reader([line]))
+        raise DataProcessingError(f"No header row found in bulk archive for indicator: {indicator_code}")
+
+    def read_archive(self, archive_path: Union[str, IO[bytes]], indicator_code: str,
+                     start_year: Optional[int] = None, end_year: Optional[int] = None,
+                     countries: Optional[List[str]] = None) -> Tuple[pd.DataFrame, str]:
+        """Read a bulk archive into an indexed frame matching ``DataProcessor.process_world_bank_data``."""
+        if countries == ['all']:
+            countries = None
+        wanted = set(countries) if countries else None
+
+        frames = []
+        indicator_name = indicator_code
+        with zipfile.ZipFile(archive_path) as archive:
+            with archive.open(self._data_member(archive, indicator_code)) as raw:
+                stream = io.TextIOWrapper(raw, encoding='utf-8-sig')
+                header = self._skip_preamble(stream, indicator_code)
+                year_columns = [column for column in header if column.isdigit()
+                                and (start_year is None or int(column) >= start_year)
+                                and (end_year is None or int(column) <= end_year)]
+                years = np.array([int(column) for column in year_columns], dtype='int64')
+
+                reader = pd.read_csv(stream, header=None, names=header, index_col=False,
+                                     usecols=['Country Name', 'Country Code', 'Indicator Name'] + year_columns,
+                                     dtype={'Country Name': str, 'Country Code': str, 'Indicator Name': str},
+                                     chunksize=self.chunk_size)
+                for chunk in reader:
+                    if wanted is not None:
+                        chunk = chunk[chunk['Country Code'].isin(wanted)]
+                    if chunk.empty:
+                        continue
+                    if indicator_name == indicator_code and chunk['Indicator Name'].notna().any():
+                        indicator_name = chunk['Indicator Name'].dropna().iloc[0]
+                    frames.append(self._wide_to_long(chunk, year_columns, years))
+
+        if not frames:
+            logger.warning(f"No data found in bulk archive for indicator: {indicator_code}")
+            return pd.DataFrame(columns=['country_name', 'country_code', 'year', 'value']), indicator_name
+
+        df = pd.concat(frames, ignore_index=True).set_index(INDEX_COLUMNS)
+        logger.info(f"Processed {len(df)} records for indicator {indicator_code} from bulk archive")
+        return df, indicator_name
+
+    @staticmethod
+    def _wide_to_long(chunk: pd.DataFrame, year_columns: List[str], years: np.ndarray) -> pd.DataFrame:
+        values = chunk[year_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+        rows, cols = np.nonzero(~np.isnan(values))
+        names = chunk['Country Name'].to_numpy()
+        codes = chunk['Country Code'].to_numpy()
+        return pd.DataFrame({
+            'country_name': names[rows],
+            'country_code': codes[rows],
+            'year': years[cols],
+            'value': values[rows, cols],
+        }).dropna(subset=['country_name', 'country_code'])
+
+    def load_indicator(self, indicator_code: str, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                       countries: Optional[List[str]] = None) -> Tuple[pd.DataFrame, str]:
+        path = self.download(indicator_code)
+        try:
+            return self.read_archive(path, indicator_code, start_year, end_year, countries)
+        except (zipfile.BadZipFile, ValueError) as e:
+            logger.error(f"Error reading bulk archive for {indicator_code}: {str(e)}")
+            raise DataProcessingError(f"Error reading bulk archive for {indicator_code}: {str(e)}") from e
+        finally:
+            os.remove(path)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# (indicator_code, country, date range, page)
+Unit = Tuple[str, str, str, int]
+
+
+def payload_hash(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def unit_id(unit: Unit) -> str:
+    return '|'.join(str(part) for part in unit)
+
+
+class FileCheckpointJournal:
+    """Append-only JSON-lines journal of fetched pages on local disk.
+
+    Each finished (indicator, country, date range, page) unit is written with its payload and a
+    SHA-256 of that payload. A restarted run reads the index back and serves finished units from
+    the journal, so only outstanding pages are fetched again. Payloads stay on disk and are read
+    on demand.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.resumed = 0
+        self.recorded = 0
+        self._index: Dict[str, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._index[entry['unit']] = (offset, entry['hash'])
+                except (ValueError, KeyError):
+                    # A torn final line from a crashed run is simply ignored
+                    logger.warning(f"Skipping unreadable checkpoint entry at offset {offset} in {self.path}")
+                offset += len(line)
+        logger.info(f"Loaded {len(self._index)} finished units from checkpoint journal {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, unit: Unit):
+        key = unit_id(unit)
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                return None
+            offset, expected_hash = location
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                entry = json.loads(f.readline())
+        if payload_hash(entry['data']) != expected_hash:
+            logger.warning(f"Checkpoint payload hash mismatch for {key}; fetching it again")
+            return None
+        with self._lock:
+            self.resumed += 1
+        return entry['data']
+
+    def record(self, unit: Unit, data):
+        key = unit_id(unit)
+        digest = payload_hash(data)
+        line = (json.dumps({'unit': key, 'hash': digest, 'data': data}) + '\n').encode('utf-8')
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._index[key] = (offset, digest)
+            self.recorded += 1
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._index.clear()
+        logger.info(f"Cleared checkpoint journal {self.path}")
+
+
+class MongoCheckpointJournal:
+    """Checkpoint journal kept in a MongoDB collection, so a retry on another worker can resume too.
+
+    Units are namespaced by ``run_id``; clearing a run leaves the units of other runs alone.
+    """
+
+    def __init__(self, collection, run_id: str = 'default'):
+        self.collection = collection
+        self.run_id = run_id
+        self.resumed = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def _document_id(self, unit: Unit) -> str:
+        return f"{self.run_id}|{unit_id(unit)}"
+
+    def __len__(self) -> int:
+        return self.collection.count_documents({'run_id': self.run_id})
+
+    def get(self, unit: Unit):
+        document = self.collection.find_one({'_id': self._document_id(unit)})
+        if document is None:
+            return None
+        if payload_hash(document['data']) != document['hash']:
+            logger.warning(f"Checkpoint payload hash mismatch for {unit_id(unit)}; fetching it again")
+            return None
+        with self._lock:
+            self.resumed += 1
+        return document['data']
+
+    def record(self, unit: Unit, data):
+        document_id = self._document_id(unit)
+        self.collection.replace_one(
+            {'_id': document_id},
+            {'_id': document_id, 'run_id': self.run_id, 'hash': payload_hash(data), 'data': data},
+            upsert=True
+        )
+        with self._lock:
+            self.recorded += 1
+
+    def clear(self):
+        self.collection.delete_many({'run_id': self.run_id})
+        logger.info(f"Cleared checkpoints of run {self.run_id} from collection {self.collection.name}")
+
+
+CheckpointJournal = Union[FileCheckpointJournal, MongoCheckpointJournal]
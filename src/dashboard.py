@@ -3,7 +3,9 @@ from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
 import pandas as pd
+import numpy as np
 import re
+from .panel import IndicatorPanel
 
 styles = {
     'body': {
@@ -54,6 +56,34 @@ def extract_axis_title(indicator_name):
     else:
         return indicator_name
 
+def frame_indicator_name(indicator_code, df, indicator_mapping=None):
+    # Compact frames keep the name once in attrs instead of a per-row column
+    if df.attrs.get('indicator_name'):
+        return df.attrs['indicator_name']
+    if 'indicator_name' in df.columns and not df.empty:
+        return df['indicator_name'].iloc[0]
+    return (indicator_mapping or {}).get(indicator_code, indicator_code)
+
+def plot_frame(df):
+    # Plotly groups categoricals by every category, so compact frames are plotted with plain columns
+    df = df.reset_index()
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+    return df
+
+def cross_section(panel, indicator_codes, countries, year):
+    # One row per country with values for every indicator in that year, one column per indicator
+    sub = panel.select(indicator_codes, countries, year, year)
+    values = sub.values[:, :, 0]
+    complete = ~np.isnan(values).any(axis=0)
+    df = pd.DataFrame({'country_name': np.asarray(sub.country_names, dtype=object)[complete],
+                       'country_code': np.asarray(sub.country_codes, dtype=object)[complete],
+                       'year': year})
+    for i, code in enumerate(indicator_codes):
+        df[code] = values[i, complete]
+    return df
+
 def create_color_map(countries):
     color_scale = px.colors.qualitative.Plotly
     return {country: color_scale[i % len(color_scale)] for i, country in enumerate(countries)}
@@ -70,7 +100,9 @@ def create_dashboard(data, indicators_standard, indicator_mapping):
     color_map = create_color_map(countries)
 
     # Get the indicator names from the data
-    indicator_names = {code: df['indicator_name'].iloc[0] for code, df in data.items()}
+    indicator_names = {code: frame_indicator_name(code, df, indicator_mapping) for code, df in data.items()}
+    # Latest-year and cross-indicator views index this cube instead of filtering and joining frames
+    panel = IndicatorPanel.from_frames({code: df for code, df in data.items() if 'value' in df.columns}, indicator_names)
 
     global_available_indicators = {category: [ind for ind in indicators if ind in data]
                                    for category, indicators in indicators_standard.items()}
@@ -148,7 +180,7 @@ def create_dashboard(data, indicators_standard, indicator_mapping):
             return {}
         df = data[selected_indicator]
         df_filtered = df.loc[df.index.get_level_values('country_name').isin(selected_countries)]
-        df_filtered = df_filtered.reset_index()
+        df_filtered = plot_frame(df_filtered)
         
         # Check for empty DataFrame
         if df_filtered.empty:
@@ -179,13 +211,13 @@ def create_dashboard(data, indicators_standard, indicator_mapping):
         Input('country-dropdown', 'value')
     )
     def update_bar_chart(selected_indicator, selected_countries):
-        if not selected_indicator or not selected_countries:
+        if not selected_indicator or not selected_countries or selected_indicator not in panel:
             return {}
-        df = data[selected_indicator]
-        df_filtered = df.loc[df.index.get_level_values('country_name').isin(selected_countries)]
-        latest_year = df_filtered.index.get_level_values('year').max()
-        df_latest = df_filtered.loc[df_filtered.index.get_level_values('year') == latest_year]
-        df_latest = df_latest.reset_index()
+        latest_year = panel.latest_year([selected_indicator], selected_countries)
+        if latest_year is None:
+            return {}
+        df_latest = cross_section(panel, [selected_indicator], selected_countries, latest_year)
+        df_latest = df_latest.rename(columns={selected_indicator: 'value'})
         indicator_name = indicator_names.get(selected_indicator, selected_indicator)
         fig = px.bar(df_latest, x='country_name', y='value',
                      color='country_name', color_discrete_map=color_map,
@@ -202,19 +234,17 @@ def create_dashboard(data, indicators_standard, indicator_mapping):
         if not selected_category or not selected_countries:
             return {}
         
-        category_indicators = [ind for ind in global_available_indicators[selected_category] if ind in data]
+        category_indicators = [ind for ind in global_available_indicators[selected_category] if ind in panel]
         
         if len(category_indicators) < 2:
             return {}
         
         indicator1, indicator2 = category_indicators[:2]
-        df1 = data[indicator1].loc[data[indicator1].index.get_level_values('country_name').isin(selected_countries)]
-        df2 = data[indicator2].loc[data[indicator2].index.get_level_values('country_name').isin(selected_countries)]
-        
-        df_merged = pd.merge(df1.reset_index(), df2.reset_index(), on=['country_name', 'country_code', 'year'])
-        
-        latest_year = df_merged['year'].max()
-        df_latest = df_merged[df_merged['year'] == latest_year]
+        latest_year = panel.latest_year([indicator1, indicator2], selected_countries)
+        if latest_year is None:
+            return {}
+        df_latest = cross_section(panel, [indicator1, indicator2], selected_countries, latest_year)
+        df_latest = df_latest.rename(columns={indicator1: 'value_x', indicator2: 'value_y'})
         
         indicator_name1 = indicator_names.get(indicator1, indicator1)
         indicator_name2 = indicator_names.get(indicator2, indicator2)
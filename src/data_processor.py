@@ -1,27 +1,130 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from operator import itemgetter
+from typing import List, Dict, Iterable, Tuple, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+OUTPUT_COLUMNS = ['country_name', 'country_code', 'year', 'value']
+INDEX_COLUMNS = ['country_name', 'country_code', 'year']
+# Per-row bookkeeping fields that documents read back from MongoDB carry
+DOCUMENT_COLUMNS = ['_id', 'indicator_name', 'last_updated']
+_get_country = itemgetter('country')
+_get_country_code = itemgetter('countryiso3code')
+_get_date = itemgetter('date')
+_get_value = itemgetter('value')
+# Integer dtype pandas gives `.dt.year` (int64 on 1.x, int32 on 2.x and later); the fast path reproduces it
+_YEAR_DTYPE = pd.to_datetime(pd.Series(['2000']), format='%Y').dt.year.dtype
+
+
+def _parse_year(date) -> float:
+    # Same years pd.to_datetime(..., format='%Y') accepts for annual data, without building timestamps
+    if type(date) is str and len(date) == 4 and date.isascii() and date.isdigit() and date != '0000':
+        return float(date)
+    return np.nan
+
+
 class DataProcessor:
     @staticmethod
-    def process_world_bank_data(raw_data: List[Dict], indicator_code: str) -> Tuple[pd.DataFrame, str]:
-        if not raw_data:
-            logger.warning(f"No data retrieved for indicator: {indicator_code}")
-            return pd.DataFrame(columns=['country_name', 'country_code', 'year', 'value']), indicator_code
+    def _distinct(df: pd.DataFrame, column: str) -> pd.Index:
+        if isinstance(df.index, pd.MultiIndex) and column in df.index.names:
+            return df.index.levels[df.index.names.index(column)]
+        return pd.Index(df[column].dropna().unique())
 
-        df = pd.DataFrame(raw_data)
+    @staticmethod
+    def country_dtypes(frames: Iterable[pd.DataFrame]) -> Tuple[pd.CategoricalDtype, pd.CategoricalDtype]:
+        """Categorical dtypes for country names and codes covering every frame, so indicators share them."""
+        names, codes = set(), set()
+        for df in frames:
+            names.update(DataProcessor._distinct(df, 'country_name'))
+            codes.update(DataProcessor._distinct(df, 'country_code'))
+        return pd.CategoricalDtype(sorted(names)), pd.CategoricalDtype(sorted(codes))
+
+    @staticmethod
+    def compact_frame(df: pd.DataFrame, indicator_name: Optional[str] = None,
+                      country_dtypes: Optional[Tuple[pd.CategoricalDtype, pd.CategoricalDtype]] = None,
+                      float32: bool = False) -> pd.DataFrame:
+        """Shrink a processed or database frame without changing its index or values.
+
+        Country names and codes become categoricals (shared across indicators when
+        ``country_dtypes`` is given), years become int16, the per-row document fields are
+        dropped with the indicator name kept once in ``df.attrs['indicator_name']``, and values
+        are optionally stored as float32.
+        """
+        if indicator_name is None and 'indicator_name' in df.columns and df['indicator_name'].notna().any():
+            indicator_name = df['indicator_name'].dropna().iloc[0]
+        indicator_name = indicator_name or df.attrs.get('indicator_name')
+
+        df = df.reset_index() if isinstance(df.index, pd.MultiIndex) else df.copy()
+        df = df.drop(columns=[column for column in DOCUMENT_COLUMNS if column in df.columns])
+        if df.empty:
+            return df.set_index(INDEX_COLUMNS) if set(INDEX_COLUMNS) <= set(df.columns) else df
+
+        name_dtype, code_dtype = country_dtypes or DataProcessor.country_dtypes([df])
+        df['country_name'] = df['country_name'].astype(name_dtype)
+        df['country_code'] = df['country_code'].astype(code_dtype)
+        df['year'] = df['year'].astype('int16')
+        if float32:
+            df['value'] = df['value'].astype('float32')
+
+        df = df.set_index(INDEX_COLUMNS)
+        if indicator_name is not None:
+            df.attrs['indicator_name'] = indicator_name
+        return df
+
+    @staticmethod
+    def compact_frames(frames: Dict[str, pd.DataFrame], indicator_names: Optional[Dict[str, str]] = None,
+                       float32: bool = False) -> Dict[str, pd.DataFrame]:
+        """Compact every indicator frame against one shared set of country categories."""
+        country_dtypes = DataProcessor.country_dtypes(frames.values())
+        indicator_names = indicator_names or {}
+        return {code: DataProcessor.compact_frame(df, indicator_names.get(code), country_dtypes, float32)
+                for code, df in frames.items()}
+
+    @staticmethod
+    def _indicator_name(raw_data: List[Dict], indicator_code: str) -> str:
+        indicator_value = raw_data[0].get('indicator') if isinstance(raw_data[0], dict) else None
+        if isinstance(indicator_value, dict) and 'value' in indicator_value:
+            return indicator_value['value']
+        if isinstance(indicator_value, str):
+            return indicator_value
+        return indicator_code
+
+    @staticmethod
+    def _columnar_frame(raw_data: List[Dict]) -> Optional[pd.DataFrame]:
+        """Build the indexed frame straight from regular API records; None if any record has another shape."""
+        try:
+            countries = list(map(_get_country, raw_data))
+            country_codes = pd.Series(list(map(_get_country_code, raw_data)))
+            dates = list(map(_get_date, raw_data))
+            # A history has a few dozen distinct dates, so each is parsed once
+            date_years = {date: _parse_year(date) for date in set(dates)}
+        except (KeyError, TypeError):
+            return None
+        if not all(type(date) is str or date is None for date in date_years):
+            # pandas parses numeric dates depending on the other dates' types, so they take its path
+            return None
+
+        country_names = pd.Series([country['value'] if type(country) is dict and 'value' in country else str(country)
+                                   for country in countries])
+        years = np.fromiter(map(date_years.__getitem__, dates), dtype='float64', count=len(dates))
+        values = pd.to_numeric(pd.Series(list(map(_get_value, raw_data))), errors='coerce')
+
+        keep = ~(country_names.isna().to_numpy() | country_codes.isna().to_numpy() | np.isnan(years) | values.isna().to_numpy())
+        if not keep.all():
+            country_names, country_codes, values = country_names[keep], country_codes[keep], values[keep]
+        # pandas only falls back to float years when some date failed to parse
+        year_level = years[keep] if np.isnan(years).any() else years[keep].astype(_YEAR_DTYPE)
+
+        index = pd.MultiIndex.from_arrays([country_names, country_codes, year_level],
+                                          names=['country_name', 'country_code', 'year'])
+        return pd.DataFrame({'value': values.to_numpy(dtype='float64')}, index=index)
 
-        # Extract the indicator name
-        indicator_name = indicator_code
-        if 'indicator' in df.columns and len(df) > 0:
-            indicator_value = df['indicator'].iloc[0]
-            if isinstance(indicator_value, dict) and 'value' in indicator_value:
-                indicator_name = indicator_value['value']
-            elif isinstance(indicator_value, str):
-                indicator_name = indicator_value
+    @staticmethod
+    def _records_frame(raw_data: List[Dict], indicator_code: str) -> Optional[pd.DataFrame]:
+        """General path for irregular records: nested dicts are unpacked column-wise with pandas."""
+        df = pd.DataFrame(raw_data)
 
         # Process country information
         if 'country' in df.columns:
@@ -29,24 +132,134 @@ class DataProcessor:
             df['country_code'] = df['countryiso3code']
         else:
             logger.warning(f"No 'country' column found for indicator: {indicator_code}")
-            return pd.DataFrame(columns=['country_name', 'country_code', 'year', 'value']), indicator_name
+            return None
 
         # Process date and value
         df['value'] = pd.to_numeric(df['value'], errors='coerce')
         df['year'] = pd.to_datetime(df['date'], format='%Y', errors='coerce').dt.year
 
         # Select and rename columns
-        columns_to_keep = ['country_name', 'country_code', 'year', 'value']
-        df = df[columns_to_keep]
+        df = df[OUTPUT_COLUMNS]
 
         # Handle missing values
-        df = df.dropna(subset=['country_name', 'country_code', 'year', 'value'])
+        return df.dropna(subset=OUTPUT_COLUMNS)
+
+    @staticmethod
+    def _frame(raw_data: List[Dict], indicator_code: str) -> Optional[pd.DataFrame]:
+        """Indexed frame of the valid rows, or None if the records carry no country."""
+        df = DataProcessor._columnar_frame(raw_data)
+        if df is None:
+            df = DataProcessor._records_frame(raw_data, indicator_code)
+            if df is None:
+                return None
+
+            # Set index
+            df = df.set_index(['country_name', 'country_code', 'year'])
+
+            # Ensure numeric values are float64
+            df['value'] = df['value'].astype('float64')
+        return df
 
-        # Set index
-        df = df.set_index(['country_name', 'country_code', 'year'])
+    @staticmethod
+    def process_world_bank_data(raw_data: List[Dict], indicator_code: str) -> Tuple[pd.DataFrame, str]:
+        if not raw_data:
+            logger.warning(f"No data retrieved for indicator: {indicator_code}")
+            return pd.DataFrame(columns=OUTPUT_COLUMNS), indicator_code
+
+        indicator_name = DataProcessor._indicator_name(raw_data, indicator_code)
 
-        # Ensure numeric values are float64
-        df['value'] = df['value'].astype('float64')
+        df = DataProcessor._frame(raw_data, indicator_code)
+        if df is None:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS), indicator_name
 
         logger.info(f"Processed {len(df)} records for indicator {indicator_code}")
-        return df, indicator_name
\ No newline at end of file
+        return df, indicator_name
+
+
+class IncrementalProcessor:
+    """Process one indicator's raw pages as they arrive into a running buffer of typed columns.
+
+    Each page is reduced to integer country ids, years and float values straight away, so its
+    raw dicts can be freed. ``finish`` returns the same frame ``process_world_bank_data`` builds
+    from all pages at once; with ``flush_rows`` set, ``add_page`` hands back the buffered rows as
+    a frame whenever that many have accumulated.
+    """
+
+    def __init__(self, indicator_code: str, flush_rows: Optional[int] = None):
+        self.indicator_code = indicator_code
+        self.flush_rows = flush_rows
+        self.indicator_name: Optional[str] = None
+        self.pages = 0
+        self.rows = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._names: Dict = {}
+        self._codes: Dict = {}
+        self._chunks: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._buffered = 0
+        # pandas keeps float years when any date in the batch failed to parse
+        self._float_years = False
+
+    @staticmethod
+    def _intern(level: pd.Index, codes: np.ndarray, table: Dict) -> np.ndarray:
+        ids = np.fromiter((table.setdefault(value, len(table)) for value in level), dtype='int32', count=len(level))
+        return ids[codes]
+
+    def add_page(self, raw_page: List[Dict]) -> Optional[pd.DataFrame]:
+        """Buffer one page of raw records; returns the buffered frame once ``flush_rows`` is reached."""
+        self.pages += 1
+        if not raw_page:
+            return None
+        if self.indicator_name is None:
+            self.indicator_name = DataProcessor._indicator_name(raw_page, self.indicator_code)
+        df = DataProcessor._frame(raw_page, self.indicator_code)
+        if df is None:
+            return None
+        years = df.index.levels[2]
+        self._float_years |= years.dtype.kind == 'f'
+        if df.empty:
+            return None
+
+        self._chunks.append((self._intern(df.index.levels[0], df.index.codes[0], self._names),
+                             self._intern(df.index.levels[1], df.index.codes[1], self._codes),
+                             years.to_numpy(dtype='float64')[df.index.codes[2]],
+                             df['value'].to_numpy(dtype='float64')))
+        self._buffered += len(df)
+        self.rows += len(df)
+        if self.flush_rows and self._buffered >= self.flush_rows:
+            return self.flush()
+        return None
+
+    @staticmethod
+    def _sorted_level(table: Dict, ids: np.ndarray) -> Tuple[pd.Index, np.ndarray]:
+        # Same sorted levels and codes MultiIndex.from_arrays would build
+        values = np.empty(len(table), dtype=object)
+        values[:] = list(table)
+        order = np.argsort(values, kind='stable')
+        position = np.empty(len(order), dtype='int32')
+        position[order] = np.arange(len(order), dtype='int32')
+        return pd.Index(values[order].tolist()), position[ids]
+
+    def flush(self) -> pd.DataFrame:
+        """Return the buffered rows as an indexed frame and empty the buffer."""
+        if not self._chunks:
+            self._reset()
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        name_ids, code_ids, years, values = (np.concatenate(column) for column in zip(*self._chunks))
+        name_level, name_codes = self._sorted_level(self._names, name_ids)
+        code_level, code_codes = self._sorted_level(self._codes, code_ids)
+        year_level, year_codes = np.unique(years, return_inverse=True)
+        if not self._float_years:
+            year_level = year_level.astype(_YEAR_DTYPE)
+        index = pd.MultiIndex(levels=[name_level, code_level, pd.Index(year_level)],
+                              codes=[name_codes, code_codes, year_codes.reshape(-1)],
+                              names=INDEX_COLUMNS, verify_integrity=False)
+        self._reset()
+        return pd.DataFrame({'value': values}, index=index)
+
+    def finish(self) -> Tuple[pd.DataFrame, str]:
+        """The remaining buffered rows and the indicator name, like ``process_world_bank_data``."""
+        df = self.flush()
+        logger.info(f"Processed {self.rows} records in {self.pages} pages for indicator {self.indicator_code}")
+        return df, self.indicator_name or self.indicator_code
@@ -1,13 +1,36 @@
-from pymongo import MongoClient, ASCENDING, WriteConcern
-from pymongo.errors import ConnectionFailure
+from pymongo import MongoClient, ASCENDING, UpdateOne
+from pymongo.errors import ConnectionFailure, OperationFailure
 import logging
+import random
 from datetime import datetime, timezone
+import pandas as pd
+from .validation import DataValidator
+from .series_digest import digest_rows, series_digests, select_series
+from .series_store import SeriesStore, SERIES_COLLECTION
+from .bson_columns import COLUMN_PROJECTION, columns_frame, decode_batches
+
+# Operations per bulk_write call
+WRITE_BATCH_SIZE = 1000
+# Rows beyond which verify_insertion checks a random sample instead of every row
+VERIFY_SAMPLE_SIZE = 10000
+# Mismatched keys listed in a verification report
+VERIFY_REPORT_LIMIT = 10
+# Collections without one document per (country, year), skipped by create_indexes
+METADATA_COLLECTIONS = {'indicator_mapping', 'indicator_freshness', 'fetch_checkpoints', 'series_digests', SERIES_COLLECTION}
+# 'rows': one document per (country, year) in a collection per indicator; 'series': one per (indicator, country)
+STORAGE_LAYOUTS = ('rows', 'series')
 
 class MongoDBHandler:
-    def __init__(self, host='localhost', port=27017, db_name='world_bank_data'):
+    def __init__(self, host='localhost', port=27017, db_name='world_bank_data', layout='rows'):
+        if layout not in STORAGE_LAYOUTS:
+            raise ValueError(f"Unknown storage layout {layout!r}, expected one of {STORAGE_LAYOUTS}")
         self.client = MongoClient(host, port)
         self.db = self.client[db_name]
         self.logger = logging.getLogger(__name__)
+        self.layout = layout
+        self.series_store = SeriesStore(self.db) if layout == 'series' else None
+        self.validator = DataValidator()
+        self._indexed = set()
 
     def test_connection(self):
         try:
@@ -23,22 +46,20 @@ class MongoDBHandler:
             raise ConnectionError("Failed to connect to MongoDB")
 
     def validate_data(self, data, indicator_name):
-        valid_data = []
-        for item in data:
-            if all(key in item for key in ['country_code', 'year', 'value']):
-                valid_item = {
-                    'country_code': item['country_code'],
-                    'year': item['year'],
-                    'value': item['value']
-                }
-                if 'country_name' in item:
-                    valid_item['country_name'] = item['country_name']
-                valid_data.append(valid_item)
-            else:
-                self.logger.warning(f"Invalid data item: {item}")
-        
-        self.logger.info(f"Validated {len(valid_data)} out of {len(data)} items for {indicator_name}")
-        return valid_data
+        valid_data, _ = self.validator.validate(data, indicator_name)
+        return self.to_records(valid_data)
+
+    @staticmethod
+    def to_records(data):
+        """Plain ``country_code``/``year``/``value`` (and ``country_name``) dicts for writing."""
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+        df = data.reset_index() if isinstance(data.index, pd.MultiIndex) else data
+        if df.empty:
+            return []
+        columns = [column for column in ['country_code', 'year', 'value', 'country_name'] if column in df.columns]
+        df = df[columns].astype({'year': 'int64', 'value': 'float64'})
+        return df.to_dict('records')
 
     def update_indicator_mapping(self, indicator_code, indicator_name):
         mapping_collection = self.db['indicator_mapping']
@@ -53,62 +74,130 @@ class MongoDBHandler:
         mapping = mapping_collection.find_one({'code': indicator_code})
         return mapping['name'] if mapping else None
 
-    def insert_or_update_indicator_data(self, indicator_code, indicator_name, data):
+    def get_last_updated(self, indicator_code):
+        freshness_collection = self.db['indicator_freshness']
+        entry = freshness_collection.find_one({'code': indicator_code})
+        return entry['last_updated'] if entry else None
+
+    def set_last_updated(self, indicator_code, last_updated):
+        freshness_collection = self.db['indicator_freshness']
+        freshness_collection.update_one(
+            {'code': indicator_code},
+            {'$set': {'last_updated': last_updated, 'checked_at': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    def get_series_digests(self, indicator_code):
+        digest_collection = self.db['series_digests']
+        return {entry['country_code']: entry['digest']
+                for entry in digest_collection.find({'indicator': indicator_code, 'layout': self.layout},
+                                                    {'_id': 0, 'country_code': 1, 'digest': 1})}
+
+    def set_series_digests(self, indicator_code, digests):
+        if not digests:
+            return
+        digest_collection = self.db['series_digests']
+        # Digests describe what one layout stores, so switching layouts starts from none
+        digest_collection.bulk_write([
+            UpdateOne({'_id': f"{self.layout}|{indicator_code}|{country_code}"},
+                      {'$set': {'layout': self.layout, 'indicator': indicator_code, 'country_code': country_code,
+                                'digest': digest}},
+                      upsert=True)
+            for country_code, digest in digests.items()
+        ], ordered=False)
+
+    def stored_row_counts(self, indicator_code, countries):
+        """Number of stored rows of each of the given country series."""
+        if self.series_store is not None:
+            return self.series_store.row_counts(indicator_code, countries)
+        return {group['_id']: group['rows'] for group in self.db[indicator_code].aggregate(
+            [{'$match': {'country_code': {'$in': list(countries)}}},
+             {'$group': {'_id': '$country_code', 'rows': {'$sum': 1}}}])}
+
+    def changed_series(self, indicator_code, data):
+        """Rows of the country series that differ from the series as stored.
+
+        A series is unchanged when its digest equals the one of the full stored series and
+        the stored series still holds that many rows, so a dropped or rebuilt collection is
+        written again. Returns the changed rows and their digests; once they are written,
+        ``refresh_series_digests`` records the digests of the stored series.
+        """
+        digests = series_digests(data)
+        stored = self.get_series_digests(indicator_code)
+        matching = [country_code for country_code, digest in digests.items() if stored.get(country_code) == digest]
+        counts = self.stored_row_counts(indicator_code, matching) if matching else {}
+        changed = {country_code: digest for country_code, digest in digests.items()
+                   if stored.get(country_code) != digest or counts.get(country_code) != digest_rows(digest)}
+        self.logger.info(f"{len(changed)} of {len(digests)} series changed for {indicator_code}")
+        return select_series(data, changed), changed
+
+    def refresh_series_digests(self, indicator_code, countries):
+        """Store the digests of the full stored series of the given countries, e.g. after writing them."""
+        countries = list(countries)
+        if countries:
+            self.set_series_digests(indicator_code, series_digests(self.get_indicator_values(indicator_code, countries)))
+
+    def ensure_index(self, indicator_code):
+        """Create the (country_code, year) index the upserts filter on, once per collection."""
+        if indicator_code in self._indexed:
+            return
+        try:
+            self.db[indicator_code].create_index([('country_code', ASCENDING), ('year', ASCENDING)], unique=True)
+        except OperationFailure as e:
+            self.logger.warning(f"Could not create the country_code/year index for {indicator_code}: {str(e)}")
+        self._indexed.add(indicator_code)
+
+    @staticmethod
+    def upsert_operation(item, indicator_name, now):
+        """Upsert of one data point that leaves the document untouched when its value is unchanged."""
+        # Strings in a pipeline $set that start with '$' would be read as field paths
+        fields = {'value': item['value'], 'indicator_name': {'$literal': indicator_name}}
+        if isinstance(item.get('country_name'), str):
+            fields['country_name'] = {'$literal': item['country_name']}
+        # last_updated moves only when the stored value differs (or the document is new)
+        fields['last_updated'] = {'$cond': [{'$eq': ['$value', item['value']]}, '$last_updated', now]}
+        return UpdateOne({'country_code': item['country_code'], 'year': item['year']}, [{'$set': fields}], upsert=True)
+
+    def insert_or_update_indicator_data(self, indicator_code, indicator_name, data, validate=True):
         self.ensure_connection()
-        valid_data = self.validate_data(data, indicator_code)
+        # Callers that already ran a DataValidator pass validate=False
+        valid_data = self.validate_data(data, indicator_code) if validate else self.to_records(data)
         self.logger.info(f"Inserting/updating {len(valid_data)} valid items for {indicator_code}")
+        counts = {'matched': 0, 'modified': 0, 'upserted': 0}
     
         if not valid_data:
             self.logger.warning(f"No valid data to insert for {indicator_code}")
-            return
+            return counts
     
-        collection = self.db[indicator_code]
-        with self.client.start_session() as session:
-            with session.start_transaction(write_concern=WriteConcern(w='majority')):
-                for item in valid_data:
-                    try:
-                        item['indicator_name'] = indicator_name  # Add indicator name to each item
-                        existing_doc = collection.find_one({
-                            'country_code': item['country_code'],
-                            'year': item['year']
-                        })
-                        
-                        if existing_doc:
-                            self.logger.debug(f"Existing document for {indicator_code}, {item['country_code']}, {item['year']}: {existing_doc}")
-                            
-                            if existing_doc['value'] != item['value']:
-                                collection.update_one(
-                                    {'_id': existing_doc['_id']},
-                                    {
-                                        '$set': {
-                                            'value': item['value'],
-                                            'indicator_name': indicator_name,
-                                            'last_updated': datetime.now(timezone.utc)
-                                        }
-                                    }
-                                )
-                                self.logger.info(f"Updated data for indicator {indicator_code}, country {item['country_code']}, year {item['year']}")
-                        else:
-                            item['last_updated'] = datetime.now(timezone.utc)
-                            collection.insert_one(item)
-                            self.logger.info(f"Inserted new data for indicator {indicator_code}, country {item['country_code']}, year {item['year']}")
-                    except Exception as e:
-                        self.logger.error(
-                            f"Error processing item for {indicator_code}, {item.get('country_code', 'Unknown')}, {item.get('year', 'Unknown')}: {str(e)}")
-                        self.logger.error(f"Item content: {item}")
+        now = datetime.now(timezone.utc)
+        if self.series_store is not None:
+            self.series_store.ensure_index()
+            collection = self.series_store.collection
+            operations = self.series_store.operations(indicator_code, indicator_name, valid_data, now)
+        else:
+            self.ensure_index(indicator_code)
+            collection = self.db[indicator_code]
+            operations = [self.upsert_operation(item, indicator_name, now) for item in valid_data]
+        # Plain unordered batches: a transaction would need a replica set and would outlive its
+        # time limit on full-history indicators
+        for start in range(0, len(operations), WRITE_BATCH_SIZE):
+            result = collection.bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=False)
+            counts['matched'] += result.matched_count
+            counts['modified'] += result.modified_count
+            counts['upserted'] += result.upserted_count
     
-        self.verify_insertion(indicator_code, valid_data)
+        self.logger.info(f"Wrote {indicator_code}: {counts['upserted']} inserted, {counts['modified']} updated, "
+                         f"{counts['matched'] - counts['modified']} unchanged")
+        counts['verification'] = self.verify_insertion(indicator_code, valid_data)
+        return counts
     
     def get_indicator_data(self, indicator_code, countries=None, start_year=None, end_year=None):
         self.ensure_connection()
-        collection = self.db[indicator_code]
-        query = {}
-        if countries and countries != ["all"]:
-            query['country_code'] = {'$in': countries}
-        if start_year and end_year:
-            query['year'] = {'$gte': start_year, '$lte': end_year}
-        
-        data = list(collection.find(query))
+        if self.series_store is not None:
+            data = self.series_store.find_rows(indicator_code, countries, start_year, end_year)
+        else:
+            collection = self.db[indicator_code]
+            data = list(collection.find(self._row_query(countries, start_year, end_year)))
         self.logger.info(f"Retrieved {len(data)} records for indicator {indicator_code}")
         
         if not data:
@@ -116,22 +205,115 @@ class MongoDBHandler:
         
         return data
 
-    def verify_insertion(self, indicator, data):
-        collection = self.db[indicator]
-        for item in data:
-            stored_item = collection.find_one({'country_code': item['country_code'], 'year': item['year']})
-            if not stored_item:
-                self.logger.error(f"Failed to store item: {item}")
-            else:
-                self.logger.debug(f"Successfully stored: {stored_item}")
+    @staticmethod
+    def _row_query(countries=None, start_year=None, end_year=None):
+        query = {}
+        if countries and countries != ["all"]:
+            query['country_code'] = {'$in': countries}
+        if start_year and end_year:
+            query['year'] = {'$gte': start_year, '$lte': end_year}
+        return query
+
+    def get_indicator_values(self, indicator_code, countries=None, start_year=None, end_year=None):
+        """Values of an indicator as a (country_name, country_code, year)-indexed ``value`` frame.
+
+        Reads only country_code, year and value, as raw BSON batches decoded straight into
+        arrays instead of a dict per document. Country names come from one grouped query and
+        the indicator name is kept in ``df.attrs['indicator_name']``, as in compact frames.
+        """
+        self.ensure_connection()
+        if self.series_store is not None:
+            df = self.series_store.find_frame(indicator_code, countries, start_year, end_year)
+            indicator_name = df['indicator_name'].iloc[0] if not df.empty else None
+            df = df[['value']]
+            if indicator_name is not None:
+                df.attrs['indicator_name'] = indicator_name
+        else:
+            collection = self.db[indicator_code]
+            query = self._row_query(countries, start_year, end_year)
+            columns = decode_batches(collection.find_raw_batches(query, COLUMN_PROJECTION))
+            names = {}
+            indicator_name = None
+            if len(columns['value']):
+                for group in collection.aggregate([{'$match': query},
+                                                   {'$group': {'_id': '$country_code',
+                                                               'country_name': {'$first': '$country_name'},
+                                                               'indicator_name': {'$first': '$indicator_name'}}}]):
+                    names[group['_id']] = group.get('country_name')
+                    indicator_name = indicator_name or group.get('indicator_name')
+            df = columns_frame(columns, names, indicator_name)
+        self.logger.info(f"Retrieved {len(df)} values for indicator {indicator_code}")
+        if df.empty:
+            self.logger.warning(f"No data found for indicator {indicator_code} with the given criteria")
+        return df
+
+    def get_indicator_frame(self, indicator_code, countries=None, start_year=None, end_year=None):
+        """``get_indicator_data`` as a (country_name, country_code, year)-indexed frame."""
+        self.ensure_connection()
+        if self.series_store is None:
+            data = self.get_indicator_data(indicator_code, countries, start_year, end_year)
+            return pd.DataFrame(data).set_index(['country_name', 'country_code', 'year']) if data else pd.DataFrame()
+        df = self.series_store.find_frame(indicator_code, countries, start_year, end_year)
+        self.logger.info(f"Retrieved {len(df)} records for indicator {indicator_code}")
+        return df
+
+    def _stored_values(self, indicator, keys):
+        if self.series_store is not None:
+            return self.series_store.stored_values(indicator, keys)
+        # Exact keys, so only the checked documents are read back
+        years = {}
+        for country_code, year in keys:
+            years.setdefault(country_code, []).append(year)
+        query = {'$or': [{'country_code': country_code, 'year': {'$in': sorted(country_years)}}
+                         for country_code, country_years in sorted(years.items())]}
+        return {(doc['country_code'], doc['year']): doc.get('value') for doc in self.db[indicator].find(
+            query, {'_id': 0, 'country_code': 1, 'year': 1, 'value': 1})}
+
+    def verify_insertion(self, indicator, data, sample_size=VERIFY_SAMPLE_SIZE):
+        """Check written rows against the stored (country_code, year) keys and values.
+
+        Reads back each batch with one projected query and compares in memory. Above
+        ``sample_size`` rows, a random sample of that size is checked (``None`` checks all).
+        Keys are checked in (country_code, year) order, so a batch spans few countries.
+        """
+        expected = {(item['country_code'], item['year']): item['value'] for item in data}
+        keys = list(expected)
+        if sample_size is not None and len(keys) > sample_size:
+            keys = random.sample(keys, sample_size)
+        keys.sort()
+        report = {'indicator': indicator, 'rows': len(expected), 'checked': len(keys),
+                  'missing': 0, 'mismatched': 0, 'samples': []}
+
+        for start in range(0, len(keys), WRITE_BATCH_SIZE):
+            batch = keys[start:start + WRITE_BATCH_SIZE]
+            stored = self._stored_values(indicator, batch)
+            for key in batch:
+                if key not in stored:
+                    report['missing'] += 1
+                elif stored[key] != expected[key]:
+                    report['mismatched'] += 1
+                else:
+                    continue
+                if len(report['samples']) < VERIFY_REPORT_LIMIT:
+                    report['samples'].append({'country_code': key[0], 'year': key[1],
+                                              'expected': expected[key], 'stored': stored.get(key)})
+
+        if report['missing'] or report['mismatched']:
+            self.logger.error(f"Verification failed for {indicator}: {report}")
+        else:
+            self.logger.debug(f"Verified {report['checked']} of {report['rows']} rows for {indicator}")
+        return report
 
     def get_missing_data_ranges(self, indicator, countries, start_year, end_year):
         self.ensure_connection()
-        collection = self.db[indicator]
-        existing_data = collection.find({
-            'country_code': {'$in': countries},
-            'year': {'$gte': start_year, '$lte': end_year}
-        }, {'country_code': 1, 'year': 1, '_id': 0})
+        if self.series_store is not None:
+            existing_data = self.series_store.find_rows(indicator, countries, start_year, end_year)
+        else:
+            collection = self.db[indicator]
+            existing_data = collection.find({
+                'country_code': {'$in': countries},
+                'year': {'$gte': start_year, '$lte': end_year}
+            }, {'country_code': 1, 'year': 1, '_id': 0})
 
         existing_set = set((d['country_code'], d['year']) for d in existing_data)
         all_combinations = set((country, year) for country in countries for year in range(start_year, end_year + 1))
@@ -143,15 +325,22 @@ class MongoDBHandler:
     def create_indexes(self):
         self.ensure_connection()
         for collection_name in self.db.list_collection_names():
+            if collection_name in METADATA_COLLECTIONS:
+                continue
             collection = self.db[collection_name]
             collection.create_index([('country_code', ASCENDING), ('year', ASCENDING)], unique=True)
         self.logger.info("Created indexes for all collections")
 
-    def get_latest_year(self, indicator):
+    def get_latest_year(self, indicator, countries=None, start_year=None, end_year=None):
+        """Latest stored year of an indicator, optionally among the given countries and years."""
         self.ensure_connection()
-        collection = self.db[indicator]
-        result = collection.find_one(sort=[('year', -1)])
-        latest_year = result['year'] if result else None
+        if self.series_store is not None:
+            latest_year = self.series_store.latest_year(indicator, countries, start_year, end_year)
+        else:
+            collection = self.db[indicator]
+            result = collection.find_one(self._row_query(countries, start_year, end_year), {'_id': 0, 'year': 1},
+                                         sort=[('year', -1)])
+            latest_year = result['year'] if result else None
         self.logger.info(f"Latest year for {indicator}: {latest_year}")
         return latest_year
 
@@ -2,4 +2,7 @@ class WorldBankAPIError(Exception):
     pass
 
 class DataProcessingError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class CircuitOpenError(WorldBankAPIError):
+    pass
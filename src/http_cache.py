@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Persistent on-disk cache of parsed API responses, keyed by URL plus params.
+
+    Entries younger than ``ttl`` seconds are served without touching the network. Older
+    entries that carry an ETag or Last-Modified header are revalidated with a conditional
+    request. The least recently used entries are evicted once the cache exceeds
+    ``max_size_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = 24 * 3600, max_size_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._entry_paths())
+
+    def _entry_paths(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.json')]
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        canonical = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def lookup(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Return the stored entry (fresh or stale), or None if nothing is cached."""
+        path = self._path(self.make_key(url, params))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Touching the file keeps LRU order without a separate index
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get('stored_at', 0) < self.ttl
+
+    @staticmethod
+    def revalidation_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def record_revalidation(self, url: str, params: Optional[Dict], entry: Dict):
+        """The server answered 304 Not Modified: restart the entry's TTL."""
+        with self._lock:
+            self.revalidations += 1
+        self.store(url, params, entry['data'], entry.get('etag'), entry.get('last_modified'))
+
+    def store(self, url: str, params: Optional[Dict], data, etag: Optional[str] = None,
+              last_modified: Optional[str] = None):
+        entry = {
+            'url': url,
+            'params': params or {},
+            'stored_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'data': data,
+        }
+        path = self._path(self.make_key(url, params))
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            new_size = os.path.getsize(path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write cache entry for {url}: {str(e)}")
+            return
+
+        with self._lock:
+            self._size += new_size - old_size
+            if self._size > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Oldest access first, until the cache is back under 90% of its budget
+        target = self.max_size_bytes * 0.9
+        paths = sorted(self._entry_paths(), key=self._last_access)
+        for path in paths:
+            if self._size <= target:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    @staticmethod
+    def _last_access(path: str) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+
+    def clear(self):
+        with self._lock:
+            for path in self._entry_paths():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions,
+                'size_bytes': self._size,
+            }
@@ -0,0 +1,152 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .data_processor import INDEX_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorPanel:
+    """Dense (indicator, country, year) cube of indicator values with integer lookup tables.
+
+    Missing observations are NaN. Indicators and countries are looked up through dicts and
+    years by offset from the first year, so one indicator, one year or one cell is a plain
+    array index and a set of countries is a single fancy index.
+    """
+
+    def __init__(self, values: np.ndarray, indicator_codes: Sequence[str], country_codes: Sequence[str],
+                 country_names: Sequence[str], years: np.ndarray, indicator_names: Optional[Dict[str, str]] = None):
+        if values.shape != (len(indicator_codes), len(country_codes), len(years)):
+            raise ValueError(f"Panel values of shape {values.shape} do not match "
+                             f"{len(indicator_codes)} indicators, {len(country_codes)} countries and {len(years)} years")
+        self.values = values
+        self.indicator_codes = list(indicator_codes)
+        self.country_codes = list(country_codes)
+        self.country_names = list(country_names)
+        self.years = years
+        self.indicator_names = dict(indicator_names or {})
+        self.indicator_index = {code: i for i, code in enumerate(self.indicator_codes)}
+        self.country_index = {code: i for i, code in enumerate(self.country_codes)}
+        self.country_name_index = {name: i for i, name in enumerate(self.country_names)}
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], indicator_names: Optional[Dict[str, str]] = None) -> 'IndicatorPanel':
+        """Build a panel from the ``Dict[str, DataFrame]`` returned by ``get_all_data``."""
+        indicator_names = dict(indicator_names or {})
+        frames = {code: df for code, df in frames.items() if not df.empty}
+        countries: Dict[str, str] = {}
+        first_year, last_year = None, None
+        value_dtypes, year_dtype = [], np.dtype('int64')
+        for code, df in frames.items():
+            names = df.index.get_level_values('country_name')
+            codes = df.index.get_level_values('country_code')
+            # One name per code; the first one seen wins
+            for country_code, country_name in dict(zip(codes, names)).items():
+                countries.setdefault(str(country_code), str(country_name))
+            years = df.index.get_level_values('year')
+            first_year = years.min() if first_year is None else min(first_year, years.min())
+            last_year = years.max() if last_year is None else max(last_year, years.max())
+            value_dtypes.append(df['value'].dtype)
+            year_dtype = years.dtype
+            if code not in indicator_names and df.attrs.get('indicator_name'):
+                indicator_names[code] = df.attrs['indicator_name']
+            elif code not in indicator_names and 'indicator_name' in df.columns:
+                indicator_names[code] = df['indicator_name'].iloc[0]
+
+        country_codes = sorted(countries)
+        country_names = [countries[code] for code in country_codes]
+        years = (np.arange(int(first_year), int(last_year) + 1) if frames else np.arange(0)).astype(year_dtype)
+        dtype = np.result_type(*value_dtypes) if value_dtypes else np.dtype('float64')
+        values = np.full((len(frames), len(country_codes), len(years)), np.nan, dtype=dtype)
+
+        country_lookup = pd.Index(country_codes)
+        for i, df in enumerate(frames.values()):
+            country_positions = country_lookup.get_indexer(df.index.get_level_values('country_code').astype(str))
+            year_positions = df.index.get_level_values('year').to_numpy(dtype='int64') - int(first_year)
+            values[i, country_positions, year_positions] = df['value'].to_numpy()
+
+        logger.info(f"Built indicator panel of shape {values.shape}")
+        return cls(values, list(frames), country_codes, country_names, years, indicator_names)
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        """Convert back to one ``(country_name, country_code, year)``-indexed frame per indicator."""
+        return {code: self.to_frame(code) for code in self.indicator_codes}
+
+    def to_frame(self, indicator_code: str) -> pd.DataFrame:
+        cube = self.indicator(indicator_code)
+        country_positions, year_positions = np.nonzero(~np.isnan(cube))
+        index = pd.MultiIndex.from_arrays([np.asarray(self.country_names, dtype=object)[country_positions],
+                                           np.asarray(self.country_codes, dtype=object)[country_positions],
+                                           self.years[year_positions]], names=INDEX_COLUMNS)
+        df = pd.DataFrame({'value': cube[country_positions, year_positions]}, index=index)
+        if indicator_code in self.indicator_names:
+            df.attrs['indicator_name'] = self.indicator_names[indicator_code]
+        return df
+
+    # --- Lookups ---------------------------------------------------------------
+
+    def year_position(self, year: int) -> int:
+        position = int(year) - int(self.years[0]) if len(self.years) else -1
+        if not 0 <= position < len(self.years):
+            raise KeyError(year)
+        return position
+
+    def country_positions(self, countries: Iterable[str]) -> np.ndarray:
+        """Positions of countries given by ISO3 code or by name; unknown countries are skipped."""
+        positions = []
+        for country in countries:
+            position = self.country_index.get(country, self.country_name_index.get(country))
+            if position is not None:
+                positions.append(position)
+        return np.array(positions, dtype='intp')
+
+    # --- Slicing ---------------------------------------------------------------
+
+    def indicator(self, indicator_code: str) -> np.ndarray:
+        """(countries, years) view of one indicator."""
+        return self.values[self.indicator_index[indicator_code]]
+
+    def year(self, year: int) -> np.ndarray:
+        """(indicators, countries) view of one year."""
+        return self.values[:, :, self.year_position(year)]
+
+    def value(self, indicator_code: str, country: str, year: int) -> float:
+        return self.values[self.indicator_index[indicator_code], self.country_positions([country])[0], self.year_position(year)]
+
+    def select(self, indicator_codes: Optional[List[str]] = None, countries: Optional[Iterable[str]] = None,
+               start_year: Optional[int] = None, end_year: Optional[int] = None) -> 'IndicatorPanel':
+        """Sub-panel for some indicators, countries (codes or names) and a year range."""
+        indicator_positions = (np.array([self.indicator_index[code] for code in indicator_codes], dtype='intp')
+                               if indicator_codes is not None else np.arange(len(self.indicator_codes)))
+        country_positions = (self.country_positions(countries) if countries is not None
+                             else np.arange(len(self.country_codes)))
+        first = self.year_position(start_year) if start_year is not None else 0
+        last = self.year_position(end_year) + 1 if end_year is not None else len(self.years)
+
+        values = self.values[np.ix_(indicator_positions, country_positions, np.arange(first, last))]
+        codes = [self.indicator_codes[i] for i in indicator_positions]
+        return IndicatorPanel(values, codes,
+                              [self.country_codes[i] for i in country_positions],
+                              [self.country_names[i] for i in country_positions],
+                              self.years[first:last],
+                              {code: self.indicator_names[code] for code in codes if code in self.indicator_names})
+
+    def latest_year(self, indicator_codes: List[str], countries: Optional[Iterable[str]] = None) -> Optional[int]:
+        """Latest year in which some country has values for all the given indicators."""
+        cube = self.select(indicator_codes, countries).values
+        if cube.size == 0:
+            return None
+        complete = (~np.isnan(cube)).all(axis=0).any(axis=0)
+        if not complete.any():
+            return None
+        return int(self.years[np.flatnonzero(complete)[-1]])
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __contains__(self, indicator_code: str) -> bool:
+        return indicator_code in self.indicator_index
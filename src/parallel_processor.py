@@ -0,0 +1,102 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data_processor import DataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Raw records of the batch being processed. Forked workers inherit them, so they are never pickled.
+_FORK_INPUTS: Dict[str, List[Dict]] = {}
+
+
+def _export_frame(df: pd.DataFrame):
+    """Move a processed frame into a shared memory block; only the small index levels are pickled."""
+    if df.empty or not isinstance(df.index, pd.MultiIndex) or list(df.columns) != ['value']:
+        return 'frame', df
+    rows, levels = len(df), len(df.index.levels)
+    shm = SharedMemory(create=True, size=rows * (8 + 4 * levels))
+    # The parent unlinks the block, so it is not this worker's to clean up
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    try:
+        np.ndarray((rows,), dtype='float64', buffer=shm.buf)[:] = df['value'].to_numpy(dtype='float64')
+        codes = np.ndarray((levels, rows), dtype='int32', buffer=shm.buf, offset=8 * rows)
+        for i, level_codes in enumerate(df.index.codes):
+            codes[i] = level_codes
+        del codes
+    finally:
+        shm.close()
+    return 'shm', (shm.name, rows, list(df.index.levels), list(df.index.names), df['value'].dtype)
+
+
+def _import_frame(kind: str, payload) -> pd.DataFrame:
+    if kind == 'frame':
+        return payload
+    name, rows, levels, names, dtype = payload
+    shm = SharedMemory(name=name)
+    try:
+        values = np.ndarray((rows,), dtype='float64', buffer=shm.buf).astype(dtype, copy=True)
+        codes = np.ndarray((len(levels), rows), dtype='int32', buffer=shm.buf, offset=8 * rows).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    index = pd.MultiIndex(levels=levels, codes=list(codes), names=names, verify_integrity=False)
+    return pd.DataFrame({'value': values}, index=index)
+
+
+def _process_indicator(indicator_code: str, raw_data: Optional[List[Dict]] = None):
+    if raw_data is None:
+        raw_data = _FORK_INPUTS[indicator_code]
+    df, indicator_name = DataProcessor.process_world_bank_data(raw_data, indicator_code)
+    return indicator_name, _export_frame(df)
+
+
+class ParallelProcessor:
+    """Process several indicators' raw records in a pool of worker processes.
+
+    Workers return frames through shared memory instead of pickling them. With the fork
+    start method the raw records are inherited by the workers rather than sent to them.
+    """
+
+    # One batch at a time: forked workers read the module-level inputs
+    _batch_lock = threading.Lock()
+
+    def __init__(self, max_workers: int, mp_context=None):
+        self.max_workers = max_workers
+        self.mp_context = mp_context or multiprocessing.get_context()
+
+    def process_all(self, raw_data: Dict[str, List[Dict]]) -> Dict[str, Tuple[pd.DataFrame, str]]:
+        """Return ``{indicator_code: (df, indicator_name)}`` as ``process_world_bank_data`` would."""
+        if not raw_data:
+            return {}
+        inherit = self.mp_context.get_start_method() == 'fork'
+        workers = min(self.max_workers, len(raw_data))
+        results = {}
+        with self._batch_lock:
+            if inherit:
+                _FORK_INPUTS.update(raw_data)
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=self.mp_context) as executor:
+                    futures = {code: executor.submit(_process_indicator, code, None if inherit else records)
+                               for code, records in raw_data.items()}
+                    # Every future is drained so no shared memory block is left behind on errors
+                    error = None
+                    for code, future in futures.items():
+                        try:
+                            indicator_name, (kind, payload) = future.result()
+                            results[code] = (_import_frame(kind, payload), indicator_name)
+                        except Exception as e:
+                            error = error or e
+                    if error is not None:
+                        raise error
+            finally:
+                _FORK_INPUTS.clear()
+        logger.info(f"Processed {len(results)} indicators in {workers} worker processes")
+        return results
@@ -1,11 +1,18 @@
+import asyncio
 import pandas as pd
 from typing import List, Dict, Tuple, Optional
 import logging
 from datetime import datetime
 from .api import WorldBankAPI
-from .data_processor import DataProcessor
+from .http_cache import ResponseCache
+from .checkpoint import FileCheckpointJournal, MongoCheckpointJournal
+from .bulk_loader import BulkDataLoader
+from .data_processor import DataProcessor, IncrementalProcessor
+from .panel import IndicatorPanel
+from .parallel_processor import ParallelProcessor
 from .exceptions import WorldBankAPIError, DataProcessingError
 from .database import MongoDBHandler
+from .validation import DataValidator
 
 logger = logging.getLogger(__name__)
 
@@ -14,26 +21,70 @@ def get_world_bank_data(
     countries: List[str], 
     start_year: int = 1960, 
     end_year: Optional[int] = None, 
-    max_workers: int = 32
+    max_workers: int = 32,
+    use_async: bool = False,
+    combine_indicators: bool = False,
+    cache_dir: Optional[str] = None,
+    streaming: bool = False,
+    bulk_first_load: bool = False,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_collection: Optional[str] = None,
+    checkpoint_run_id: str = 'default',
+    skip_unchanged: bool = False,
+    hedge_requests: bool = False,
+    shard_years: bool = False,
+    compact: bool = False,
+    float32: bool = False,
+    process_workers: int = 1,
+    flush_rows: Optional[int] = None,
+    diff_series: bool = False,
+    storage_layout: str = 'rows'
 ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
     if end_year is None:
         end_year = datetime.now().year
 
-    api = WorldBankAPI('https://api.worldbank.org/v2', max_workers=max_workers, max_retries=3, retry_backoff_factor=0.1)
+    db_handler = MongoDBHandler(layout=storage_layout)
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    checkpoints = None
+    if checkpoint_collection:
+        checkpoints = MongoCheckpointJournal(db_handler.db[checkpoint_collection], run_id=checkpoint_run_id)
+    elif checkpoint_path:
+        checkpoints = FileCheckpointJournal(checkpoint_path)
+    # Kept single-flight results are one-row probes; data pages are only shared while in flight
+    api = WorldBankAPI('https://api.worldbank.org/v2', max_workers=max_workers, max_retries=3, retry_backoff_factor=0.1,
+                       max_concurrency=max_workers, combine_indicators=combine_indicators, cache=cache,
+                       checkpoints=checkpoints, hedge_requests=hedge_requests,
+                       single_flight_results=256, shard_years=shard_years)
     processor = DataProcessor()
-    db_handler = MongoDBHandler()
+    bulk_loader = BulkDataLoader(api.base_url, session=api.session) if bulk_first_load else None
 
     try:
-        pipeline = WorldBankDataPipeline(api, processor, db_handler)
+        pipeline = WorldBankDataPipeline(api, processor, db_handler, use_async=use_async, streaming=streaming,
+                                         bulk_loader=bulk_loader, skip_unchanged=skip_unchanged,
+                                         compact=compact, float32=float32, process_workers=process_workers,
+                                         flush_rows=flush_rows, diff_series=diff_series)
 
         # Fetch and store new data
         logger.info("Fetching and storing new data...")
         results = pipeline.fetch_all_indicators(indicator_codes, countries, start_year, end_year)
+        if checkpoints is not None:
+            # Everything fetched is stored now, so a later run must not resume from these pages
+            logger.info(f"Checkpoint journal: {checkpoints.resumed} pages resumed, {checkpoints.recorded} pages fetched")
+            checkpoints.clear()
 
         # Retrieve all data from the database
         logger.info("Retrieving all data from the database...")
         data = pipeline.get_all_data(indicator_codes, countries, start_year, end_year)
 
+        if cache is not None:
+            logger.info(f"API response cache: {cache.stats()}")
+        logger.info(f"API rate limiter: {api.rate_limiter.stats()}")
+        logger.info(f"API latency and circuit breaker: {api.resilience_stats()}")
+        logger.info(f"API single-flight: {api.single_flight_stats()}")
+        rejected = {code: report['errors'] for code, report in pipeline.validation_reports.items() if report['invalid']}
+        logger.info(f"Validation: {sum(report['valid'] for report in pipeline.validation_reports.values())} rows stored, "
+                    f"rejected rows by indicator: {rejected}")
+
         return data, pipeline.indicator_mapping
     except Exception as e:
         logger.error(f"An error occurred in the World Bank data pipeline: {str(e)}")
@@ -43,11 +94,33 @@ def get_world_bank_data(
         logger.info("World Bank data pipeline completed.")
 
 class WorldBankDataPipeline:
-    def __init__(self, api: WorldBankAPI, processor: DataProcessor, db_handler: MongoDBHandler):
+    def __init__(self, api: WorldBankAPI, processor: DataProcessor, db_handler: MongoDBHandler,
+                 use_async: bool = False, streaming: bool = False, bulk_loader: Optional[BulkDataLoader] = None,
+                 skip_unchanged: bool = False, compact: bool = False, float32: bool = False,
+                 process_workers: int = 1, flush_rows: Optional[int] = None, diff_series: bool = False):
         self.api = api
         self.processor = processor
         self.db_handler = db_handler
+        self.use_async = use_async
+        self.streaming = streaming
+        self.bulk_loader = bulk_loader
+        self.skip_unchanged = skip_unchanged
+        self.compact = compact
+        self.float32 = float32
+        self.flush_rows = flush_rows
+        self.diff_series = diff_series
+        self.parallel_processor = ParallelProcessor(process_workers) if process_workers > 1 else None
+        self.validator = DataValidator()
+        self.validation_reports = {}
         self.indicator_mapping = {}
+        self.upstream_versions = {}
+        # Indicators with valid rows written (or already stored unchanged) by this pipeline
+        self.stored_indicators = set()
+
+    def fetch_from_api(self, api_queries: List[Tuple[str, List[str], int, int]]) -> Dict[str, List[Dict]]:
+        if self.use_async:
+            return asyncio.run(self.api.fetch_all_data_async(api_queries))
+        return self.api.fetch_all_data(api_queries)
 
     def process_indicator_data(self, indicator: str, raw_data: List[Dict]) -> pd.DataFrame:
         try:
@@ -60,74 +133,211 @@ class WorldBankDataPipeline:
             return pd.DataFrame()
 
 
+    def store_api_data(self, indicator_code: str, api_data: List[Dict]) -> pd.DataFrame:
+        if not api_data:
+            logger.info(f"No new data available from API for {indicator_code}")
+            return pd.DataFrame()
+
+        processed_data, indicator_name = self.processor.process_world_bank_data(api_data, indicator_code)
+        return self.store_processed_data(indicator_code, indicator_name, processed_data)
+
+    def process_api_data(self, api_data: Dict[str, List[Dict]]) -> Dict[str, Tuple[pd.DataFrame, str]]:
+        """Process every indicator's raw records, across worker processes when ``process_workers`` > 1."""
+        pending = {indicator_code: raw_data for indicator_code, raw_data in api_data.items() if raw_data}
+        if self.parallel_processor is not None and len(pending) > 1:
+            return self.parallel_processor.process_all(pending)
+        return {indicator_code: self.processor.process_world_bank_data(raw_data, indicator_code)
+                for indicator_code, raw_data in pending.items()}
+
+    def store_processed_data(self, indicator_code: str, indicator_name: str, processed_data: pd.DataFrame) -> pd.DataFrame:
+        if processed_data.empty:
+            logger.warning(f"No new data processed for {indicator_code}")
+            return processed_data
+
+        valid_data, report = self.validator.validate(processed_data, indicator_code)
+        self.validation_reports[indicator_code] = self.validator.combine(self.validation_reports.get(indicator_code), report)
+        if valid_data.empty:
+            # Nothing was stored, so the indicator is not marked fresh
+            logger.warning(f"No valid data to store for {indicator_code}")
+            self.indicator_mapping[indicator_code] = indicator_name
+            return processed_data
+        if self.diff_series:
+            # Only country series that differ from the stored series (by digest and row count) are sent
+            valid_data, digests = self.db_handler.changed_series(indicator_code, valid_data)
+            if valid_data.empty:
+                logger.info(f"All series of {indicator_code} are unchanged. Skipping write.")
+                self.indicator_mapping[indicator_code] = indicator_name
+                self.stored_indicators.add(indicator_code)
+                return processed_data
+        self.db_handler.insert_or_update_indicator_data(indicator_code, indicator_name, valid_data, validate=False)
+        self.stored_indicators.add(indicator_code)
+        if self.diff_series:
+            self.db_handler.refresh_series_digests(indicator_code, digests)
+        logger.info(f"Successfully updated data for {indicator_code}")
+        self.indicator_mapping[indicator_code] = indicator_name
+        return processed_data
+
+    def probe_upstream(self, indicator_code: str) -> bool:
+        """Probe the upstream ``lastupdated`` date; return True if it matches the one stored at the last fetch."""
+        last_updated = self.api.probe_last_updated(indicator_code)
+        self.upstream_versions[indicator_code] = last_updated
+        return last_updated is not None and last_updated == self.db_handler.get_last_updated(indicator_code)
+
+    def stored_indicator_name(self, indicator_code: str, db_df: pd.DataFrame) -> str:
+        if 'indicator_name' in db_df.columns and db_df['indicator_name'].notna().any():
+            return db_df['indicator_name'].dropna().iloc[0]
+        return db_df.attrs.get('indicator_name') or self.db_handler.get_indicator_name(indicator_code) or indicator_code
+
+    def record_freshness(self, indicator_codes) -> None:
+        for indicator_code in indicator_codes:
+            last_updated = self.upstream_versions.get(indicator_code)
+            if last_updated is not None:
+                self.db_handler.set_last_updated(indicator_code, last_updated)
+
     def fetch_all_indicators(self, indicators: List[str], countries: List[str], 
                              start_year: int, end_year: int) -> Dict[str, pd.DataFrame]:
         results = {}
         current_year = datetime.now().year
         api_queries = []
+        bulk_queries = []
+        fetched = set()
     
         for indicator_code in indicators:
             logger.info(f"Processing indicator: {indicator_code}")
-            db_data = self.db_handler.get_indicator_data(indicator_code, countries, start_year, end_year)
+            # Projected column read; the document fields are not needed here
+            db_df = self._read_frame(indicator_code, countries, start_year, end_year, values_only=True)
             
-            if not db_data:
-                logger.info(f"No data found in database for {indicator_code}. Will fetch from API.")
+            if db_df.empty:
                 api_start_year = start_year
                 api_end_year = min(end_year, current_year)
-                api_queries.append((indicator_code, countries, api_start_year, api_end_year))
+                if self.bulk_loader is not None:
+                    logger.info(f"No data found in database for {indicator_code}. Will load the bulk archive.")
+                    bulk_queries.append((indicator_code, countries, api_start_year, api_end_year))
+                else:
+                    logger.info(f"No data found in database for {indicator_code}. Will fetch from API.")
+                    api_queries.append((indicator_code, countries, api_start_year, api_end_year))
             else:
-                logger.info(f"Found {len(db_data)} records in database for {indicator_code}")
-                latest_year = max(item['year'] for item in db_data)
+                logger.info(f"Found {len(db_df)} records in database for {indicator_code}")
+                latest_year = self.db_handler.get_latest_year(indicator_code, countries, start_year, end_year)
                 api_start_year = min(latest_year + 1, current_year)
                 api_end_year = min(end_year, current_year)
+                # First loads have nothing to skip, so only indicators already stored are probed
+                unchanged = self.skip_unchanged and self.probe_upstream(indicator_code)
                 
-                if api_start_year <= api_end_year:
+                if unchanged:
+                    logger.info(f"{indicator_code} is unchanged upstream since {self.upstream_versions[indicator_code]}. Skipping fetch.")
+                elif api_start_year <= api_end_year:
                     logger.info(f"Updating {indicator_code} from {api_start_year} to {api_end_year}")
                     api_queries.append((indicator_code, countries, api_start_year, api_end_year))
                 
                 # Store the database data
-                db_df = pd.DataFrame(db_data)
-                db_df.set_index(['country_name', 'country_code', 'year'], inplace=True)
                 results[indicator_code] = db_df
+                if indicator_code not in self.indicator_mapping:
+                    # Indicators served from the database still need a name, e.g. when skipped as unchanged
+                    self.indicator_mapping[indicator_code] = self.stored_indicator_name(indicator_code, db_df)
     
+        # First-time loads come from one bulk archive per indicator instead of paged JSON
+        for indicator_code, bulk_countries, bulk_start_year, bulk_end_year in bulk_queries:
+            try:
+                bulk_data, indicator_name = self.bulk_loader.load_indicator(indicator_code, bulk_start_year, bulk_end_year, bulk_countries)
+            except (WorldBankAPIError, DataProcessingError) as e:
+                logger.warning(f"Bulk load failed for {indicator_code} ({str(e)}). Falling back to the API.")
+                api_queries.append((indicator_code, bulk_countries, bulk_start_year, bulk_end_year))
+                continue
+            processed_data = self.store_processed_data(indicator_code, indicator_name, bulk_data)
+            fetched.add(indicator_code)
+            if not processed_data.empty:
+                results[indicator_code] = processed_data
+
         # Fetch data from API for all queries
         if api_queries:
             logger.info(f"Fetching data for {len(api_queries)} indicators from API")
-            api_results = self.api.fetch_all_data(api_queries)
-    
-            for indicator_code, api_data in api_results.items():
-                if api_data:
-                    processed_data, indicator_name = self.processor.process_world_bank_data(api_data, indicator_code)
-                    if not processed_data.empty:
-                        self.db_handler.insert_or_update_indicator_data(indicator_code, indicator_name, processed_data.reset_index().to_dict('records'))
-                        logger.info(f"Successfully updated data for {indicator_code}")
-                        
-                        if indicator_code in results:
-                            results[indicator_code] = pd.concat([results[indicator_code], processed_data])
-                        else:
-                            results[indicator_code] = processed_data
-                        
-                        self.indicator_mapping[indicator_code] = indicator_name
+            if self.streaming:
+                # Pages are processed and written as they arrive, so raw rows never pile up
+                processed_pages = {}
+                incremental = {}
+                for indicator_code, page_data in self.api.iter_all(api_queries):
+                    fetched.add(indicator_code)
+                    if self.flush_rows:
+                        # Pages are buffered as typed columns and written in batches of flush_rows
+                        if indicator_code not in incremental:
+                            incremental[indicator_code] = IncrementalProcessor(indicator_code, self.flush_rows)
+                        processed_data = incremental[indicator_code].add_page(page_data)
+                        if processed_data is None:
+                            continue
+                        processed_data = self.store_processed_data(indicator_code, incremental[indicator_code].indicator_name,
+                                                                   processed_data)
                     else:
-                        logger.warning(f"No new data processed for {indicator_code}")
+                        processed_data = self.store_api_data(indicator_code, page_data)
+                    if not processed_data.empty:
+                        processed_pages.setdefault(indicator_code, []).append(processed_data)
+                for indicator_code, processor in incremental.items():
+                    processed_data, indicator_name = processor.finish()
+                    if processed_data.empty and processor.rows:
+                        continue
+                    processed_data = self.store_processed_data(indicator_code, indicator_name, processed_data)
+                    if not processed_data.empty:
+                        processed_pages.setdefault(indicator_code, []).append(processed_data)
+                api_frames = {code: pd.concat(frames) for code, frames in processed_pages.items()}
+            else:
+                api_frames = {}
+                api_data = self.fetch_from_api(api_queries)
+                processed = self.process_api_data(api_data)
+                for indicator_code in api_data:
+                    fetched.add(indicator_code)
+                    if indicator_code not in processed:
+                        logger.info(f"No new data available from API for {indicator_code}")
+                        continue
+                    processed_data, indicator_name = processed[indicator_code]
+                    processed_data = self.store_processed_data(indicator_code, indicator_name, processed_data)
+                    if not processed_data.empty:
+                        api_frames[indicator_code] = processed_data
+
+            for indicator_code, processed_data in api_frames.items():
+                if indicator_code in results:
+                    results[indicator_code] = pd.concat([results[indicator_code], processed_data])
                 else:
-                    logger.info(f"No new data available from API for {indicator_code}")
+                    results[indicator_code] = processed_data
     
+        # Only indicators whose rows were actually stored may be skipped next time
+        if self.skip_unchanged:
+            self.record_freshness(fetched & self.stored_indicators)
         return results
     
+    def _read_frame(self, indicator_code: str, countries: List[str], start_year: int, end_year: int,
+                    values_only: bool) -> pd.DataFrame:
+        if values_only:
+            # Projected read decoded straight into arrays, without the per-row document fields
+            return self.db_handler.get_indicator_values(indicator_code, countries, start_year, end_year)
+        df = pd.DataFrame(self.db_handler.get_indicator_data(indicator_code, countries, start_year, end_year))
+        return df.set_index(['country_name', 'country_code', 'year']) if not df.empty else df
+
     def get_all_data(self, indicators: List[str], countries: List[str], 
-                     start_year: int, end_year: int) -> Dict[str, pd.DataFrame]:
+                     start_year: int, end_year: int, values_only: Optional[bool] = None) -> Dict[str, pd.DataFrame]:
+        """Stored data of every indicator as a frame indexed by (country_name, country_code, year).
+
+        ``values_only`` (by default on for compact pipelines, which drop the document fields
+        anyway) reads just the values through ``get_indicator_values``.
+        """
+        values_only = self.compact if values_only is None else values_only
         results = {}
         for indicator_code in indicators:  # Changed from 'indicator' to 'indicator_code'
             try:
-                data = self.db_handler.get_indicator_data(indicator_code, countries, start_year, end_year)
-                df = pd.DataFrame(data)
+                df = self._read_frame(indicator_code, countries, start_year, end_year, values_only)
                 if not df.empty:
-                    df = df.set_index(['country_name', 'country_code', 'year'])
                     results[indicator_code] = df
                     logger.info(f"Retrieved data for {indicator_code}: {len(df)} records")
                 else:
                     logger.warning(f"No data retrieved for {indicator_code}")
             except Exception as e:
                 logger.error(f"Error retrieving data for {indicator_code}: {str(e)}")
+        if self.compact:
+            # Categorical countries shared by all indicators, int16 years and no per-row document fields
+            results = self.processor.compact_frames(results, self.indicator_mapping, float32=self.float32)
         return results
+
+    def get_panel(self, indicators: List[str], countries: List[str],
+                  start_year: int, end_year: int) -> IndicatorPanel:
+        """Stored data as one dense (indicator, country, year) array; see ``IndicatorPanel``."""
+        return IndicatorPanel.from_frames(self.get_all_data(indicators, countries, start_year, end_year, values_only=True),
+                                          self.indicator_mapping)
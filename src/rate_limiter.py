@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimiter:
+    """Token bucket with AIMD-adjusted rate and concurrency, shared by all workers of one API client.
+
+    Every request takes a token and an in-flight slot. Successful responses raise the rate and
+    the concurrency limit additively; 429 and 5xx responses or network failures halve them.
+    A 429 also pauses all workers until its Retry-After has passed.
+    """
+
+    def __init__(self, rate: float = 20.0, max_rate: float = 100.0, min_rate: float = 0.5,
+                 max_concurrency: int = 32, min_concurrency: int = 1, default_retry_after: float = 60.0):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.concurrency_limit = float(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.default_retry_after = default_retry_after
+        self.tokens = max(rate, 1.0)
+        self.in_flight = 0
+        self.requests = 0
+        self.throttle_events = 0
+        self.paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._last_refill = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        # Burst capacity of one second's worth of requests
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _try_acquire(self) -> float:
+        """Take a token and a slot if possible; otherwise return how long to wait. Caller holds the lock."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.concurrency_limit):
+            return 0.05
+        if self.tokens < 1.0:
+            return (1.0 - self.tokens) / self.rate
+        self.tokens -= 1.0
+        self.in_flight += 1
+        self.requests += 1
+        return 0.0
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                wait = self._try_acquire()
+                if wait <= 0:
+                    return
+                self._condition.wait(wait)
+
+    async def acquire_async(self):
+        while True:
+            with self._condition:
+                wait = self._try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, status_code: Optional[int], retry_after: Optional[str] = None):
+        """Return a slot and adapt to the outcome.
+
+        ``status_code`` is None for failed requests and 0 for requests that never completed,
+        which leave the rate unchanged.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if status_code == 429:
+                self.throttle_events += 1
+                pause = parse_retry_after(retry_after)
+                pause = self.default_retry_after if pause is None else pause
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                self._decrease()
+                logger.warning(f"Throttled by the API; pausing all requests for {pause:.1f}s "
+                               f"(rate {self.rate:.2f}/s, concurrency {int(self.concurrency_limit)})")
+            elif status_code is None or status_code >= 500:
+                self._decrease()
+            elif 0 < status_code < 400:
+                self._increase()
+            self._condition.notify_all()
+
+    def _increase(self):
+        self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+    def _decrease(self):
+        # A burst of failures from requests already in flight counts as one congestion signal
+        now = time.monotonic()
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        self.tokens = min(self.tokens, 1.0)
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            return {
+                'rate': self.rate,
+                'concurrency_limit': int(self.concurrency_limit),
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'throttle_events': self.throttle_events,
+            }
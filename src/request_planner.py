@@ -0,0 +1,103 @@
+from typing import List, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per page requested from the v2 API
+PER_PAGE = 3000
+# Conservative limit that proxies and the API gateway accept
+MAX_URL_LENGTH = 2000
+# Indicators combined into one source-scoped request
+MAX_INDICATORS_PER_REQUEST = 10
+# Economies and aggregates returned per indicator and year for country='all'
+ALL_COUNTRIES_ROWS_PER_YEAR = 266
+
+
+def plan_country_batches(countries: List[str], start_year: int, end_year: int, url_prefix_length: int = 0,
+                         max_url_length: int = MAX_URL_LENGTH, per_page: int = PER_PAGE,
+                         indicator_count: int = 1) -> List[List[str]]:
+    """Group countries into semicolon-joined batches that fit one URL and, ideally, one page."""
+    rows_per_country = max(end_year - start_year + 1, 1) * indicator_count
+    max_countries_per_page = max(per_page // rows_per_country, 1)
+
+    batches = []
+    batch = []
+    batch_length = url_prefix_length
+    for country in countries:
+        # Aggregates like 'all' cannot be combined with other codes
+        if country.lower() == 'all':
+            batches.append([country])
+            continue
+
+        added_length = len(country) + (1 if batch else 0)
+        if batch and (batch_length + added_length > max_url_length or len(batch) >= max_countries_per_page):
+            batches.append(batch)
+            batch = []
+            batch_length = url_prefix_length
+            added_length = len(country)
+
+        batch.append(country)
+        batch_length += added_length
+
+    if batch:
+        batches.append(batch)
+
+    logger.debug(f"Planned {len(batches)} request batches for {len(countries)} countries")
+    return batches
+
+
+def plan_year_shards(start_year: int, end_year: int, rows_per_year: int,
+                     per_page: int = PER_PAGE) -> List[Tuple[int, int]]:
+    """Split a date range into consecutive, non-overlapping year shards of roughly one page each."""
+    years_per_shard = max(per_page // max(rows_per_year, 1), 1)
+    return [(shard_start, min(shard_start + years_per_shard - 1, end_year))
+            for shard_start in range(start_year, end_year + 1, years_per_shard)]
+
+
+def plan_indicator_groups(indicator_codes: List[str], sources: Dict[str, Optional[str]],
+                          max_indicators: int = MAX_INDICATORS_PER_REQUEST) -> List[Tuple[List[str], Optional[str]]]:
+    """Group indicators sharing a known source into combined requests; the rest are requested on their own."""
+    groups = []
+    by_source = {}
+    for indicator_code in indicator_codes:
+        source = sources.get(indicator_code)
+        if source is None:
+            groups.append(([indicator_code], None))
+        elif indicator_code not in by_source.setdefault(source, []):
+            by_source[source].append(indicator_code)
+
+    for source, codes in by_source.items():
+        for i in range(0, len(codes), max_indicators):
+            group = codes[i:i + max_indicators]
+            groups.append((group, source if len(group) > 1 else None))
+
+    return groups
+
+
+def split_rows_by_country(rows: List[Dict], countries: List[str]) -> Dict[str, List[Dict]]:
+    """Split the rows of a batched response back out per requested country code."""
+    by_country = {country: [] for country in countries}
+    lookup = {country.upper(): country for country in countries}
+
+    for row in rows:
+        iso3 = row.get('countryiso3code') or ''
+        country_info = row.get('country')
+        iso2 = country_info.get('id', '') if isinstance(country_info, dict) else ''
+
+        key = lookup.get(iso3.upper()) or lookup.get(iso2.upper()) or iso3 or iso2
+        by_country.setdefault(key, []).append(row)
+
+    return by_country
+
+
+def split_rows_by_indicator(rows: List[Dict], indicator_codes: List[str]) -> Dict[str, List[Dict]]:
+    """Split the rows of a combined multi-indicator response back out per indicator code."""
+    by_indicator = {indicator_code: [] for indicator_code in indicator_codes}
+    for row in rows:
+        indicator_info = row.get('indicator')
+        indicator_code = indicator_info.get('id') if isinstance(indicator_info, dict) else None
+        if indicator_code is None:
+            logger.warning(f"Dropping row without an indicator id from combined response: {row}")
+            continue
+        by_indicator.setdefault(indicator_code, []).append(row)
+    return by_indicator
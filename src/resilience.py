@@ -0,0 +1,130 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket_bounds(smallest: float = 0.001, largest: float = 120.0, factor: float = 1.5) -> List[float]:
+    bounds = [smallest]
+    while bounds[-1] < largest:
+        bounds.append(bounds[-1] * factor)
+    return bounds
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of request latencies with geometric buckets from 1 ms to 2 minutes."""
+
+    def __init__(self):
+        self.bounds = _bucket_bounds()
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile, or None before any sample."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100.0 * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank and bucket_count:
+                    return self.bounds[min(index, len(self.bounds) - 1)]
+            return self.bounds[-1]
+
+    def stats(self) -> Dict:
+        p50, p95, p99 = (self.percentile(q) for q in (50, 95, 99))
+        with self._lock:
+            buckets = {f"le_{bound:.3f}s": count for bound, count in zip(self.bounds, self.counts) if count}
+            if self.counts[-1]:
+                buckets['le_inf'] = self.counts[-1]
+            return {
+                'count': self.count,
+                'mean_s': self.total / self.count if self.count else None,
+                'p50_s': p50,
+                'p95_s': p95,
+                'p99_s': p99,
+                'buckets': buckets,
+            }
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker that fails fast once a host has clearly stopped answering.
+
+    After ``failure_threshold`` consecutive failures (network errors or 5xx responses) the
+    circuit for that host opens and requests raise ``CircuitOpenError`` straight away. Once
+    ``reset_timeout`` seconds have passed, a single trial request is let through; its outcome
+    closes the circuit again or keeps it open for another timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.opened_count = 0
+        self.rejected_count = 0
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial_in_flight: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str):
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return
+            if time.monotonic() - opened_at >= self.reset_timeout and not self._trial_in_flight.get(host):
+                self._trial_in_flight[host] = True
+                logger.info(f"Circuit for {host} is half-open; sending a trial request")
+                return
+            self.rejected_count += 1
+        raise CircuitOpenError(f"Circuit open for {host} after {self.failure_threshold} consecutive failures")
+
+    def record_success(self, host: str):
+        with self._lock:
+            if host in self._opened_at:
+                logger.info(f"Circuit for {host} closed again")
+            self._failures[host] = 0
+            self._opened_at.pop(host, None)
+            self._trial_in_flight.pop(host, None)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if host in self._opened_at:
+                # The trial request failed as well
+                self._opened_at[host] = time.monotonic()
+                self._trial_in_flight.pop(host, None)
+            elif self._failures[host] >= self.failure_threshold:
+                self._opened_at[host] = time.monotonic()
+                self.opened_count += 1
+                logger.error(f"Circuit for {host} opened after {self._failures[host]} consecutive failures")
+
+    def record_cancelled(self, host: str):
+        # A cancelled hedge says nothing about the host, but must not leave the trial slot taken
+        with self._lock:
+            self._trial_in_flight.pop(host, None)
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'open_circuits': len(self._opened_at),
+                'opened': self.opened_count,
+                'rejected': self.rejected_count,
+            }
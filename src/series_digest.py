@@ -0,0 +1,39 @@
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def _columns(df: pd.DataFrame) -> pd.DataFrame:
+    return df.reset_index() if isinstance(df.index, pd.MultiIndex) else df
+
+
+def series_digests(df: pd.DataFrame) -> Dict[str, str]:
+    """Digest of the (year, value) rows of every country series in a processed frame.
+
+    Row hashes are summed per country, so the digest does not depend on row order. Years
+    and values are normalised to int64/float64 first, so compact frames digest the same.
+    """
+    df = _columns(df)
+    if df.empty:
+        return {}
+    rows = pd.DataFrame({'year': df['year'].to_numpy(dtype='int64'), 'value': df['value'].to_numpy(dtype='float64')})
+    hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    codes, countries = pd.factorize(df['country_code'].astype(str), sort=True)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(countries))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # uint64 addition wraps, which is what a sum of hashes wants
+    sums = np.add.reduceat(hashes[order], starts)
+    return {country: f"{digest:016x}-{count}" for country, digest, count in zip(countries, sums, counts)}
+
+
+def digest_rows(digest: str) -> int:
+    """Number of rows a digest covers."""
+    return int(digest.rsplit('-', 1)[1])
+
+
+def select_series(df: pd.DataFrame, country_codes: Iterable[str]) -> pd.DataFrame:
+    """Rows of ``df`` that belong to the given countries, in the input's shape."""
+    column = df.index.get_level_values('country_code') if isinstance(df.index, pd.MultiIndex) else df['country_code']
+    return df[np.asarray(pd.Index(column).astype(str).isin(list(country_codes)))]
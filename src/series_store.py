@@ -0,0 +1,131 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING, UpdateOne
+
+from .data_processor import INDEX_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# One document per (indicator, country) for every indicator stored in the series layout
+SERIES_COLLECTION = 'indicator_series'
+
+
+def series_id(indicator_code: str, country_code: str) -> str:
+    return f"{indicator_code}|{country_code}"
+
+
+class SeriesStore:
+    """Bucketed storage of indicator data: one document per (indicator, country) series.
+
+    A document holds the series' values keyed by year, ``{'values': {'2019': 21.4, '2020': 20.9}}``,
+    next to the indicator and country names, so a full history is one document and one index
+    entry instead of one per year. Single years are updated in place with ``values.<year>`` paths.
+    """
+
+    def __init__(self, db):
+        self.collection = db[SERIES_COLLECTION]
+        self._indexed = False
+
+    def ensure_index(self) -> None:
+        if not self._indexed:
+            self.collection.create_index([('indicator', ASCENDING), ('country_code', ASCENDING)], unique=True)
+            self._indexed = True
+
+    @staticmethod
+    def upsert_operation(indicator_code: str, indicator_name: str, country_code: str, country_name: Optional[str],
+                         points: List[Tuple[int, float]], now) -> UpdateOne:
+        """Upsert of the given years of one series; ``last_updated`` moves only if one of their values changes."""
+        unchanged = {'$and': [{'$eq': [f'$values.{year}', value]} for year, value in points]}
+        fields = {'indicator': {'$literal': indicator_code},
+                  'indicator_name': {'$literal': indicator_name},
+                  'country_code': {'$literal': country_code}}
+        if isinstance(country_name, str):
+            fields['country_name'] = {'$literal': country_name}
+        fields.update({f'values.{year}': value for year, value in points})
+        return UpdateOne({'_id': series_id(indicator_code, country_code)},
+                         [{'$set': {'last_updated': {'$cond': [unchanged, '$last_updated', now]}}}, {'$set': fields}],
+                         upsert=True)
+
+    def operations(self, indicator_code: str, indicator_name: str, records: List[Dict], now) -> List[UpdateOne]:
+        series: Dict[str, List[Tuple[int, float]]] = {}
+        names: Dict[str, Optional[str]] = {}
+        for item in records:
+            series.setdefault(item['country_code'], []).append((item['year'], item['value']))
+            if isinstance(item.get('country_name'), str):
+                names[item['country_code']] = item['country_name']
+        return [self.upsert_operation(indicator_code, indicator_name, country_code, names.get(country_code), points, now)
+                for country_code, points in series.items()]
+
+    def _query(self, indicator_code: str, countries: Optional[Iterable[str]] = None) -> Dict:
+        query = {'indicator': indicator_code}
+        if countries and list(countries) != ['all']:
+            query['_id'] = {'$in': [series_id(indicator_code, country_code) for country_code in countries]}
+        return query
+
+    @staticmethod
+    def _in_range(year: int, start_year: Optional[int], end_year: Optional[int]) -> bool:
+        return not (start_year and end_year) or start_year <= year <= end_year
+
+    def stored_values(self, indicator_code: str, keys: List[Tuple[str, int]]) -> Dict[Tuple[str, int], float]:
+        """Stored values of the given (country_code, year) keys, read with one projected query."""
+        countries = sorted({country_code for country_code, _ in keys})
+        stored = {}
+        for doc in self.collection.find(self._query(indicator_code, countries), {'_id': 0, 'country_code': 1, 'values': 1}):
+            for year, value in doc.get('values', {}).items():
+                stored[(doc['country_code'], int(year))] = value
+        return stored
+
+    def find_rows(self, indicator_code: str, countries: Optional[List[str]] = None,
+                  start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[Dict]:
+        """Row documents shaped like the per-(country, year) layout's, without ``_id``."""
+        rows = []
+        for doc in self.collection.find(self._query(indicator_code, countries)):
+            for year in sorted(map(int, doc.get('values', {}))):
+                if self._in_range(year, start_year, end_year):
+                    rows.append({'country_code': doc['country_code'], 'year': year, 'value': doc['values'][str(year)],
+                                 'country_name': doc.get('country_name'), 'indicator_name': doc.get('indicator_name'),
+                                 'last_updated': doc.get('last_updated')})
+        return rows
+
+    def find_frame(self, indicator_code: str, countries: Optional[List[str]] = None,
+                   start_year: Optional[int] = None, end_year: Optional[int] = None) -> pd.DataFrame:
+        """The frame ``get_all_data`` builds from ``get_indicator_data``, built column-wise from the series."""
+        names, codes, years, values, indicator_names, updated, lengths = [], [], [], [], [], [], []
+        for doc in self.collection.find(self._query(indicator_code, countries)):
+            series = doc.get('values', {})
+            series_years = np.fromiter(map(int, series), dtype='int64', count=len(series))
+            series_values = np.fromiter(series.values(), dtype='float64', count=len(series))
+            order = np.argsort(series_years)
+            series_years, series_values = series_years[order], series_values[order]
+            if start_year and end_year:
+                keep = (series_years >= start_year) & (series_years <= end_year)
+                series_years, series_values = series_years[keep], series_values[keep]
+            years.append(series_years)
+            values.append(series_values)
+            lengths.append(len(series_years))
+            names.append(doc.get('country_name'))
+            codes.append(doc['country_code'])
+            indicator_names.append(doc.get('indicator_name'))
+            updated.append(doc.get('last_updated'))
+        if not sum(lengths):
+            return pd.DataFrame(columns=INDEX_COLUMNS + ['value']).set_index(INDEX_COLUMNS)
+        index = pd.MultiIndex.from_arrays([np.repeat(np.array(names, dtype=object), lengths),
+                                           np.repeat(np.array(codes, dtype=object), lengths),
+                                           np.concatenate(years)], names=INDEX_COLUMNS)
+        return pd.DataFrame({'value': np.concatenate(values),
+                             'indicator_name': np.repeat(np.array(indicator_names, dtype=object), lengths),
+                             'last_updated': np.repeat(np.array(updated, dtype=object), lengths)}, index=index)
+
+    def row_counts(self, indicator_code: str, countries: Iterable[str]) -> Dict[str, int]:
+        return {doc['country_code']: doc['rows'] for doc in self.collection.aggregate(
+            [{'$match': self._query(indicator_code, list(countries))},
+             {'$project': {'_id': 0, 'country_code': 1, 'rows': {'$size': {'$objectToArray': '$values'}}}}])}
+
+    def latest_year(self, indicator_code: str, countries: Optional[List[str]] = None,
+                    start_year: Optional[int] = None, end_year: Optional[int] = None) -> Optional[int]:
+        years = [int(year) for doc in self.collection.find(self._query(indicator_code, countries), {'_id': 0, 'values': 1})
+                 for year in doc.get('values', {}) if self._in_range(int(year), start_year, end_year)]
+        return max(years) if years else None
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Collapse identical calls so they share one execution and its result.
+
+    Callers asking for a key that is already in flight wait for that call instead of
+    starting their own. With ``max_results`` set, the most recent results of calls made with
+    ``remember=True`` are kept as well, so repeated requests later in the same run are answered
+    without a new call; keep that for small results, as each one stays alive until evicted.
+    Failures are shared with the waiting callers but never kept.
+    """
+
+    def __init__(self, max_results: int = 0):
+        self.max_results = max_results
+        self.calls = 0
+        self.saved_calls = 0
+        self._results: OrderedDict = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._in_flight_async: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def _remembered(self, key: Hashable):
+        # Caller holds the lock
+        self._results.move_to_end(key)
+        self.saved_calls += 1
+        return self._results[key]
+
+    def _remember(self, key: Hashable, result):
+        # Caller holds the lock
+        if self.max_results <= 0:
+            return
+        self._results[key] = result
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def do(self, key: Hashable, fn: Callable[[], object], remember: bool = True):
+        with self._lock:
+            if key in self._results:
+                return self._remembered(key)
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.saved_calls += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            if remember:
+                self._remember(key, result)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable], remember: bool = True):
+        with self._lock:
+            if key in self._results:
+                return self._remembered(key)
+            future = self._in_flight_async.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight_async[key] = asyncio.get_running_loop().create_future()
+                self.calls += 1
+            else:
+                self.saved_calls += 1
+        if not leader:
+            # Shielded so one cancelled waiter does not cancel the shared call for the others
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight_async[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Avoid "exception was never retrieved" warnings when nobody else was waiting
+                future.exception()
+            raise
+        with self._lock:
+            del self._in_flight_async[key]
+            if remember:
+                self._remember(key, result)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'calls': self.calls, 'saved_calls': self.saved_calls}
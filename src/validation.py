@@ -0,0 +1,98 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['country_code', 'year', 'value']
+# Checks in the order they are reported; a row can fail several of them
+CHECKS = ['missing_field', 'bad_type', 'year_out_of_range', 'non_finite_value', 'duplicate_key']
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+
+class DataValidator:
+    """Columnar validation of processed indicator rows before they are written.
+
+    Works on a processed frame (indexed or not) or a list of records and checks required
+    fields, types, year bounds, finite values and duplicate (country_code, year) keys with
+    array operations. Returns the valid rows in the input's shape and a compact report.
+    """
+
+    def __init__(self, min_year: int = MIN_YEAR, max_year: int = MAX_YEAR, sample_size: int = 5):
+        self.min_year = min_year
+        self.max_year = max_year
+        self.sample_size = sample_size
+
+    @staticmethod
+    def _is_str(column: pd.Series) -> np.ndarray:
+        if pd.api.types.infer_dtype(column, skipna=True) == 'string':
+            return column.notna().to_numpy()
+        return np.fromiter((type(code) is str for code in column), dtype=bool, count=len(column))
+
+    @staticmethod
+    def empty_report(indicator_code: str) -> Dict:
+        return {'indicator': indicator_code, 'rows': 0, 'valid': 0, 'invalid': 0,
+                'errors': dict.fromkeys(CHECKS, 0), 'samples': []}
+
+    def validate(self, data: Union[pd.DataFrame, List[Dict]], indicator_code: str) -> Tuple[pd.DataFrame, Dict]:
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+        df = data.reset_index() if isinstance(data.index, pd.MultiIndex) else data
+        report = self.empty_report(indicator_code)
+        report['rows'] = len(df)
+        if df.empty:
+            return data, report
+
+        columns = {column: df[column] if column in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+                   for column in REQUIRED_COLUMNS}
+        years = pd.to_numeric(columns['year'], errors='coerce').to_numpy(dtype='float64')
+        values = pd.to_numeric(columns['value'], errors='coerce').to_numpy(dtype='float64')
+
+        failed = {}
+        failed['missing_field'] = np.logical_or.reduce([columns[column].isna().to_numpy() for column in REQUIRED_COLUMNS])
+        present = ~failed['missing_field']
+        failed['bad_type'] = present & (~self._is_str(columns['country_code']) | np.isnan(years)
+                                        | (np.mod(years, 1) != 0) | np.isnan(values))
+        failed['year_out_of_range'] = (years < self.min_year) | (years > self.max_year)
+        failed['non_finite_value'] = np.isinf(values)
+        invalid = np.logical_or.reduce(list(failed.values()))
+
+        # Only the first of several otherwise valid rows for a key is kept
+        keys = pd.DataFrame({'country_code': columns['country_code'].to_numpy(), 'year': years})
+        failed['duplicate_key'] = self._later_duplicates(keys, invalid)
+        invalid |= failed['duplicate_key']
+
+        report['errors'] = {check: int(np.count_nonzero(failed[check])) for check in CHECKS}
+        report['invalid'] = int(np.count_nonzero(invalid))
+        report['valid'] = report['rows'] - report['invalid']
+        if report['invalid']:
+            positions = np.flatnonzero(invalid)[:self.sample_size]
+            for position in positions:
+                sample = {column: value for column, value in df.iloc[position].items()
+                          if column in REQUIRED_COLUMNS or column == 'country_name'}
+                sample['errors'] = [check for check in CHECKS if failed[check][position]]
+                report['samples'].append(sample)
+            logger.warning(f"Validation rejected {report['invalid']} of {report['rows']} rows for {indicator_code}: "
+                           f"{ {check: count for check, count in report['errors'].items() if count} }")
+        logger.info(f"Validated {report['valid']} out of {report['rows']} items for {indicator_code}")
+        return data[~invalid] if report['invalid'] else data, report
+
+    @staticmethod
+    def _later_duplicates(keys: pd.DataFrame, invalid: np.ndarray) -> np.ndarray:
+        later = np.zeros(len(keys), dtype=bool)
+        later[np.flatnonzero(~invalid)] = keys[~invalid].duplicated().to_numpy()
+        return later
+
+    def combine(self, first: Optional[Dict], second: Dict) -> Dict:
+        """Sum two reports for the same indicator, e.g. from successive streamed batches."""
+        if first is None:
+            return second
+        return {'indicator': first['indicator'],
+                'rows': first['rows'] + second['rows'],
+                'valid': first['valid'] + second['valid'],
+                'invalid': first['invalid'] + second['invalid'],
+                'errors': {check: first['errors'][check] + second['errors'][check] for check in CHECKS},
+                'samples': (first['samples'] + second['samples'])[:self.sample_size]}
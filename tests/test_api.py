@@ -1,5 +1,10 @@
+import asyncio
+import json
+import re
 import pytest
 import responses
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 from requests.exceptions import ConnectionError
 from src.api import WorldBankAPI
 from src.exceptions import WorldBankAPIError
@@ -105,5 +110,225 @@ def test_fetch_all_data_partial_failure(world_bank_api):
     assert 'NY.GDP.MKTP.CD' in results
     assert len(results['NY.GDP.MKTP.CD']) == 1
 
+@responses.activate
+def test_fetch_indicator_data_pages_fan_out(world_bank_api, monkeypatch):
+    monkeypatch.setattr('src.api.time.sleep', lambda seconds: None)
+    url = f"{world_bank_api.base_url}/country/all/indicator/SP.POP.TOTL"
+    calls = []
+
+    def callback(request):
+        page = int(request.params['page'])
+        calls.append(page)
+        if page == 3 and calls.count(3) == 1:
+            raise ConnectionError("Connection reset")
+        body = [{'page': page, 'pages': 4, 'per_page': 1, 'total': 4},
+                [{'countryiso3code': 'USA', 'date': str(2000 + page), 'value': page}]]
+        return 200, {}, json.dumps(body)
+
+    responses.add_callback(responses.GET, url, callback=callback)
+
+    data = world_bank_api.fetch_indicator_data('SP.POP.TOTL', 'all', 2001, 2004)
+
+    assert [item['value'] for item in data] == [1, 2, 3, 4]
+    assert sorted(calls) == [1, 2, 3, 3, 4]
+
+@responses.activate
+def test_fetch_all_data_batches_countries(world_bank_api):
+    batched_url = f"{world_bank_api.base_url}/country/USA;CHN/indicator/SP.POP.TOTL"
+    responses.add(responses.GET, batched_url, json=[
+        {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 2},
+        [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 1},
+         {'country': {'id': 'CN', 'value': 'China'}, 'countryiso3code': 'CHN', 'date': '2020', 'value': 2}]
+    ], status=200)
+
+    results = world_bank_api.fetch_all_data([('SP.POP.TOTL', ['USA', 'CHN'], 2020, 2020)])
+
+    assert len(responses.calls) == 1
+    assert sorted(item['value'] for item in results['SP.POP.TOTL']) == [1, 2]
+
+@responses.activate
+def test_fetch_all_data_shards_long_date_ranges():
+    api = WorldBankAPI('https://api.worldbank.org/v2', shard_years=True)
+    requested = []
+
+    def callback(request):
+        start_year, end_year = (int(year) for year in request.params['date'].split(':'))
+        requested.append((start_year, end_year))
+        rows = [{'country': {'id': '1W', 'value': 'World'}, 'countryiso3code': 'WLD', 'date': str(year), 'value': year}
+                for year in range(start_year, end_year + 1)]
+        return 200, {}, json.dumps([{'page': 1, 'pages': 1, 'per_page': 3000, 'total': len(rows)}, rows])
+
+    responses.add_callback(responses.GET, f"{api.base_url}/country/all/indicator/SP.POP.TOTL", callback=callback)
+
+    results = api.fetch_all_data([('SP.POP.TOTL', ['all'], 1960, 2023)])
+
+    assert len(requested) == 6
+    assert sorted(int(item['date']) for item in results['SP.POP.TOTL']) == list(range(1960, 2024))
+
+@responses.activate
+def test_fetch_country_batch_falls_back_per_country(world_bank_api):
+    base = f"{world_bank_api.base_url}/country"
+    responses.add(responses.GET, f"{base}/USA;XXX/indicator/SP.POP.TOTL", json={"error": "Bad Request"}, status=400)
+    responses.add(responses.GET, f"{base}/USA/indicator/SP.POP.TOTL", json=[
+        {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 1},
+        [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 1}]
+    ], status=200)
+    responses.add(responses.GET, f"{base}/XXX/indicator/SP.POP.TOTL", json={"error": "Bad Request"}, status=400)
+
+    by_country = world_bank_api.fetch_country_batch('SP.POP.TOTL', ['USA', 'XXX'], 2020, 2020)
+
+    assert list(by_country) == ['USA']
+    assert by_country['USA'][0]['value'] == 1
+
+def group_callback(request):
+    # Any request naming the bad indicator fails, as the API does for an unknown code
+    country, indicator = request.path_url.split('?')[0].split('/')[-3::2]
+    if 'BAD.CODE' in indicator:
+        return 400, {}, json.dumps({"error": "Bad Request"})
+    rows = [{'indicator': {'id': indicator, 'value': indicator}, 'countryiso3code': code, 'date': '2020', 'value': 1}
+            for code in country.split(';')]
+    return 200, {}, json.dumps([{'page': 1, 'pages': 1, 'per_page': 3000, 'total': len(rows)}, rows])
+
+@pytest.mark.parametrize("countries", [['USA'], ['USA', 'CHN']])
+@responses.activate
+def test_fetch_indicator_group_falls_back_per_indicator(world_bank_api, countries):
+    responses.add_callback(responses.GET, re.compile(r".*/country/.*/indicator/.*"), callback=group_callback)
+
+    by_indicator = world_bank_api.fetch_indicator_group(['SP.POP.TOTL', 'BAD.CODE'], countries, 2020, 2020, '2')
+
+    assert sorted(row['countryiso3code'] for row in by_indicator['SP.POP.TOTL']) == sorted(countries)
+    assert 'BAD.CODE' not in by_indicator
+
+def test_fetch_indicator_group_async_falls_back_per_indicator():
+    async def handler(request):
+        indicator, countries = request.match_info['indicator'], request.match_info['country'].split(';')
+        if 'BAD.CODE' in indicator:
+            return web.json_response({"error": "Bad Request"}, status=400)
+        return web.json_response([
+            {'page': 1, 'pages': 1, 'per_page': 3000, 'total': len(countries)},
+            [{'indicator': {'id': indicator, 'value': indicator}, 'countryiso3code': code, 'date': '2020', 'value': 1}
+             for code in countries]])
+
+    async def fetch(api):
+        async with api._create_async_session() as session:
+            return await api._fetch_indicator_group_async(session, asyncio.Semaphore(4), ['SP.POP.TOTL', 'BAD.CODE'],
+                                                          ['USA', 'CHN'], 2020, 2020, '2')
+
+    by_indicator = run_against_server(handler, fetch)
+
+    assert sorted(row['countryiso3code'] for row in by_indicator['SP.POP.TOTL']) == ['CHN', 'USA']
+
+@responses.activate
+def test_fetch_all_data_combines_indicators_of_one_source():
+    api = WorldBankAPI('https://api.worldbank.org/v2', combine_indicators=True)
+    for code in ['SP.POP.TOTL', 'NY.GDP.MKTP.CD']:
+        responses.add(responses.GET, f"{api.base_url}/indicator/{code}", json=[
+            {'page': 1, 'pages': 1, 'per_page': 50, 'total': 1},
+            [{'id': code, 'source': {'id': '2', 'value': 'World Development Indicators'}}]
+        ], status=200)
+    combined_url = f"{api.base_url}/country/USA/indicator/SP.POP.TOTL;NY.GDP.MKTP.CD"
+    responses.add(responses.GET, combined_url, json=[
+        {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 2},
+        [{'indicator': {'id': 'SP.POP.TOTL', 'value': 'Population'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 1},
+         {'indicator': {'id': 'NY.GDP.MKTP.CD', 'value': 'GDP'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 2}]
+    ], status=200)
+
+    queries = [('SP.POP.TOTL', ['USA'], 2020, 2020), ('NY.GDP.MKTP.CD', ['USA'], 2020, 2020)]
+    results = api.fetch_all_data(queries)
+
+    data_calls = [call for call in responses.calls if '/country/' in call.request.url]
+    assert len(data_calls) == 1
+    assert 'source=2' in data_calls[0].request.url
+    assert results['SP.POP.TOTL'][0]['value'] == 1
+    assert results['NY.GDP.MKTP.CD'][0]['value'] == 2
+
+def paged_callback(pages):
+    def callback(request):
+        page = int(request.params['page'])
+        body = [{'page': page, 'pages': pages, 'per_page': 2, 'total': 2 * pages},
+                [{'indicator': {'id': 'SP.POP.TOTL', 'value': 'Population'}, 'countryiso3code': 'USA',
+                  'date': str(2000 + page), 'value': page}] * 2]
+        return 200, {}, json.dumps(body)
+    return callback
+
+@responses.activate
+def test_probe_last_updated(world_bank_api):
+    responses.add(responses.GET, "https://api.worldbank.org/v2/country/all/indicator/SP.POP.TOTL",
+                  json=[{"page": 1, "pages": 17000, "per_page": 1, "total": 17000, "lastupdated": "2024-06-28"}, [{}]])
+
+    assert world_bank_api.probe_last_updated("SP.POP.TOTL") == "2024-06-28"
+    assert responses.calls[0].request.params["per_page"] == "1"
+
+@responses.activate
+def test_iter_indicator_pages_yields_in_page_order(world_bank_api):
+    url = f"{world_bank_api.base_url}/country/all/indicator/SP.POP.TOTL"
+    responses.add_callback(responses.GET, url, callback=paged_callback(6))
+
+    pages = list(world_bank_api.iter_indicator_pages('SP.POP.TOTL', 'all', 2001, 2006))
+
+    assert [page[0]['value'] for page in pages] == [1, 2, 3, 4, 5, 6]
+    assert sum(1 for _ in world_bank_api.iter_indicator_records('SP.POP.TOTL', 'all', 2001, 2006)) == 12
+
+@responses.activate
+def test_iter_all_streams_pages_per_indicator(world_bank_api):
+    for indicator in ['SP.POP.TOTL', 'NY.GDP.MKTP.CD']:
+        responses.add_callback(responses.GET, f"{world_bank_api.base_url}/country/all/indicator/{indicator}",
+                               callback=paged_callback(3))
+
+    queries = [('SP.POP.TOTL', ['all'], 2001, 2003), ('NY.GDP.MKTP.CD', ['all'], 2001, 2003)]
+    pages = list(world_bank_api.iter_all(queries))
+
+    assert len(pages) == 6
+    assert sorted({indicator for indicator, _ in pages}) == ['NY.GDP.MKTP.CD', 'SP.POP.TOTL']
+    assert all(len(rows) == 2 for _, rows in pages)
+
+@responses.activate
+def test_iter_all_can_stop_early(world_bank_api):
+    responses.add_callback(responses.GET, f"{world_bank_api.base_url}/country/all/indicator/SP.POP.TOTL",
+                           callback=paged_callback(20))
+
+    stream = world_bank_api.iter_all([('SP.POP.TOTL', ['all'], 2001, 2020)])
+    first = next(stream)
+    stream.close()
+
+    assert first[0] == 'SP.POP.TOTL'
+
+def run_against_server(handler, fetch):
+    async def run():
+        app = web.Application()
+        app.router.add_get('/v2/country/{country}/indicator/{indicator}', handler)
+        async with TestServer(app) as server:
+            api = WorldBankAPI(str(server.make_url('/v2')), max_concurrency=4)
+            return await fetch(api)
+    return asyncio.run(run())
+
+def test_fetch_indicator_data_async_pagination():
+    async def handler(request):
+        page = int(request.query['page'])
+        return web.json_response([
+            {'page': page, 'pages': 2, 'per_page': 1, 'total': 2},
+            [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': str(2018 + page), 'value': page}]
+        ])
+
+    data = run_against_server(handler, lambda api: api.fetch_indicator_data_async('NY.GDP.MKTP.CD', 'USA', 2019, 2020))
+
+    assert [item['date'] for item in data] == ['2019', '2020']
+
+def test_fetch_all_data_async_partial_failure():
+    async def handler(request):
+        if request.match_info['indicator'] == 'INVALID_INDICATOR':
+            return web.json_response({"error": "Not Found"}, status=404)
+        countries = request.match_info['country'].split(';')
+        return web.json_response([
+            {'page': 1, 'pages': 1, 'per_page': 50, 'total': len(countries)},
+            [{'country': {'id': code[:2], 'value': code}, 'countryiso3code': code, 'date': '2020', 'value': 1} for code in countries]
+        ])
+
+    queries = [('NY.GDP.MKTP.CD', ['USA', 'CHN'], 2020, 2020), ('INVALID_INDICATOR', ['USA'], 2020, 2020)]
+    results = run_against_server(handler, lambda api: api.fetch_all_data_async(queries))
+
+    assert list(results) == ['NY.GDP.MKTP.CD']
+    assert sorted(item['countryiso3code'] for item in results['NY.GDP.MKTP.CD']) == ['CHN', 'USA']
+
 if __name__ == '__main__':
     pytest.main(['-n', 'auto', '--dist', 'loadfile'])
\ No newline at end of file
@@ -0,0 +1,72 @@
+import pytest
+import bson
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.bson_columns import COLUMN_PROJECTION, columns_frame, decode_batches
+
+def batch(*documents):
+    return b''.join(bson.encode(document) for document in documents)
+
+@pytest.fixture
+def documents():
+    return [{'country_code': code, 'year': year, 'value': float(year) / 7}
+            for code in ['USA', 'CAN', 'MEX'] for year in range(2000, 2005)]
+
+def test_decode_batches_reads_typed_columns(documents):
+    columns = decode_batches([batch(*documents[:4]), batch(*documents[4:])])
+
+    assert columns['country_code'].tolist() == [document['country_code'] for document in documents]
+    assert columns['year'].dtype == np.int64 and columns['year'].tolist() == [document['year'] for document in documents]
+    np.testing.assert_array_equal(columns['value'], [document['value'] for document in documents])
+    # One str object per distinct code, shared by its rows
+    assert columns['country_code'][0] is columns['country_code'][1]
+
+def test_decode_batches_handles_codes_of_several_lengths(documents):
+    documents[3]['country_code'] = 'XKX1'
+    documents[7]['country_code'] = 'EU'
+
+    columns = decode_batches([batch(*documents)])
+
+    assert columns['country_code'].tolist() == [document['country_code'] for document in documents]
+    np.testing.assert_array_equal(columns['value'], [document['value'] for document in documents])
+
+def test_decode_batches_falls_back_for_irregular_documents(documents):
+    irregular = [{'country_code': 'USA', 'year': 2000, 'value': None},
+                 {'country_code': 'CAN', 'year': 2000, 'value': 3},
+                 {'year': 2000, 'value': 1.0}]
+
+    columns = decode_batches([batch(*documents[:2]), batch(*irregular)])
+
+    assert columns['country_code'].tolist() == ['USA', 'USA', 'USA', 'CAN']
+    np.testing.assert_array_equal(columns['value'], [documents[0]['value'], documents[1]['value'], np.nan, 3.0])
+
+def test_columns_frame_matches_the_document_frame(documents):
+    names = {'USA': 'United States', 'CAN': 'Canada', 'MEX': 'Mexico'}
+    rows = [dict(document, country_name=names[document['country_code']]) for document in documents]
+    expected = pd.DataFrame(rows).set_index(['country_name', 'country_code', 'year'])[['value']]
+    projected = [{field: row[field] for field in COLUMN_PROJECTION if COLUMN_PROJECTION[field]} for row in rows]
+
+    df = columns_frame(decode_batches([batch(*projected)]), names, 'GDP')
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.attrs['indicator_name'] == 'GDP'
+
+def test_columns_frame_of_no_rows():
+    df = columns_frame(decode_batches([]), {})
+
+    assert df.empty and df.index.names == ['country_name', 'country_code', 'year']
+
+def test_decode_batches_reads_empty_codes(documents):
+    documents[1]['country_code'] = ''
+    only_empty = [dict(document, country_code='') for document in documents[:3]]
+
+    columns = decode_batches([batch(*documents), batch(*only_empty)])
+
+    assert columns['country_code'].tolist() == [document['country_code'] for document in documents + only_empty]
+    np.testing.assert_array_equal(columns['value'], [document['value'] for document in documents + only_empty])
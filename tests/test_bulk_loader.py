@@ -0,0 +1,72 @@
+import zipfile
+import pytest
+import pandas as pd
+import responses
+from src.bulk_loader import BulkDataLoader
+from src.data_processor import DataProcessor
+from src.exceptions import DataProcessingError, WorldBankAPIError
+
+CSV = (
+    '"Data Source","World Development Indicators",\n'
+    '\n'
+    '"Last Updated Date","2024-06-28",\n'
+    '\n'
+    '"Country Name","Country Code","Indicator Name","Indicator Code","2018","2019","2020",\n'
+    '"United States","USA","GDP (current US$)","NY.GDP.MKTP.CD","20533057000000","21380976000000","21060474000000",\n'
+    '"Korea, Rep.","KOR","GDP (current US$)","NY.GDP.MKTP.CD","1725373000000","","1644313000000",\n'
+    '"Aruba","ABW","GDP (current US$)","NY.GDP.MKTP.CD","","","",\n'
+)
+
+def make_archive(path, csv_text=CSV):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('Metadata_Country_API_NY.GDP.MKTP.CD_DS2_en_csv_v2.csv', '"Country Code","Region"\n')
+        archive.writestr('API_NY.GDP.MKTP.CD_DS2_en_csv_v2.csv', csv_text)
+    return str(path)
+
+@pytest.fixture
+def archive_path(tmp_path):
+    return make_archive(tmp_path / 'gdp.zip')
+
+def test_read_archive_long_layout(archive_path):
+    df, indicator_name = BulkDataLoader(chunk_size=1).read_archive(archive_path, 'NY.GDP.MKTP.CD')
+
+    assert indicator_name == 'GDP (current US$)'
+    assert list(df.index.names) == ['country_name', 'country_code', 'year']
+    assert len(df) == 5
+    assert df.loc[('Korea, Rep.', 'KOR', 2020), 'value'] == 1644313000000.0
+    assert 'ABW' not in df.index.get_level_values('country_code')
+
+def test_read_archive_matches_data_processor(archive_path):
+    df, _ = BulkDataLoader().read_archive(archive_path, 'NY.GDP.MKTP.CD', 2019, 2020, ['USA'])
+    raw = [{'indicator': {'id': 'NY.GDP.MKTP.CD', 'value': 'GDP (current US$)'},
+            'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA',
+            'date': str(year), 'value': value}
+           for year, value in [(2019, 21380976000000), (2020, 21060474000000)]]
+    expected, _ = DataProcessor.process_world_bank_data(raw, 'NY.GDP.MKTP.CD')
+
+    pd.testing.assert_frame_equal(df.sort_index(), expected.sort_index(), check_index_type=False)
+
+def test_read_archive_without_data_member(tmp_path):
+    path = tmp_path / 'empty.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('Metadata_Indicator.csv', '')
+
+    with pytest.raises(DataProcessingError, match="No data CSV found"):
+        BulkDataLoader().read_archive(str(path), 'NY.GDP.MKTP.CD')
+
+@responses.activate
+def test_load_indicator_downloads_archive(archive_path):
+    with open(archive_path, 'rb') as f:
+        responses.add(responses.GET, 'https://api.worldbank.org/v2/en/indicator/NY.GDP.MKTP.CD', body=f.read(), status=200)
+
+    df, _ = BulkDataLoader().load_indicator('NY.GDP.MKTP.CD', 2020, 2020)
+
+    assert 'downloadformat=csv' in responses.calls[0].request.url
+    assert sorted(df.index.get_level_values('country_code')) == ['KOR', 'USA']
+
+@responses.activate
+def test_load_indicator_download_error():
+    responses.add(responses.GET, 'https://api.worldbank.org/v2/en/indicator/NY.GDP.MKTP.CD', status=500)
+
+    with pytest.raises(WorldBankAPIError, match="Error downloading bulk archive"):
+        BulkDataLoader().load_indicator('NY.GDP.MKTP.CD')
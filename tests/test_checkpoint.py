@@ -0,0 +1,87 @@
+import json
+import pytest
+import responses
+from unittest.mock import Mock
+from src.api import WorldBankAPI
+from src.checkpoint import FileCheckpointJournal, MongoCheckpointJournal, payload_hash
+from src.exceptions import WorldBankAPIError
+
+URL = 'https://api.worldbank.org/v2/country/USA/indicator/SP.POP.TOTL'
+UNIT = ('SP.POP.TOTL', 'USA', '2019:2020', 1)
+
+def make_page(page, pages):
+    return [
+        {'page': page, 'pages': pages, 'per_page': 1, 'total': pages},
+        [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA',
+          'date': str(2018 + page), 'value': page}]
+    ]
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'checkpoints' / 'run.jsonl')
+
+def test_record_and_reload(journal_path):
+    journal = FileCheckpointJournal(journal_path)
+    journal.record(UNIT, make_page(1, 2))
+
+    reloaded = FileCheckpointJournal(journal_path)
+
+    assert len(reloaded) == 1
+    assert reloaded.get(UNIT) == make_page(1, 2)
+    assert reloaded.get(('SP.POP.TOTL', 'USA', '2019:2020', 2)) is None
+    assert reloaded.resumed == 1
+
+def test_torn_line_and_hash_mismatch_are_refetched(journal_path):
+    journal = FileCheckpointJournal(journal_path)
+    journal.record(UNIT, make_page(1, 2))
+    with open(journal_path, 'a') as f:
+        f.write(json.dumps({'unit': 'SP.POP.TOTL|USA|2019:2020|2', 'hash': 'bad', 'data': make_page(2, 2)}) + '\n')
+        f.write('{"unit": "SP.POP.TOTL|USA|2019:2020|3", "ha')
+
+    reloaded = FileCheckpointJournal(journal_path)
+
+    assert len(reloaded) == 2
+    assert reloaded.get(UNIT) == make_page(1, 2)
+    assert reloaded.get(('SP.POP.TOTL', 'USA', '2019:2020', 2)) is None
+
+def test_clear_removes_journal(journal_path):
+    journal = FileCheckpointJournal(journal_path)
+    journal.record(UNIT, make_page(1, 1))
+    journal.clear()
+
+    assert len(FileCheckpointJournal(journal_path)) == 0
+
+def test_mongo_journal_is_namespaced_by_run():
+    collection = Mock()
+    collection.find_one.return_value = {'_id': 'run-1|SP.POP.TOTL|USA|2019:2020|1', 'run_id': 'run-1',
+                                        'hash': payload_hash(make_page(1, 1)), 'data': make_page(1, 1)}
+    journal = MongoCheckpointJournal(collection, run_id='run-1')
+
+    journal.record(UNIT, make_page(1, 1))
+    assert journal.get(UNIT) == make_page(1, 1)
+    journal.clear()
+
+    collection.replace_one.assert_called_once()
+    assert collection.replace_one.call_args[0][0] == {'_id': 'run-1|SP.POP.TOTL|USA|2019:2020|1'}
+    collection.find_one.assert_called_once_with({'_id': 'run-1|SP.POP.TOTL|USA|2019:2020|1'})
+    collection.delete_many.assert_called_once_with({'run_id': 'run-1'})
+
+@responses.activate
+def test_restarted_run_fetches_only_outstanding_pages(journal_path):
+    responses.add(responses.GET, URL, json=make_page(1, 2), match=[responses.matchers.query_param_matcher(
+        {'format': 'json', 'per_page': '3000', 'date': '2019:2020', 'page': '1'})])
+    responses.add(responses.GET, URL, status=404, match=[responses.matchers.query_param_matcher(
+        {'format': 'json', 'per_page': '3000', 'date': '2019:2020', 'page': '2'})])
+    first_run = WorldBankAPI('https://api.worldbank.org/v2', checkpoints=FileCheckpointJournal(journal_path))
+    with pytest.raises(WorldBankAPIError):
+        first_run.fetch_indicator_data('SP.POP.TOTL', 'USA', 2019, 2020)
+
+    responses.reset()
+    responses.add(responses.GET, URL, json=make_page(2, 2))
+    second_run = WorldBankAPI('https://api.worldbank.org/v2', checkpoints=FileCheckpointJournal(journal_path))
+    data = second_run.fetch_indicator_data('SP.POP.TOTL', 'USA', 2019, 2020)
+
+    assert [row['date'] for row in data] == ['2019', '2020']
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.params['page'] == '2'
+    assert second_run.checkpoints.resumed == 1
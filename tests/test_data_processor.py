@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 import numpy as np
-from src.data_processor import DataProcessor
+from src.data_processor import DataProcessor, IncrementalProcessor
 import logging
 
 @pytest.fixture
@@ -132,3 +132,110 @@ def test_process_world_bank_data_error_handling(caplog):
     df, _ = processor.process_world_bank_data(invalid_data, "NY.GDP.MKTP.CD")
     assert df.empty
     assert "No 'country' column found for indicator: NY.GDP.MKTP.CD" in caplog.text
+
+def _pandas_path(raw_data, indicator_code):
+    df = DataProcessor._records_frame(raw_data, indicator_code).set_index(['country_name', 'country_code', 'year'])
+    df['value'] = df['value'].astype('float64')
+    return df
+
+def test_columnar_path_matches_pandas_path_on_full_history():
+    from benchmarks.bench_processor import synthetic_records
+    records = synthetic_records(countries=266, start_year=1960, end_year=2023)
+    assert len(records) >= 16000
+
+    df, _ = DataProcessor.process_world_bank_data(records, "SYN.IND.000")
+
+    pd.testing.assert_frame_equal(df, _pandas_path(records, "SYN.IND.000"), check_exact=True)
+
+def test_columnar_path_matches_pandas_path_on_quirks(sample_data):
+    records = [dict(sample_data[0], date=str(year), value=year) for year in range(2000, 2006)]
+    records[0]['date'] = '2020Q1'
+    records[1]['value'] = '12.5'
+    records[2]['countryiso3code'] = None
+    records[3]['country'] = {'id': 'XX', 'value': None}
+
+    df, _ = DataProcessor.process_world_bank_data(records, "NY.GDP.MKTP.CD")
+
+    pd.testing.assert_frame_equal(df, _pandas_path(records, "NY.GDP.MKTP.CD"), check_exact=True)
+    assert len(df) == 3
+
+@pytest.mark.parametrize("dates", [
+    [2000, 2001, 2002],
+    [2000.0, 2001.0, 2002.5],
+    ['2000', 2001, None],
+    ['2000', 2001.0, '2002'],
+    [np.int64(2000), '2001', 0],
+])
+def test_columnar_path_matches_pandas_path_on_mixed_type_dates(sample_data, dates):
+    records = [dict(sample_data[0], date=date, value=index) for index, date in enumerate(dates)]
+
+    df, _ = DataProcessor.process_world_bank_data(records, "NY.GDP.MKTP.CD")
+
+    pd.testing.assert_frame_equal(df, _pandas_path(records, "NY.GDP.MKTP.CD"), check_exact=True)
+
+def test_compact_frame_keeps_index_and_values(sample_data):
+    df, indicator_name = DataProcessor.process_world_bank_data(sample_data, "NY.GDP.MKTP.CD")
+
+    compact = DataProcessor.compact_frame(df, indicator_name)
+
+    assert compact.attrs['indicator_name'] == "GDP (current US$)"
+    assert isinstance(compact.index.levels[0].dtype, pd.CategoricalDtype)
+    assert compact.index.levels[2].dtype == np.int16
+    assert compact.loc[('United States', 'USA', 2020), 'value'] == 20932750000000.0
+    assert list(compact.index) == list(df.index)
+
+def test_compact_frames_share_categories_and_drop_document_fields():
+    documents = [
+        {'_id': 1, 'country_name': 'United States', 'country_code': 'USA', 'year': 2020, 'value': 1.5,
+         'indicator_name': 'GDP', 'last_updated': None},
+        {'_id': 2, 'country_name': 'Canada', 'country_code': 'CAN', 'year': 2020, 'value': 2.5,
+         'indicator_name': 'GDP', 'last_updated': None},
+    ]
+    frames = {
+        'GDP': pd.DataFrame(documents).set_index(['country_name', 'country_code', 'year']),
+        'POP': pd.DataFrame(documents[:1]).assign(indicator_name='Population').set_index(['country_name', 'country_code', 'year']),
+    }
+
+    compact = DataProcessor.compact_frames(frames, float32=True)
+
+    assert list(compact['GDP'].columns) == ['value']
+    assert compact['GDP'].attrs['indicator_name'] == 'GDP'
+    assert compact['POP'].attrs['indicator_name'] == 'Population'
+    assert compact['GDP'].index.levels[1].dtype == compact['POP'].index.levels[1].dtype
+    assert compact['GDP']['value'].dtype == np.float32
+
+def test_incremental_processor_matches_whole_list():
+    from benchmarks.bench_processor import synthetic_records
+    records = synthetic_records(countries=50, start_year=2000, end_year=2020)
+    incremental = IncrementalProcessor("SYN.IND.000")
+
+    for start in range(0, len(records), 100):
+        assert incremental.add_page(records[start:start + 100]) is None
+    df, indicator_name = incremental.finish()
+
+    expected, expected_name = DataProcessor.process_world_bank_data(records, "SYN.IND.000")
+    pd.testing.assert_frame_equal(df, expected, check_exact=True)
+    assert indicator_name == expected_name
+    assert incremental.rows == len(expected) < len(records)
+
+def test_incremental_processor_keeps_float_years_after_bad_date(sample_data):
+    pages = [[dict(sample_data[0], date='2020Q1')], [sample_data[1]], []]
+    incremental = IncrementalProcessor("NY.GDP.MKTP.CD")
+    for page in pages:
+        incremental.add_page(page)
+
+    df, _ = incremental.finish()
+
+    pd.testing.assert_frame_equal(df, _pandas_path(pages[0] + pages[1], "NY.GDP.MKTP.CD"), check_exact=True)
+    assert df.index.levels[2].dtype == np.float64
+
+def test_incremental_processor_flushes_at_threshold(sample_data):
+    incremental = IncrementalProcessor("NY.GDP.MKTP.CD", flush_rows=2)
+
+    assert incremental.add_page(sample_data[:1]) is None
+    flushed = incremental.add_page(sample_data[1:])
+    rest, indicator_name = incremental.finish()
+
+    assert list(flushed.index.get_level_values('year')) == [2020, 2019]
+    assert rest.empty
+    assert indicator_name == "GDP (current US$)"
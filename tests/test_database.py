@@ -26,36 +26,164 @@ def test_test_connection(db_handler, command_result, expected):
     db_handler.client.admin.command.side_effect = command_result
     assert db_handler.test_connection() == expected
 
-@pytest.mark.parametrize("existing_data,new_data,expected_calls", [
-    (None, {'country_code': 'USA', 'year': 2020, 'value': 100}, 'insert_one'),
-    ({'_id': 1, 'country_code': 'USA', 'year': 2020, 'value': 100}, 
-     {'country_code': 'USA', 'year': 2020, 'value': 100}, None),
-    ({'_id': 1, 'country_code': 'USA', 'year': 2020, 'value': 100}, 
-     {'country_code': 'USA', 'year': 2020, 'value': 110}, 'update_one')
-])
-def test_insert_or_update_indicator_data(db_handler, existing_data, new_data, expected_calls):
+def test_insert_or_update_indicator_data(db_handler):
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.bulk_write.return_value = MagicMock(matched_count=1, modified_count=0, upserted_count=1)
+    data = [{'country_code': 'USA', 'year': 2020, 'value': 100, 'country_name': 'United States'},
+            {'country_code': 'CAN', 'year': 2020, 'value': 50}]
+
+    counts = db_handler.insert_or_update_indicator_data('GDP', 'GDP (current US$)', data)
+
+    assert {key: counts[key] for key in ['matched', 'modified', 'upserted']} == {'matched': 1, 'modified': 0, 'upserted': 1}
+    assert counts['verification']['checked'] == 2
+    mock_collection.find_one.assert_not_called()
+    mock_collection.update_one.assert_not_called()
+    mock_collection.insert_one.assert_not_called()
+    mock_collection.create_index.assert_called_once_with([('country_code', 1), ('year', 1)], unique=True)
+    operations = mock_collection.bulk_write.call_args[0][0]
+    assert mock_collection.bulk_write.call_args[1]['ordered'] is False
+    assert [operation._filter for operation in operations] == [{'country_code': 'USA', 'year': 2020},
+                                                              {'country_code': 'CAN', 'year': 2020}]
+    assert all(operation._upsert for operation in operations)
+    fields = operations[0]._doc[0]['$set']
+    assert fields['value'] == 100 and fields['indicator_name'] == {'$literal': 'GDP (current US$)'}
+    assert fields['country_name'] == {'$literal': 'United States'}
+    # last_updated is kept unless the stored value differs
+    assert fields['last_updated']['$cond'][0] == {'$eq': ['$value', 100]}
+    assert fields['last_updated']['$cond'][1] == '$last_updated'
+    assert 'country_name' not in operations[1]._doc[0]['$set']
+
+def test_upsert_operation_keeps_dollar_names_literal():
+    operation = MongoDBHandler.upsert_operation({'country_code': 'USA', 'year': 2020, 'value': 1.0, 'country_name': '$USA'},
+                                                '$GDP', datetime.now(UTC))
+
+    fields = operation._doc[0]['$set']
+    assert fields['indicator_name'] == {'$literal': '$GDP'}
+    assert fields['country_name'] == {'$literal': '$USA'}
+
+def test_insert_or_update_indicator_data_batches(db_handler):
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.bulk_write.return_value = MagicMock(matched_count=0, modified_count=0, upserted_count=1000)
+    data = [{'country_code': f'C{i:04d}', 'year': 2020, 'value': i} for i in range(2500)]
+
+    db_handler.insert_or_update_indicator_data('GDP', 'GDP', data)
+
+    assert [len(call[0][0]) for call in mock_collection.bulk_write.call_args_list] == [1000, 1000, 500]
+    # Standalone servers reject transactions, so the batches are written without a session
+    db_handler.client.start_session.assert_not_called()
+    assert all('session' not in call[1] for call in mock_collection.bulk_write.call_args_list)
+
+def test_verify_insertion_reports_missing_and_mismatched_rows(db_handler):
     mock_collection = MagicMock()
     db_handler.db.__getitem__.return_value = mock_collection
-    mock_collection.find_one.return_value = existing_data
-
-    db_handler.insert_or_update_indicator_data('GDP', [new_data])
-
-    if expected_calls == 'insert_one':
-        mock_collection.insert_one.assert_called_once()
-        args, _ = mock_collection.insert_one.call_args
-        assert args[0]['country_code'] == new_data['country_code']
-        assert args[0]['year'] == new_data['year']
-        assert args[0]['value'] == new_data['value']
-        assert 'last_updated' in args[0]
-    elif expected_calls == 'update_one':
-        mock_collection.update_one.assert_called_once()
-        args, _ = mock_collection.update_one.call_args
-        assert args[0] == {'_id': 1}
-        assert args[1]['$set']['value'] == new_data['value']
-        assert 'last_updated' in args[1]['$set']
-    else:
-        mock_collection.insert_one.assert_not_called()
-        mock_collection.update_one.assert_not_called()
+    mock_collection.find.return_value = [{'country_code': 'USA', 'year': 2020, 'value': 100.0},
+                                         {'country_code': 'USA', 'year': 2021, 'value': 7.0},
+                                         {'country_code': 'CAN', 'year': 2019, 'value': 1.0}]
+    data = [{'country_code': 'USA', 'year': 2020, 'value': 100.0},
+            {'country_code': 'USA', 'year': 2021, 'value': 110.0},
+            {'country_code': 'CAN', 'year': 2021, 'value': 50.0}]
+
+    report = db_handler.verify_insertion('GDP', data)
+
+    # One projected query for the batch instead of a find_one per row
+    mock_collection.find_one.assert_not_called()
+    query, projection = mock_collection.find.call_args[0]
+    assert query == {'$or': [{'country_code': 'CAN', 'year': {'$in': [2021]}},
+                             {'country_code': 'USA', 'year': {'$in': [2020, 2021]}}]}
+    assert projection == {'_id': 0, 'country_code': 1, 'year': 1, 'value': 1}
+    assert (report['checked'], report['missing'], report['mismatched']) == (3, 1, 1)
+    assert {'country_code': 'USA', 'year': 2021, 'expected': 110.0, 'stored': 7.0} in report['samples']
+    assert {'country_code': 'CAN', 'year': 2021, 'expected': 50.0, 'stored': None} in report['samples']
+
+def test_verify_insertion_samples_large_batches(db_handler):
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find.return_value = []
+    data = [{'country_code': f'C{i:04d}', 'year': 2020, 'value': i} for i in range(2500)]
+
+    report = db_handler.verify_insertion('GDP', data, sample_size=1500)
+
+    assert (report['rows'], report['checked'], report['missing']) == (2500, 1500, 1500)
+    assert mock_collection.find.call_count == 2
+
+def test_verify_insertion_reads_only_the_checked_rows(db_handler):
+    stored = [{'country_code': f'C{country:03d}', 'year': year, 'value': float(year)}
+              for country in range(266) for year in range(1960, 2024)]
+    read = []
+
+    def find(query, projection):
+        keys = {(branch['country_code'], year) for branch in query['$or'] for year in branch['year']['$in']}
+        documents = [doc for doc in stored if (doc['country_code'], doc['year']) in keys]
+        read.extend(documents)
+        return documents
+
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find.side_effect = find
+
+    report = db_handler.verify_insertion('GDP', stored, sample_size=10000)
+
+    assert (report['rows'], report['checked'], report['missing'], report['mismatched']) == (17024, 10000, 0, 0)
+    assert len(read) == 10000
+    # Sorted keys put each country in one batch, or two where a batch ends inside it
+    assert sum(len(call[0][0]['$or']) for call in mock_collection.find.call_args_list) <= 266 + 9
+
+def test_changed_series_compares_stored_digests(db_handler):
+    import pandas as pd
+    from src.series_digest import series_digests
+    df = pd.DataFrame({'country_code': ['USA', 'USA', 'CAN'], 'year': [2020, 2019, 2020], 'value': [1.0, 2.0, 3.0]})
+    digests = series_digests(df)
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find.return_value = [{'country_code': 'USA', 'digest': digests['USA']},
+                                         {'country_code': 'CAN', 'digest': 'stale'}]
+    mock_collection.aggregate.return_value = [{'_id': 'USA', 'rows': 2}]
+
+    changed_df, changed = db_handler.changed_series('GDP', df)
+    db_handler.set_series_digests('GDP', changed)
+
+    assert changed == {'CAN': digests['CAN']}
+    assert changed_df['country_code'].tolist() == ['CAN']
+    mock_collection.find.assert_called_once_with({'indicator': 'GDP', 'layout': 'rows'},
+                                                 {'_id': 0, 'country_code': 1, 'digest': 1})
+    # Only series with a matching digest are counted
+    assert mock_collection.aggregate.call_args[0][0][0] == {'$match': {'country_code': {'$in': ['USA']}}}
+    operation = mock_collection.bulk_write.call_args[0][0][0]
+    assert operation._filter == {'_id': 'rows|GDP|CAN'} and operation._upsert
+
+def test_changed_series_rewrites_series_missing_from_the_target(db_handler):
+    import pandas as pd
+    from src.series_digest import series_digests
+    df = pd.DataFrame({'country_code': ['USA', 'USA', 'CAN'], 'year': [2020, 2019, 2020], 'value': [1.0, 2.0, 3.0]})
+    digests = series_digests(df)
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find.return_value = [{'country_code': code, 'digest': digest} for code, digest in digests.items()]
+    # The collection was rebuilt: CAN is gone and USA lost a year, but the digests are still there
+    mock_collection.aggregate.return_value = [{'_id': 'USA', 'rows': 1}]
+
+    changed_df, changed = db_handler.changed_series('GDP', df)
+
+    assert changed == digests and len(changed_df) == 3
+
+def test_refresh_series_digests_digests_the_stored_series(db_handler):
+    import bson
+    from src.series_digest import series_digests
+    import pandas as pd
+    stored = [{'country_code': 'USA', 'year': year, 'value': float(year)} for year in range(2000, 2021)]
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find_raw_batches.return_value = [b''.join(map(bson.encode, stored))]
+    mock_collection.aggregate.return_value = [{'_id': 'USA', 'country_name': 'United States', 'indicator_name': 'GDP'}]
+
+    # Only 2020 was written, but the digest covers the whole stored series
+    db_handler.refresh_series_digests('GDP', {'USA': 'digest of the 2020 row'})
+
+    assert mock_collection.find_raw_batches.call_args[0][0] == {'country_code': {'$in': ['USA']}}
+    operation = mock_collection.bulk_write.call_args[0][0][0]
+    assert operation._doc['$set']['digest'] == series_digests(pd.DataFrame(stored))['USA']
 
 def test_get_indicator_data(db_handler):
     mock_collection = MagicMock()
@@ -69,6 +197,25 @@ def test_get_indicator_data(db_handler):
     assert result[0]['year'] == 2020
     assert result[0]['value'] == 100
 
+def test_get_indicator_values_reads_raw_batches(db_handler):
+    import bson
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find_raw_batches.return_value = [
+        b''.join(bson.encode({'country_code': code, 'year': 2020, 'value': value}) for code, value in [('USA', 1.0), ('CAN', 2.0)])]
+    mock_collection.aggregate.return_value = [
+        {'_id': 'USA', 'country_name': 'United States', 'indicator_name': 'GDP (current US$)'},
+        {'_id': 'CAN', 'country_name': 'Canada', 'indicator_name': 'GDP (current US$)'}]
+
+    df = db_handler.get_indicator_values('GDP', ['USA', 'CAN'], 2020, 2020)
+
+    query, projection = mock_collection.find_raw_batches.call_args[0]
+    assert query == {'country_code': {'$in': ['USA', 'CAN']}, 'year': {'$gte': 2020, '$lte': 2020}}
+    assert projection == {'_id': 0, 'country_code': 1, 'year': 1, 'value': 1}
+    mock_collection.find.assert_not_called()
+    assert list(df.columns) == ['value'] and df.attrs['indicator_name'] == 'GDP (current US$)'
+    assert df.loc[('Canada', 'CAN', 2020), 'value'] == 2.0
+
 def test_get_missing_data_ranges(db_handler):
     mock_collection = MagicMock()
     db_handler.db.__getitem__.return_value = mock_collection
@@ -105,7 +252,16 @@ def test_get_latest_year(db_handler, find_one_result, expected):
     result = db_handler.get_latest_year('GDP')
     
     assert result == expected
-    mock_collection.find_one.assert_called_with(sort=[('year', -1)])
+    mock_collection.find_one.assert_called_with({}, {'_id': 0, 'year': 1}, sort=[('year', -1)])
+
+def test_get_latest_year_within_countries_and_years(db_handler):
+    mock_collection = MagicMock()
+    db_handler.db.__getitem__.return_value = mock_collection
+    mock_collection.find_one.return_value = {'year': 2019}
+
+    assert db_handler.get_latest_year('GDP', ['USA'], 1960, 2020) == 2019
+    mock_collection.find_one.assert_called_with({'country_code': {'$in': ['USA']}, 'year': {'$gte': 1960, '$lte': 2020}},
+                                                {'_id': 0, 'year': 1}, sort=[('year', -1)])
 
 def test_close_connection(db_handler):
     db_handler.close_connection()
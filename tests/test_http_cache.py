@@ -0,0 +1,80 @@
+import os
+import pytest
+import responses
+from src.api import WorldBankAPI
+from src.http_cache import ResponseCache
+
+URL = 'https://api.worldbank.org/v2/country/USA/indicator/SP.POP.TOTL'
+PAGE = [
+    {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 1},
+    [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 331}]
+]
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path))
+
+def test_store_and_lookup(cache):
+    cache.store(URL, {'page': 1, 'format': 'json'}, PAGE, etag='"abc"')
+
+    entry = cache.lookup(URL, {'format': 'json', 'page': 1})
+
+    assert entry['data'] == PAGE
+    assert cache.is_fresh(entry)
+    assert cache.revalidation_headers(entry) == {'If-None-Match': '"abc"'}
+    assert cache.lookup(URL, {'format': 'json', 'page': 2}) is None
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    cache.store(URL, {'page': 1}, PAGE)
+
+    assert not cache.is_fresh(cache.lookup(URL, {'page': 1}))
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size_bytes=1200)
+    for page in range(1, 4):
+        cache.store(URL, {'page': page}, PAGE)
+        os.utime(cache._path(cache.make_key(URL, {'page': page})), (page, page))
+    cache.lookup(URL, {'page': 1})  # page 1 becomes the most recently used
+
+    cache.store(URL, {'page': 4}, PAGE)
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.size_bytes <= 1200
+    assert cache.lookup(URL, {'page': 2}) is None
+    assert all(cache.lookup(URL, {'page': page}) is not None for page in (1, 3, 4))
+
+def test_cache_survives_new_instance(tmp_path):
+    ResponseCache(str(tmp_path)).store(URL, {'page': 1}, PAGE)
+
+    reopened = ResponseCache(str(tmp_path))
+
+    assert reopened.lookup(URL, {'page': 1})['data'] == PAGE
+    assert reopened.size_bytes > 0
+
+@responses.activate
+def test_api_serves_repeat_requests_from_cache(cache):
+    responses.add(responses.GET, URL, json=PAGE, status=200)
+    api = WorldBankAPI('https://api.worldbank.org/v2', cache=cache)
+
+    first = api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+    second = WorldBankAPI('https://api.worldbank.org/v2', cache=cache).fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+
+    assert first == second
+    assert len(responses.calls) == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+@responses.activate
+def test_api_revalidates_stale_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    responses.add(responses.GET, URL, json=PAGE, status=200, headers={'ETag': '"v1"'})
+    responses.add(responses.GET, URL, status=304)
+    api = WorldBankAPI('https://api.worldbank.org/v2', cache=cache)
+
+    api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+    data = api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+
+    assert data == PAGE[1]
+    assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+    assert cache.stats()['revalidations'] == 1
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_processor import DataProcessor
+from src.panel import IndicatorPanel
+from src.dashboard import cross_section
+
+def make_frame(rows):
+    df = pd.DataFrame(rows, columns=['country_name', 'country_code', 'year', 'value'])
+    return df.set_index(['country_name', 'country_code', 'year'])
+
+@pytest.fixture
+def frames():
+    return {
+        'NY.GDP.MKTP.CD': make_frame([('United States', 'USA', 2020, 20.9), ('United States', 'USA', 2019, 21.4),
+                                      ('Canada', 'CAN', 2020, 1.6)]),
+        'SP.POP.TOTL': make_frame([('United States', 'USA', 2018, 327.0), ('Japan', 'JPN', 2020, 126.0)]),
+    }
+
+def test_from_frames_builds_dense_cube(frames):
+    panel = IndicatorPanel.from_frames(frames, {'SP.POP.TOTL': 'Population, total'})
+
+    assert panel.shape == (2, 3, 3)
+    assert panel.country_codes == ['CAN', 'JPN', 'USA']
+    assert list(panel.years) == [2018, 2019, 2020]
+    assert panel.value('NY.GDP.MKTP.CD', 'USA', 2019) == 21.4
+    assert panel.value('SP.POP.TOTL', 'Japan', 2020) == 126.0
+    assert np.isnan(panel.value('SP.POP.TOTL', 'CAN', 2020))
+    assert np.count_nonzero(~np.isnan(panel.values)) == 5
+
+def test_round_trip_is_lossless(frames):
+    panel = IndicatorPanel.from_frames(frames)
+
+    restored = panel.to_frames()
+
+    assert list(restored) == list(frames)
+    for code, df in frames.items():
+        pd.testing.assert_frame_equal(restored[code].sort_index(), df.sort_index())
+
+def test_round_trip_of_compact_frames_keeps_names_and_float32(frames):
+    compact = DataProcessor.compact_frames(frames, {'NY.GDP.MKTP.CD': 'GDP', 'SP.POP.TOTL': 'Population'}, float32=True)
+
+    panel = IndicatorPanel.from_frames(compact)
+    restored = panel.to_frames()
+
+    assert panel.values.dtype == np.float32
+    assert restored['SP.POP.TOTL'].attrs['indicator_name'] == 'Population'
+    assert restored['NY.GDP.MKTP.CD']['value'].dtype == np.float32
+    assert sorted(restored['NY.GDP.MKTP.CD'].index) == sorted(frames['NY.GDP.MKTP.CD'].index)
+
+def test_slices_are_views(frames):
+    panel = IndicatorPanel.from_frames(frames)
+
+    assert panel.indicator('SP.POP.TOTL').shape == (3, 3)
+    assert panel.year(2020).shape == (2, 3)
+    assert np.shares_memory(panel.indicator('SP.POP.TOTL'), panel.values)
+    assert np.shares_memory(panel.year(2020), panel.values)
+    with pytest.raises(KeyError):
+        panel.year(2021)
+
+def test_select_and_latest_year(frames):
+    panel = IndicatorPanel.from_frames(frames)
+
+    sub = panel.select(['NY.GDP.MKTP.CD'], ['USA', 'Canada', 'Unknown'], 2019, 2020)
+
+    assert sub.shape == (1, 2, 2)
+    assert sub.country_codes == ['USA', 'CAN']
+    assert panel.latest_year(['NY.GDP.MKTP.CD', 'SP.POP.TOTL']) is None
+    assert panel.latest_year(['SP.POP.TOTL'], ['USA']) == 2018
+    assert panel.latest_year(['NY.GDP.MKTP.CD'], ['USA', 'CAN']) == 2020
+
+def test_cross_section_matches_frame_merge(frames):
+    frames['SP.POP.TOTL'] = make_frame([('United States', 'USA', 2020, 329.5), ('Canada', 'CAN', 2019, 37.6)])
+    panel = IndicatorPanel.from_frames(frames)
+
+    df = cross_section(panel, ['NY.GDP.MKTP.CD', 'SP.POP.TOTL'], ['United States', 'Canada'], 2020)
+    merged = pd.merge(frames['NY.GDP.MKTP.CD'].reset_index(), frames['SP.POP.TOTL'].reset_index(),
+                      on=['country_name', 'country_code', 'year'])
+
+    assert df[['country_code', 'NY.GDP.MKTP.CD', 'SP.POP.TOTL']].values.tolist() == \
+        merged[['country_code', 'value_x', 'value_y']].values.tolist()
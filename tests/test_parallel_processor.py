@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+import pandas as pd
+import pytest
+from benchmarks.bench_processor import synthetic_records
+from src.data_processor import DataProcessor
+from src.parallel_processor import ParallelProcessor, _FORK_INPUTS
+
+CODES = ['SYN.IND.000', 'SYN.IND.001', 'SYN.IND.002']
+
+@pytest.fixture(scope='module')
+def raw_data():
+    return {code: synthetic_records(countries=20, start_year=2000, end_year=2010, indicator_code=code) for code in CODES}
+
+def shared_memory_blocks():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_matches_serial_processing(raw_data, start_method):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{start_method} is not available")
+    before = shared_memory_blocks()
+
+    results = ParallelProcessor(2, multiprocessing.get_context(start_method)).process_all(raw_data)
+
+    assert list(results) == CODES
+    for code in CODES:
+        expected, expected_name = DataProcessor.process_world_bank_data(raw_data[code], code)
+        df, indicator_name = results[code]
+        pd.testing.assert_frame_equal(df, expected, check_exact=True)
+        assert indicator_name == expected_name
+    assert shared_memory_blocks() == before
+    assert not _FORK_INPUTS
+
+def test_empty_results_are_returned_as_frames():
+    results = ParallelProcessor(2).process_all({'SP.POP.TOTL': [{'invalid': 'data'}], 'NY.GDP.MKTP.CD': []})
+
+    assert results['SP.POP.TOTL'][0].empty
+    assert results['NY.GDP.MKTP.CD'][1] == 'NY.GDP.MKTP.CD'
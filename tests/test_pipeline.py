@@ -6,6 +6,7 @@ from src.pipeline import WorldBankDataPipeline, get_world_bank_data
 from src.api import WorldBankAPI
 from src.data_processor import DataProcessor
 from src.database import MongoDBHandler
+from src.bulk_loader import BulkDataLoader
 from src.exceptions import WorldBankAPIError, DataProcessingError
 
 @pytest.fixture
@@ -39,6 +40,13 @@ def mock_processor():
     )
     return processor
 
+def values_frame(rows=(), indicator_name=None):
+    df = pd.DataFrame(list(rows), columns=['country_name', 'country_code', 'year', 'value']).set_index(
+        ['country_name', 'country_code', 'year'])
+    if indicator_name is not None:
+        df.attrs['indicator_name'] = indicator_name
+    return df
+
 @pytest.fixture
 def mock_db_handler():
     db_handler = Mock(spec=MongoDBHandler)
@@ -47,6 +55,7 @@ def mock_db_handler():
     db_handler.get_indicator_data.return_value = [
         {'country_name': 'United States', 'country_code': 'USA', 'year': 2020, 'value': 20932750000000}
     ]
+    db_handler.get_indicator_values.return_value = values_frame([('United States', 'USA', 2020, 20932750000000.0)])
     return db_handler
 
 @pytest.fixture
@@ -89,6 +98,171 @@ def test_get_all_data(pipeline):
     assert isinstance(result['NY.GDP.MKTP.CD'], pd.DataFrame)
     pipeline.db_handler.get_indicator_data.assert_called_once_with('NY.GDP.MKTP.CD', ['USA'], 2020, 2020)
 
+def test_fetch_all_indicators_streaming(mock_processor, mock_db_handler):
+    page = [{"indicator": {"id": "NY.GDP.MKTP.CD", "value": "GDP (current US$)"}, "countryiso3code": "USA", "date": "2020"}]
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.iter_all.return_value = iter([('NY.GDP.MKTP.CD', page), ('NY.GDP.MKTP.CD', page)])
+    mock_db_handler.get_indicator_values.return_value = values_frame()
+    mock_processor.process_world_bank_data.return_value = (
+        values_frame([('United States', 'USA', 2020, 20932750000000.0)]), "GDP (current US$)")
+    pipeline = WorldBankDataPipeline(mock_api, mock_processor, mock_db_handler, streaming=True)
+
+    result = pipeline.fetch_all_indicators(['NY.GDP.MKTP.CD'], ['USA'], 2020, 2020)
+
+    mock_api.fetch_all_data.assert_not_called()
+    assert mock_processor.process_world_bank_data.call_count == 2
+    assert mock_db_handler.insert_or_update_indicator_data.call_count == 2
+    assert len(result['NY.GDP.MKTP.CD']) == 2
+    assert pipeline.indicator_mapping['NY.GDP.MKTP.CD'] == "GDP (current US$)"
+
+def test_fetch_all_indicators_streaming_flush_rows(mock_db_handler):
+    from benchmarks.bench_processor import synthetic_records
+    records = synthetic_records(5, 2016, 2020, 'SYN.IND.000')
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.iter_all.return_value = iter([('SYN.IND.000', records[i:i + 5]) for i in range(0, len(records), 5)])
+    mock_db_handler.get_indicator_values.return_value = values_frame()
+    pipeline = WorldBankDataPipeline(mock_api, DataProcessor(), mock_db_handler, streaming=True, flush_rows=10)
+
+    result = pipeline.fetch_all_indicators(['SYN.IND.000'], ['all'], 2016, 2020)
+
+    expected = DataProcessor.process_world_bank_data(records, 'SYN.IND.000')[0]
+    # Five pages are written in batches of at least 10 rows, with the rest at the end
+    written = [len(call[0][2]) for call in mock_db_handler.insert_or_update_indicator_data.call_args_list]
+    assert len(written) < 5 and min(written[:-1]) >= 10 and sum(written) == len(expected)
+    pd.testing.assert_frame_equal(result['SYN.IND.000'], expected)
+
+def test_store_processed_data_diff_series(mock_db_handler):
+    df = pd.DataFrame({'value': [1.0, 2.0]}, index=pd.MultiIndex.from_tuples(
+        [('United States', 'USA', 2020), ('Canada', 'CAN', 2020)], names=['country_name', 'country_code', 'year']))
+    mock_db_handler.changed_series.side_effect = [(df.iloc[:1], {'USA': 'new'}), (df.iloc[:0], {})]
+    pipeline = WorldBankDataPipeline(Mock(spec=WorldBankAPI), DataProcessor(), mock_db_handler, diff_series=True)
+
+    pipeline.store_processed_data('GDP', 'GDP (current US$)', df)
+    pipeline.store_processed_data('GDP', 'GDP (current US$)', df)
+
+    # The second refresh finds every series unchanged and writes nothing
+    mock_db_handler.insert_or_update_indicator_data.assert_called_once()
+    assert len(mock_db_handler.insert_or_update_indicator_data.call_args[0][2]) == 1
+    mock_db_handler.refresh_series_digests.assert_called_once_with('GDP', {'USA': 'new'})
+    assert pipeline.indicator_mapping['GDP'] == 'GDP (current US$)'
+
+def test_store_processed_data_diff_series_with_no_valid_rows(mock_db_handler):
+    df = pd.DataFrame({'value': [1.0]}, index=pd.MultiIndex.from_tuples(
+        [('United States', 'USA', 1800)], names=['country_name', 'country_code', 'year']))
+    pipeline = WorldBankDataPipeline(Mock(spec=WorldBankAPI), DataProcessor(), mock_db_handler, diff_series=True)
+    pipeline.upstream_versions['GDP'] = '2024-06-01'
+
+    pipeline.store_processed_data('GDP', 'GDP (current US$)', df)
+    pipeline.record_freshness(pipeline.stored_indicators)
+
+    # A rejected batch is neither compared with the stored series nor marked fresh
+    mock_db_handler.changed_series.assert_not_called()
+    mock_db_handler.insert_or_update_indicator_data.assert_not_called()
+    mock_db_handler.set_last_updated.assert_not_called()
+    assert 'GDP' not in pipeline.stored_indicators
+
+def test_get_all_data_compact_reads_values_only(mock_db_handler):
+    df = pd.DataFrame({'value': [1.0, 2.0]}, index=pd.MultiIndex.from_tuples(
+        [('United States', 'USA', 2020), ('Canada', 'CAN', 2020)], names=['country_name', 'country_code', 'year']))
+    df.attrs['indicator_name'] = 'GDP (current US$)'
+    mock_db_handler.get_indicator_values.return_value = df
+    pipeline = WorldBankDataPipeline(Mock(spec=WorldBankAPI), DataProcessor(), mock_db_handler, compact=True)
+
+    result = pipeline.get_all_data(['GDP'], ['USA', 'CAN'], 2020, 2020)
+    panel = pipeline.get_panel(['GDP'], ['USA', 'CAN'], 2020, 2020)
+
+    mock_db_handler.get_indicator_data.assert_not_called()
+    assert result['GDP'].attrs['indicator_name'] == 'GDP (current US$)'
+    assert panel.value('GDP', 'CAN', 2020) == 2.0
+
+def test_fetch_all_indicators_bulk_first_load(mock_processor, mock_db_handler):
+    bulk_df = pd.DataFrame({'value': [1.0]}, index=pd.MultiIndex.from_tuples(
+        [('United States', 'USA', 2020)], names=['country_name', 'country_code', 'year']))
+    bulk_loader = Mock(spec=BulkDataLoader)
+    bulk_loader.load_indicator.side_effect = [(bulk_df, "GDP (current US$)"), DataProcessingError("Bad archive")]
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.fetch_all_data.return_value = {}
+    mock_db_handler.get_indicator_values.return_value = values_frame()
+    pipeline = WorldBankDataPipeline(mock_api, mock_processor, mock_db_handler, bulk_loader=bulk_loader)
+
+    result = pipeline.fetch_all_indicators(['NY.GDP.MKTP.CD', 'SP.POP.TOTL'], ['all'], 1960, 2020)
+
+    assert result['NY.GDP.MKTP.CD'] is bulk_df
+    mock_db_handler.insert_or_update_indicator_data.assert_called_once()
+    # The indicator whose archive failed is fetched through the API instead
+    mock_api.fetch_all_data.assert_called_once_with([('SP.POP.TOTL', ['all'], 1960, 2020)])
+
+def population_processor():
+    processor = Mock(spec=DataProcessor)
+    processor.process_world_bank_data.return_value = (
+        pd.DataFrame({'value': [331.5]}, index=pd.MultiIndex.from_tuples(
+            [('United States', 'USA', 2021)], names=['country_name', 'country_code', 'year'])),
+        "Population, total")
+    return processor
+
+def test_fetch_all_indicators_skips_unchanged(mock_db_handler):
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.probe_last_updated.side_effect = lambda code: {'NY.GDP.MKTP.CD': '2024-06-28', 'SP.POP.TOTL': '2024-07-01'}[code]
+    mock_api.fetch_all_data.return_value = {'SP.POP.TOTL': [{"countryiso3code": "USA", "date": "2021"}]}
+    mock_db_handler.get_last_updated.side_effect = lambda code: '2024-06-28'
+    mock_db_handler.get_indicator_values.return_value = values_frame([('United States', 'USA', 2020, 1.0)], 'GDP (current US$)')
+    pipeline = WorldBankDataPipeline(mock_api, population_processor(), mock_db_handler, skip_unchanged=True)
+
+    pipeline.fetch_all_indicators(['NY.GDP.MKTP.CD', 'SP.POP.TOTL'], ['USA'], 2020, 2030)
+
+    # Only the indicator whose lastupdated moved is fetched, and its new date is remembered
+    fetched_codes = [query[0] for query in mock_api.fetch_all_data.call_args[0][0]]
+    assert fetched_codes == ['SP.POP.TOTL']
+    mock_db_handler.set_last_updated.assert_called_once_with('SP.POP.TOTL', '2024-07-01')
+    # The skipped indicator is still named, from its stored rows
+    assert pipeline.indicator_mapping == {'NY.GDP.MKTP.CD': 'GDP (current US$)', 'SP.POP.TOTL': 'Population, total'}
+
+def test_fetch_all_indicators_records_freshness_only_for_stored_rows(mock_db_handler):
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.probe_last_updated.return_value = '2024-07-01'
+    mock_api.fetch_all_data.return_value = {'NY.GDP.MKTP.CD': [], 'SP.POP.TOTL': [{"countryiso3code": "USA", "date": "2021"}]}
+    mock_db_handler.get_last_updated.return_value = '2024-06-28'
+    mock_db_handler.get_indicator_values.side_effect = lambda code, *args: values_frame(
+        [] if code == 'NEW.CODE' else [('United States', 'USA', 2020, 1.0)])
+    pipeline = WorldBankDataPipeline(mock_api, population_processor(), mock_db_handler, skip_unchanged=True)
+
+    pipeline.fetch_all_indicators(['NY.GDP.MKTP.CD', 'SP.POP.TOTL', 'NEW.CODE'], ['USA'], 2020, 2030)
+
+    # An indicator whose fetch came back empty is probed again next run instead of skipped for good
+    mock_db_handler.set_last_updated.assert_called_once_with('SP.POP.TOTL', '2024-07-01')
+    # First loads are not probed
+    assert [call[0][0] for call in mock_api.probe_last_updated.call_args_list] == ['NY.GDP.MKTP.CD', 'SP.POP.TOTL']
+
+def test_fetch_all_indicators_reads_stored_values_only(mock_db_handler):
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.fetch_all_data.return_value = {'SP.POP.TOTL': [{"countryiso3code": "USA", "date": "2021"}]}
+    mock_db_handler.get_indicator_values.return_value = values_frame([('United States', 'USA', 2020, 1.0)], 'Population, total')
+    mock_db_handler.get_latest_year.return_value = 2020
+    pipeline = WorldBankDataPipeline(mock_api, population_processor(), mock_db_handler)
+
+    result = pipeline.fetch_all_indicators(['SP.POP.TOTL'], ['USA'], 2000, 2021)
+
+    # No unprojected read: the frame comes from the column read and the start year from the latest stored year
+    mock_db_handler.get_indicator_data.assert_not_called()
+    mock_db_handler.get_latest_year.assert_called_once_with('SP.POP.TOTL', ['USA'], 2000, 2021)
+    assert mock_api.fetch_all_data.call_args[0][0] == [('SP.POP.TOTL', ['USA'], 2021, 2021)]
+    assert list(result['SP.POP.TOTL'].columns) == ['value'] and len(result['SP.POP.TOTL']) == 2
+
+def test_fetch_all_indicators_process_workers(mock_db_handler):
+    from benchmarks.bench_processor import synthetic_records
+    raw_data = {code: synthetic_records(5, 2019, 2020, code) for code in ['SYN.IND.000', 'SYN.IND.001']}
+    mock_api = Mock(spec=WorldBankAPI)
+    mock_api.fetch_all_data.return_value = dict(raw_data, **{'SP.POP.TOTL': []})
+    mock_db_handler.get_indicator_values.return_value = values_frame()
+    pipeline = WorldBankDataPipeline(mock_api, DataProcessor(), mock_db_handler, process_workers=2)
+
+    result = pipeline.fetch_all_indicators(list(raw_data) + ['SP.POP.TOTL'], ['all'], 2019, 2020)
+
+    assert sorted(result) == ['SYN.IND.000', 'SYN.IND.001']
+    for code, records in raw_data.items():
+        pd.testing.assert_frame_equal(result[code], DataProcessor.process_world_bank_data(records, code)[0])
+    assert mock_db_handler.insert_or_update_indicator_data.call_count == 2
+
 @patch('src.pipeline.WorldBankAPI')
 @patch('src.pipeline.DataProcessor')
 @patch('src.pipeline.MongoDBHandler')
@@ -100,6 +274,8 @@ def test_get_world_bank_data(mock_db_handler_class, mock_processor_class, mock_a
     mock_db_handler.get_indicator_data.return_value = [
         {'country_name': 'United States', 'country_code': 'USA', 'year': 2020, 'value': 20932750000000}
     ]
+    mock_db_handler.get_indicator_values.return_value = values_frame([('United States', 'USA', 2020, 20932750000000.0)])
+    mock_db_handler.get_latest_year.return_value = 2020
     
     results, indicator_mapping = get_world_bank_data(['NY.GDP.MKTP.CD'], ['USA'], 2020, 2020)
     
@@ -120,11 +296,11 @@ def test_get_world_bank_data_default_end_year():
         
         mock_datetime.now.return_value.year = 2023
         mock_db_handler = mock_db_handler_class.return_value
-        mock_db_handler.get_indicator_data.return_value = []
+        mock_db_handler.get_indicator_values.return_value = values_frame()
         
         get_world_bank_data(['NY.GDP.MKTP.CD'], ['USA'])
         
-        mock_db_handler.get_indicator_data.assert_called_once_with('NY.GDP.MKTP.CD', ['USA'], 1960, 2023)
+        mock_db_handler.get_indicator_values.assert_called_once_with('NY.GDP.MKTP.CD', ['USA'], 1960, 2023)
 
 @patch('src.pipeline.logger')
 def test_fetch_all_indicators_error_handling(mock_logger, pipeline):
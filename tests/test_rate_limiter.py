@@ -0,0 +1,97 @@
+import threading
+import time
+import pytest
+import responses
+from src.api import WorldBankAPI
+from src.rate_limiter import RateLimiter, parse_retry_after
+
+def test_parse_retry_after():
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('not a date') is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+def test_success_increases_rate_and_concurrency():
+    limiter = RateLimiter(rate=10.0, max_concurrency=4)
+    limiter.concurrency_limit = 2.0
+
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release(200)
+
+    stats = limiter.stats()
+    assert stats['rate'] > 10.0
+    assert stats['concurrency_limit'] == 4
+    assert stats['requests'] == 8
+    assert stats['in_flight'] == 0
+
+def test_throttle_halves_rate_and_pauses_all_workers():
+    limiter = RateLimiter(rate=10.0, max_concurrency=8)
+    limiter.acquire()
+
+    limiter.release(429, retry_after='0.2')
+
+    stats = limiter.stats()
+    assert stats['throttle_events'] == 1
+    assert stats['rate'] == 5.0
+    assert stats['concurrency_limit'] == 4
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.15
+
+def test_failures_in_one_burst_decrease_once():
+    limiter = RateLimiter(rate=16.0, max_concurrency=8)
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(503)
+
+    assert limiter.stats()['rate'] == 8.0
+
+def test_concurrency_limit_blocks_until_release():
+    limiter = RateLimiter(rate=100.0, max_concurrency=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    worker = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    worker.start()
+    assert not acquired.wait(0.1)
+
+    limiter.release(200)
+    assert acquired.wait(1.0)
+    worker.join()
+
+@responses.activate
+def test_api_retries_after_throttling():
+    url = 'https://api.worldbank.org/v2/country/USA/indicator/SP.POP.TOTL'
+    responses.add(responses.GET, url, status=429, headers={'Retry-After': '0'})
+    responses.add(responses.GET, url, json=[
+        {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 1},
+        [{'countryiso3code': 'USA', 'date': '2020', 'value': 331}]
+    ], status=200)
+    api = WorldBankAPI('https://api.worldbank.org/v2')
+
+    data = api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+
+    assert data[0]['value'] == 331
+    assert api.rate_limiter.stats()['throttle_events'] == 1
+
+def test_uncompleted_requests_leave_the_rate_unchanged():
+    limiter = RateLimiter(rate=10.0, max_concurrency=4)
+    limiter.acquire()
+    limiter.release(0)
+
+    assert limiter.stats()['rate'] == 10.0
+
+@responses.activate
+def test_failed_requests_of_any_kind_slow_the_limiter():
+    from requests.exceptions import ChunkedEncodingError
+    url = 'https://api.worldbank.org/v2/country/USA/indicator/SP.POP.TOTL'
+    responses.add(responses.GET, url, body=ChunkedEncodingError("Connection broken"))
+    api = WorldBankAPI('https://api.worldbank.org/v2')
+    rate = api.rate_limiter.stats()['rate']
+
+    with pytest.raises(ChunkedEncodingError):
+        api._send(url, {'format': 'json'}, {})
+
+    assert api.rate_limiter.stats()['rate'] < rate
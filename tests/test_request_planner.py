@@ -0,0 +1,69 @@
+from src.request_planner import (plan_country_batches, plan_indicator_groups, plan_year_shards,
+                                 split_rows_by_country, split_rows_by_indicator)
+
+def test_plan_country_batches_respects_page_budget():
+    countries = [f"C{i:02d}" for i in range(10)]
+    batches = plan_country_batches(countries, 2000, 2009, per_page=30)
+
+    assert batches == [countries[0:3], countries[3:6], countries[6:9], countries[9:]]
+
+def test_plan_country_batches_respects_url_budget():
+    countries = ['USA', 'CHN', 'JPN', 'DEU']
+    batches = plan_country_batches(countries, 2020, 2020, url_prefix_length=90, max_url_length=100)
+
+    # 'USA;CHN' fits in 10 characters, a third code does not
+    assert batches == [['USA', 'CHN'], ['JPN', 'DEU']]
+    assert all(90 + len(';'.join(batch)) <= 100 for batch in batches)
+
+def test_plan_country_batches_keeps_all_separate():
+    assert plan_country_batches(['all'], 1960, 2023) == [['all']]
+    assert plan_country_batches(['USA', 'all', 'CHN'], 2020, 2020) == [['all'], ['USA', 'CHN']]
+
+def test_plan_country_batches_counts_combined_indicators():
+    countries = ['USA', 'CHN', 'JPN', 'DEU']
+    assert plan_country_batches(countries, 2000, 2009, per_page=40, indicator_count=2) == [['USA', 'CHN'], ['JPN', 'DEU']]
+
+def test_plan_year_shards_cover_range_without_overlap():
+    shards = plan_year_shards(1960, 2023, rows_per_year=266)
+
+    assert shards[0] == (1960, 1970)
+    assert shards[-1] == (2015, 2023)
+    years = [year for shard_start, shard_end in shards for year in range(shard_start, shard_end + 1)]
+    assert years == list(range(1960, 2024))
+
+def test_plan_year_shards_small_range_is_one_shard():
+    assert plan_year_shards(2020, 2023, rows_per_year=3) == [(2020, 2023)]
+    assert plan_year_shards(2020, 2021, rows_per_year=5000) == [(2020, 2020), (2021, 2021)]
+
+def test_plan_indicator_groups_by_source():
+    sources = {'A': '2', 'B': '2', 'C': '3', 'D': '2', 'E': None}
+    groups = plan_indicator_groups(['A', 'B', 'C', 'D', 'E', 'B'], sources, max_indicators=2)
+
+    assert groups == [(['E'], None), (['A', 'B'], '2'), (['D'], None), (['C'], None)]
+
+def test_split_rows_by_country_matches_iso2_and_iso3():
+    rows = [
+        {'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': '2020'},
+        {'country': {'id': 'CN', 'value': 'China'}, 'countryiso3code': 'CHN', 'date': '2020'},
+        {'country': {'id': 'JP', 'value': 'Japan'}, 'countryiso3code': 'JPN', 'date': '2020'},
+    ]
+
+    by_country = split_rows_by_country(rows, ['USA', 'cn', 'DEU'])
+
+    assert [row['date'] for row in by_country['USA']] == ['2020']
+    assert by_country['cn'][0]['countryiso3code'] == 'CHN'
+    assert by_country['DEU'] == []
+    assert by_country['JPN'][0]['countryiso3code'] == 'JPN'
+
+def test_split_rows_by_indicator():
+    rows = [
+        {'indicator': {'id': 'SP.POP.TOTL', 'value': 'Population'}, 'countryiso3code': 'USA'},
+        {'indicator': {'id': 'NY.GDP.MKTP.CD', 'value': 'GDP'}, 'countryiso3code': 'USA'},
+        {'countryiso3code': 'USA'},
+    ]
+
+    by_indicator = split_rows_by_indicator(rows, ['SP.POP.TOTL', 'NY.GDP.MKTP.CD', 'EN.ATM.CO2E.KT'])
+
+    assert len(by_indicator['SP.POP.TOTL']) == 1
+    assert len(by_indicator['NY.GDP.MKTP.CD']) == 1
+    assert by_indicator['EN.ATM.CO2E.KT'] == []
@@ -0,0 +1,118 @@
+import asyncio
+import time
+import pytest
+import responses
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.api import WorldBankAPI
+from src.exceptions import CircuitOpenError
+from src.resilience import CircuitBreaker, LatencyHistogram
+
+URL = 'https://api.worldbank.org/v2/country/USA/indicator/SP.POP.TOTL'
+PAGE = [
+    {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 1},
+    [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 331}]
+]
+
+def warm_up(api, seconds=0.01, samples=20):
+    for _ in range(samples):
+        api.latency.record(seconds)
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(95) is None
+    for _ in range(95):
+        histogram.record(0.01)
+    for _ in range(5):
+        histogram.record(2.0)
+
+    assert 0.01 <= histogram.percentile(50) < 0.02
+    assert histogram.percentile(95) < 0.02
+    assert histogram.percentile(99) >= 2.0
+    stats = histogram.stats()
+    assert stats['count'] == 100
+    assert sum(stats['buckets'].values()) == 100
+
+def test_circuit_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure('api')
+    breaker.before_request('api')
+    breaker.record_failure('api')
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('api')
+    breaker.before_request('other-host')
+
+    time.sleep(0.06)
+    breaker.before_request('api')  # the single trial request
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('api')
+    breaker.record_success('api')
+
+    breaker.before_request('api')
+    assert breaker.stats() == {'open_circuits': 0, 'opened': 1, 'rejected': 2}
+
+@responses.activate
+def test_circuit_breaker_fails_fast_when_api_is_down():
+    responses.add(responses.GET, URL, status=503)
+    api = WorldBankAPI('https://api.worldbank.org/v2', max_workers=1, max_retries=1, retry_backoff_factor=0,
+                       circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    codes = ['SP.POP.TOTL', 'NY.GDP.MKTP.CD', 'EN.ATM.CO2E.KT']
+    for code in codes[1:]:
+        responses.add(responses.GET, URL.replace('SP.POP.TOTL', code), status=503)
+
+    results = api.fetch_all_data([(code, ['USA'], 2020, 2020) for code in codes])
+
+    assert results == {}
+    assert api.circuit_breaker.is_open('api.worldbank.org')
+    # Requests stop once the circuit opens: two tries reached the API (with one urllib3 retry each)
+    assert len(responses.calls) == 4
+
+@responses.activate
+def test_slow_request_is_hedged():
+    calls = []
+
+    def callback(request):
+        calls.append(time.perf_counter())
+        if len(calls) == 1:
+            time.sleep(0.5)
+        return 200, {}, '[{"page": 1, "pages": 1, "per_page": 3000, "total": 1}, []]'
+
+    responses.add_callback(responses.GET, URL, callback=callback)
+    api = WorldBankAPI('https://api.worldbank.org/v2', hedge_requests=True)
+    warm_up(api)
+
+    started = time.perf_counter()
+    api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+
+    assert time.perf_counter() - started < 0.4
+    assert api.resilience_stats()['hedged_requests'] == 1
+    assert api.resilience_stats()['hedge_wins'] == 1
+
+def test_slow_request_is_hedged_async():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(0.5)
+        return web.json_response(PAGE)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/v2/country/{country}/indicator/{indicator}', handler)
+        async with TestServer(app) as server:
+            api = WorldBankAPI(str(server.make_url('/v2')), hedge_requests=True)
+            warm_up(api)
+            started = time.perf_counter()
+            data = await api.fetch_indicator_data_async('SP.POP.TOTL', 'USA', 2020, 2020)
+            return api, data, time.perf_counter() - started
+
+    api, data, elapsed = asyncio.run(run())
+
+    assert [item['date'] for item in data] == ['2020']
+    assert elapsed < 0.4
+    assert api.resilience_stats()['hedge_wins'] == 1
+    # The abandoned duplicate gave its rate limiter slot back
+    assert api.rate_limiter.stats()['in_flight'] == 0
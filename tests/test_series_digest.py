@@ -0,0 +1,36 @@
+import pandas as pd
+from src.data_processor import DataProcessor
+from src.series_digest import series_digests, select_series
+
+def make_frame(rows):
+    df = pd.DataFrame(rows, columns=['country_name', 'country_code', 'year', 'value'])
+    return df.set_index(['country_name', 'country_code', 'year'])
+
+ROWS = [('United States', 'USA', 2020, 20.9), ('United States', 'USA', 2019, 21.4), ('Canada', 'CAN', 2020, 1.6)]
+
+def test_digest_per_country_ignores_order_and_dtypes():
+    df = make_frame(ROWS)
+
+    digests = series_digests(df)
+
+    assert sorted(digests) == ['CAN', 'USA']
+    assert series_digests(df.iloc[::-1]) == digests
+    assert series_digests(DataProcessor.compact_frame(df)) == digests
+    assert series_digests(df.reset_index()) == digests
+
+def test_only_the_changed_series_digest_moves():
+    before = series_digests(make_frame(ROWS))
+
+    after = series_digests(make_frame(ROWS[:1] + [('United States', 'USA', 2019, 21.5)] + ROWS[2:]))
+    extended = series_digests(make_frame(ROWS + [('Canada', 'CAN', 2021, 1.7)]))
+
+    assert after['USA'] != before['USA'] and after['CAN'] == before['CAN']
+    assert extended['CAN'] != before['CAN'] and extended['USA'] == before['USA']
+
+def test_select_series_keeps_input_shape():
+    df = make_frame(ROWS)
+
+    selected = select_series(df, ['USA'])
+
+    assert list(selected.index.get_level_values('country_code')) == ['USA', 'USA']
+    assert len(select_series(df.reset_index(), {'CAN': 'x'})) == 1
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from src.database import MongoDBHandler
+from src.series_store import SeriesStore, SERIES_COLLECTION
+
+NOW = datetime(2024, 7, 1, tzinfo=timezone.utc)
+DOCUMENTS = [
+    {'_id': 'GDP|USA', 'indicator': 'GDP', 'indicator_name': 'GDP (current US$)', 'country_code': 'USA',
+     'country_name': 'United States', 'last_updated': NOW, 'values': {'2020': 20.9, '2019': 21.4, '1999': 9.6}},
+    {'_id': 'GDP|CAN', 'indicator': 'GDP', 'indicator_name': 'GDP (current US$)', 'country_code': 'CAN',
+     'country_name': 'Canada', 'last_updated': NOW, 'values': {'2020': 1.6}},
+]
+
+@pytest.fixture
+def store():
+    db = MagicMock()
+    store = SeriesStore(db)
+    store.collection.find.return_value = DOCUMENTS
+    return store
+
+def test_operations_group_rows_by_series(store):
+    records = [{'country_code': 'USA', 'year': 2020, 'value': 20.9, 'country_name': 'United States'},
+               {'country_code': 'USA', 'year': 2019, 'value': 21.4},
+               {'country_code': 'CAN', 'year': 2020, 'value': 1.6}]
+
+    operations = store.operations('GDP', '$GDP', records, NOW)
+
+    assert [operation._filter for operation in operations] == [{'_id': 'GDP|USA'}, {'_id': 'GDP|CAN'}]
+    last_updated, fields = (stage['$set'] for stage in operations[0]._doc)
+    # Only the written years are touched, and last_updated moves only if one of them changed
+    assert fields['values.2020'] == 20.9 and fields['values.2019'] == 21.4
+    assert fields['indicator_name'] == {'$literal': '$GDP'}
+    assert fields['country_name'] == {'$literal': 'United States'}
+    assert last_updated['last_updated']['$cond'][0] == {'$and': [{'$eq': ['$values.2020', 20.9]},
+                                                                 {'$eq': ['$values.2019', 21.4]}]}
+    assert 'country_name' not in operations[1]._doc[1]['$set']
+
+def test_find_frame_matches_row_layout_frame(store):
+    rows = [{'_id': i, **row} for i, row in enumerate(store.find_rows('GDP', start_year=2000, end_year=2020))]
+    expected = pd.DataFrame(rows).set_index(['country_name', 'country_code', 'year']).drop(columns='_id')
+
+    df = store.find_frame('GDP', start_year=2000, end_year=2020)
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert 1999 not in df.index.get_level_values('year')
+
+def test_queries_select_series_by_id(store):
+    store.find_rows('GDP', ['USA', 'CAN'])
+    assert store.collection.find.call_args[0][0] == {'indicator': 'GDP', '_id': {'$in': ['GDP|USA', 'GDP|CAN']}}
+
+    store.find_rows('GDP', ['all'])
+    assert store.collection.find.call_args[0][0] == {'indicator': 'GDP'}
+
+def test_stored_values_and_latest_year(store):
+    assert store.stored_values('GDP', [('USA', 2020)])[('USA', 2020)] == 20.9
+    assert store.latest_year('GDP') == 2020
+    assert store.latest_year('GDP', ['USA'], 1990, 2019) == 2019
+
+def test_handler_writes_series_documents():
+    with patch('src.database.MongoClient'):
+        handler = MongoDBHandler(layout='series')
+    series_collection = handler.series_store.collection
+    series_collection.bulk_write.return_value = MagicMock(matched_count=0, modified_count=0, upserted_count=2)
+    series_collection.find.return_value = DOCUMENTS
+    data = [{'country_code': 'USA', 'year': 2020, 'value': 20.9}, {'country_code': 'USA', 'year': 2019, 'value': 21.4},
+            {'country_code': 'CAN', 'year': 2020, 'value': 1.6}]
+
+    counts = handler.insert_or_update_indicator_data('GDP', 'GDP (current US$)', data)
+
+    assert len(series_collection.bulk_write.call_args[0][0]) == 2
+    assert counts['upserted'] == 2
+    assert counts['verification']['missing'] == counts['verification']['mismatched'] == 0
+    assert handler.get_latest_year('GDP') == 2020
+    assert SERIES_COLLECTION == 'indicator_series'
+
+def test_handler_reads_series_values():
+    with patch('src.database.MongoClient'):
+        handler = MongoDBHandler(layout='series')
+    handler.series_store.collection.find.return_value = DOCUMENTS
+
+    df = handler.get_indicator_values('GDP', start_year=2000, end_year=2020)
+
+    assert list(df.columns) == ['value'] and df.attrs['indicator_name'] == 'GDP (current US$)'
+    assert df.loc[('United States', 'USA', 2019), 'value'] == 21.4
+
+def test_row_counts_count_stored_years(store):
+    store.collection.aggregate.return_value = [{'country_code': 'USA', 'rows': 3}]
+
+    assert store.row_counts('GDP', ['USA']) == {'USA': 3}
+    match, project = store.collection.aggregate.call_args[0][0]
+    assert match == {'$match': {'indicator': 'GDP', '_id': {'$in': ['GDP|USA']}}}
+    assert project['$project']['rows'] == {'$size': {'$objectToArray': '$values'}}
+
+def test_unknown_layout_is_rejected():
+    with patch('src.database.MongoClient'), pytest.raises(ValueError):
+        MongoDBHandler(layout='columns')
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import pytest
+import responses
+from src.api import WorldBankAPI
+from src.single_flight import SingleFlight
+
+URL = 'https://api.worldbank.org/v2/country/USA/indicator/SP.POP.TOTL'
+PAGE = [
+    {'page': 1, 'pages': 1, 'per_page': 3000, 'total': 1},
+    [{'country': {'id': 'US', 'value': 'United States'}, 'countryiso3code': 'USA', 'date': '2020', 'value': 331}]
+]
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow_call))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['result'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'calls': 1, 'saved_calls': 4}
+
+def test_failures_are_shared_but_not_kept():
+    flight = SingleFlight(max_results=4)
+
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+    assert flight.do('key', lambda: 'ok') == 'ok'
+    assert flight.do('key', lambda: 'not called') == 'ok'
+    assert flight.stats() == {'calls': 2, 'saved_calls': 1}
+
+def test_async_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async('key', slow_call) for _ in range(3)))
+
+    assert asyncio.run(run()) == ['result'] * 3
+    assert len(calls) == 1
+
+@responses.activate
+def test_duplicate_indicator_codes_are_fetched_once():
+    responses.add(responses.GET, URL, json=PAGE)
+    api = WorldBankAPI('https://api.worldbank.org/v2', single_flight_results=16)
+
+    results = api.fetch_all_data([('SP.POP.TOTL', ['USA'], 2020, 2020)] * 2)
+
+    assert len(results['SP.POP.TOTL']) == 1
+    assert len(responses.calls) == 1
+    assert api.single_flight_stats() == {'calls': 1, 'saved_calls': 0, 'duplicate_queries': 1}
+
+@responses.activate
+def test_pages_are_not_kept_but_probes_are():
+    responses.add(responses.GET, URL, json=PAGE)
+    api = WorldBankAPI('https://api.worldbank.org/v2', single_flight_results=16)
+
+    api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+    api.fetch_indicator_data('SP.POP.TOTL', 'USA', 2020, 2020)
+    api.probe_last_updated('SP.POP.TOTL', 'USA')
+    api.probe_last_updated('SP.POP.TOTL', 'USA')
+
+    # Streamed pages are not held for the rest of the run; one-row probes are
+    assert len(responses.calls) == 3
+    assert len(api.single_flight._results) == 1
+
+def test_results_called_with_remember_false_are_not_kept():
+    flight = SingleFlight(max_results=4)
+
+    assert flight.do('key', lambda: 'first', remember=False) == 'first'
+    assert flight.do('key', lambda: 'second') == 'second'
+    assert flight.do('key', lambda: 'not called') == 'second'
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from src.data_processor import DataProcessor
+from src.validation import DataValidator
+
+def test_valid_processed_frame_passes_unchanged():
+    from benchmarks.bench_processor import synthetic_records
+    df, _ = DataProcessor.process_world_bank_data(synthetic_records(10, 2000, 2005), 'SYN.IND.000')
+
+    valid, report = DataValidator().validate(df, 'SYN.IND.000')
+
+    assert valid is df
+    assert report['rows'] == report['valid'] == len(df)
+    assert report['invalid'] == 0 and report['samples'] == []
+
+def test_each_check_is_counted_and_sampled():
+    rows = [
+        {'country_code': 'USA', 'year': 2020, 'value': 1.0},
+        {'country_code': 'USA', 'year': 2020, 'value': 2.0},
+        {'country_code': None, 'year': 2020, 'value': 1.0},
+        {'country_code': 'CAN', 'year': 'x', 'value': 1.0},
+        {'country_code': 42, 'year': 2003, 'value': 1.0},
+        {'country_code': 'CAN', 'year': 1800, 'value': 1.0},
+        {'country_code': 'CAN', 'year': 2001, 'value': np.inf},
+    ]
+
+    valid, report = DataValidator(sample_size=2).validate(rows, 'GDP')
+
+    assert valid.to_dict('records') == [rows[0]]
+    assert report['errors'] == {'missing_field': 1, 'bad_type': 2, 'year_out_of_range': 1,
+                                'non_finite_value': 1, 'duplicate_key': 1}
+    assert report['invalid'] == 6
+    assert [sample['errors'] for sample in report['samples']] == [['duplicate_key'], ['missing_field']]
+
+def test_missing_column_rejects_every_row():
+    df = pd.DataFrame({'country_code': ['USA'], 'year': [2020]})
+
+    valid, report = DataValidator().validate(df, 'GDP')
+
+    assert valid.empty
+    assert report['errors']['missing_field'] == 1
+
+def test_combine_sums_reports():
+    validator = DataValidator()
+    _, first = validator.validate([{'country_code': 'USA', 'year': 2020, 'value': None}], 'GDP')
+    _, second = validator.validate([{'country_code': 'USA', 'year': 2021, 'value': 1.0}], 'GDP')
+
+    combined = validator.combine(validator.combine(None, first), second)
+
+    assert (combined['rows'], combined['valid'], combined['invalid']) == (2, 1, 1)
+    assert combined['errors']['missing_field'] == 1
@@ -0,0 +1,26 @@
+from benchmarks.bench_api import InstrumentedAPI, run_benchmark
+from benchmarks.worldbank_stub import WorldBankStubServer
+from src.rate_limiter import RateLimiter
+
+def test_synthetic_pagination_metadata():
+    server = WorldBankStubServer(countries=10)
+
+    metadata, rows = server.synthetic_page(['SP.POP.TOTL'], ['all'], '2001:2005', page=2, per_page=20)
+
+    assert metadata['pages'] == 3
+    assert metadata['total'] == 50
+    assert len(rows) == 20
+    assert rows[0]['indicator']['id'] == 'SP.POP.TOTL'
+    assert server.synthetic_page(['SP.POP.TOTL'], ['all'], '2001:2005', page=4, per_page=20)[1] is None
+
+def test_benchmark_against_stub_with_faults():
+    with WorldBankStubServer(countries=30, error_rate=0.05, throttle_rate=0.05, retry_after=0) as server:
+        api = InstrumentedAPI(server.base_url, max_workers=4,
+                              rate_limiter=RateLimiter(rate=500.0, max_concurrency=4, default_retry_after=0.0))
+        queries = [(f"SYN.IND.{i}", ['all'], 2000, 2009) for i in range(3)]
+
+        report = run_benchmark(api, queries)
+
+    assert report['records'] == 3 * 30 * 10
+    assert report['requests'] >= 3
+    assert report['p99_ms'] >= report['p50_ms']